@@ -10,6 +10,9 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.1/ref/settings/
 """
 import os
+import tempfile
+from datetime import timedelta
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -48,7 +51,11 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'fts_app.middleware.InstrumentationMiddleware',
+    'fts_app.middleware.MetricsMiddleware',
+    'fts_app.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'fts_app.middleware.ReplicaStickinessMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -59,11 +66,100 @@ MIDDLEWARE = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'fts_app.authentication.StatelessJWTAuthentication',
         'rest_framework.authentication.TokenAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'fts_app.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
+    'DEFAULT_RENDERER_CLASSES': [
+        'fts_app.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'fts_app.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
 }
 
+# MessagePack is offered to clients only when the optional msgpack package is installed
+if find_spec('msgpack') is not None:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('fts_app.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].append('fts_app.parsers.MessagePackParser')
+
+# Responses smaller than this many bytes are sent uncompressed
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_BROTLI_QUALITY = 5
+
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=15),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
+    # 'Token' keeps clients that send "Authorization: Token <token>" working
+    'AUTH_HEADER_TYPES': ('Bearer', 'JWT', 'Token'),
+}
+
+# 'default' is private to each worker process. 'shared' is seen by every worker
+# on the host; point it at Redis or Memcached when running on several hosts.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'fts-shared-cache'),
+    },
+}
+
+# Cache alias used to share JWT revocations between workers (None = per process,
+# so a logout only holds in the worker that handled it)
+JWT_REVOCATION_CACHE = 'shared'
+
+# Serve the hot read endpoints from async views; enable when running under asgi.py
+ASYNC_READ_VIEWS = False
+# Thread pools for blocking work done by async views (CPU defaults to the core count)
+ASYNC_IO_WORKERS = 16
+ASYNC_CPU_WORKERS = None
+
+# Reference viewsets (designations, offices, loans) cache their GET responses
+RESPONSE_CACHE_TTL = 300
+RESPONSE_CACHE_MAX_ENTRIES = 1024
+# Cache alias shared by all workers for responses and invalidations. None turns
+# response caching off: per-process copies would outlive writes made in other workers.
+RESPONSE_CACHE_ALIAS = 'shared'
+
+# Per-request SQL/serializer/render timings (Server-Timing header and fts_app.requests log).
+# Off by default: when on, every request logs a JSON line at INFO.
+INSTRUMENTATION_ENABLED = False
+# Flag a request as a likely N+1 when one SQL shape runs more than this many times
+INSTRUMENTATION_NPLUSONE_THRESHOLD = 5
+# Each worker writes its rolling per-route summary here; read with `manage.py route_stats`
+ROUTE_STATS_DIR = os.path.join(tempfile.gettempdir(), 'fts-route-stats')
+ROUTE_STATS_FLUSH_INTERVAL = 30
+ROUTE_STATS_WINDOW = 1000
+
+# Serve Prometheus metrics at /metrics (needs prometheus_client). With several
+# workers set the PROMETHEUS_MULTIPROC_DIR environment variable to a shared, empty
+# directory and call fts_app.metrics.mark_process_dead from gunicorn's child_exit.
+# Keep /metrics off the public load balancer.
+METRICS_ENABLED = False
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'fts_app.requests': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
+# Where `manage.py bench_suite` keeps its JSON results for run-to-run comparison
+BENCHMARK_RESULTS_DIR = os.path.join(tempfile.gettempdir(), 'fts-benchmarks')
+
+# Upper bound for the ?page_size= query parameter
+KEYSET_MAX_PAGE_SIZE = 200
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 ROOT_URLCONF = 'file_tracking_system.urls'
@@ -100,9 +196,20 @@ DATABASES = {  # postgresql
         'HOST': 'localhost',
         'PORT': '5433',
 
-    }
+    },
+    # Read replicas are extra aliases listed in REPLICA_DATABASES, e.g.
+    # 'replica1': {**<same settings as default>, 'HOST': 'replica1.internal', 'TEST': {'MIRROR': 'default'}},
 }
 
+DATABASE_ROUTERS = ['fts_app.db_routers.ReplicaRouter']
+# Aliases that safe-method reads are spread over; empty sends everything to default
+REPLICA_DATABASES = []
+# Seconds a client keeps reading from the primary after a write
+READ_YOUR_WRITES_WINDOW = 5
+# Cache holding those pins. It must be shared between workers, or a pin only holds
+# in the worker that served the write; use Redis or Memcached across several hosts.
+REPLICA_STICKINESS_CACHE = 'shared'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
@@ -148,3 +255,36 @@ STATIC_URL = '/static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Uploads are stored once per distinct content, see fts_app/storage.py
+STORAGES = {
+    'default': {
+        'BACKEND': 'fts_app.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+
+# File numbers are allocated as "<prefix><zero padded number>" in blocks per worker
+FILE_NUMBER_PREFIX = 'G.U.'
+FILE_NUMBER_WIDTH = 7
+FILE_NUMBER_BLOCK_SIZE = 50
+
+# Province/district/municipality lists only change with a deploy
+GEOGRAPHY_CACHE_MAX_AGE = 60 * 60 * 24 * 7
+
+# Resumable uploads expire this many seconds after their last chunk
+UPLOAD_SESSION_TTL = 60 * 60 * 24
+UPLOAD_SESSION_MAX_SIZE = 2 * 1024 ** 3
+BULK_UPLOAD_MAX_FILES = 100
+# Employee spreadsheet imports are validated and saved this many rows at a time
+USER_IMPORT_BATCH_SIZE = 500
+# CSV/XLSX exports read this many rows per database round trip
+EXPORT_CHUNK_SIZE = 2000
+
+# Signed media URLs stay valid for this many seconds
+MEDIA_URL_MAX_AGE = 300
+# Set to 'nginx' (X-Accel-Redirect) or 'apache' (X-Sendfile) to offload downloads
+MEDIA_ACCEL = None
+MEDIA_ACCEL_PREFIX = '/protected-media/'
@@ -1,12 +1,13 @@
 from django.contrib import admin
 from django.urls import path, include
-from django.conf.urls.static import static
-from django.conf import settings
+
+from fts_app import metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path("api/", include("fts_app.urls")),
 
 ]
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+
+if metrics.METRICS_ENABLED:
+    urlpatterns.append(path('metrics', metrics.metrics_view, name='metrics'))
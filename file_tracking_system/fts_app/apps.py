@@ -1,5 +1,15 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class FtsAppConfig(AppConfig):
     name = 'fts_app'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .instrumentation import install_sql_wrapper
+        from .search import ensure_search_schema
+
+        post_migrate.connect(ensure_search_schema, sender=self)
+        connection_created.connect(install_sql_wrapper)
@@ -0,0 +1,210 @@
+import functools
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import check_password, make_password
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.request import Request
+
+from .authentication import aauthenticate, issue_tokens
+from .executors import run_cpu
+from .media import aserve_media, has_valid_signature
+from .models import CustomUser, Tippani
+from .pagination import KeysetPagination
+from .parsers import FastJSONParser
+from .renderers import FastJSONRenderer
+from .serializers import TippaniDossierSerializer, TippaniSerializer
+from .views import (
+    TippaniViewSet,
+    _dossier_etag,
+    _etag_matches,
+    _reference_headers,
+    geography_list,
+    geography_search,
+    inbox_queryset,
+    login_user_data,
+)
+
+renderer = FastJSONRenderer()
+
+
+def json_response(data, status=200, headers=None):
+    return HttpResponse(
+        renderer.render(data) if data is not None else b'', status=status,
+        content_type='application/json', headers=headers,
+    )
+
+
+def async_api_view(methods=('GET', 'HEAD'), fallback=None):
+    """
+    Turn an async function into a view that takes a DRF Request.
+
+    Methods outside `methods` go to the sync `fallback` view (run in a
+    thread), so one URL can serve reads asynchronously and keep its sync
+    write path. APIExceptions become JSON error responses as in DRF.
+    """
+    fallback = sync_to_async(fallback) if fallback is not None else None
+
+    def decorator(view):
+        @csrf_exempt
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                if fallback is not None:
+                    return await fallback(request, *args, **kwargs)
+                return json_response({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+            try:
+                return await view(Request(request, parsers=[FastJSONParser(), FormParser(), MultiPartParser()]), *args, **kwargs)
+            except APIException as exc:
+                detail = exc.detail if isinstance(exc.detail, (dict, list)) else {"detail": exc.detail}
+                return json_response(detail, status=exc.status_code)
+        return wrapper
+    return decorator
+
+
+def reference_response(request, data):
+    headers = _reference_headers(data)
+    if _etag_matches(request, headers['ETag']):
+        return json_response(None, status=304, headers=headers)
+    return json_response(data, headers=headers)
+
+
+@async_api_view(fallback=TippaniViewSet.as_view({'get': 'list', 'post': 'create'}))
+async def tippani_list(request):
+    """
+    List Tippanis, one keyset page at a time.
+    """
+    fields, expand = TippaniSerializer.sparse_fieldset(request)
+    tippanis = TippaniSerializer.setup_eager_loading(
+        Tippani.objects.all(), fields, expand, TippaniViewSet.ordering + TippaniViewSet.required_columns
+    )
+    paginator = KeysetPagination()
+    page = await paginator.apaginate_queryset(tippanis, request, ordering=TippaniViewSet.ordering)
+    serializer = TippaniSerializer(page, many=True, context={'request': request})
+    return json_response(paginator.get_paginated_data(serializer.data))
+
+
+@async_api_view(fallback=TippaniViewSet.as_view({
+    'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy',
+}))
+async def tippani_detail(request, pk):
+    """
+    Get a single Tippani.
+    """
+    fields, expand = TippaniSerializer.sparse_fieldset(request)
+    tippani = await TippaniSerializer.setup_eager_loading(
+        Tippani.objects.filter(pk=pk), fields, expand, TippaniViewSet.required_columns
+    ).afirst()
+    if tippani is None:
+        return json_response({"detail": "No Tippani matches the given query."}, status=404)
+    return json_response(TippaniSerializer(tippani, context={'request': request}).data)
+
+
+@async_api_view()
+async def tippani_dossier(request, pk):
+    """
+    Get a Tippani with its letters, their files and its approvals.
+    """
+    # Revalidation only needs the version column
+    updated_at = await Tippani.objects.filter(pk=pk).values_list('updated_at', flat=True).afirst()
+    if updated_at is None:
+        return json_response({"detail": "No Tippani matches the given query."}, status=404)
+    headers = {
+        'ETag': _dossier_etag(pk, updated_at),
+        'Cache-Control': 'private, no-cache',
+    }
+    if _etag_matches(request, headers['ETag']):
+        return json_response(None, status=304, headers=headers)
+
+    fields, expand = TippaniDossierSerializer.sparse_fieldset(request)
+    # One query for the Tippani, then one per prefetched relation
+    tippani = await TippaniDossierSerializer.setup_eager_loading(
+        Tippani.objects.filter(pk=pk), fields, expand, TippaniViewSet.required_columns
+    ).afirst()
+    if tippani is None:
+        return json_response({"detail": "No Tippani matches the given query."}, status=404)
+    headers['ETag'] = _dossier_etag(tippani.pk, tippani.updated_at)
+    return json_response(TippaniDossierSerializer(tippani, context={'request': request}).data, headers=headers)
+
+
+@async_api_view()
+async def approval_inbox(request):
+    """
+    List the Tippanis currently held by a designation with a given status.
+    """
+    tippanis, error = inbox_queryset(request)
+    if error:
+        return json_response({"error": error}, status=400)
+    paginator = KeysetPagination()
+    page = await paginator.apaginate_queryset(tippanis, request, ordering=TippaniViewSet.ordering)
+    serializer = TippaniSerializer(page, many=True, context={'request': request})
+    return json_response(paginator.get_paginated_data(serializer.data))
+
+
+@async_api_view()
+async def get_provinces(request):
+    provinces, _ = geography_list()
+    return reference_response(request, provinces)
+
+
+@async_api_view()
+async def get_districts(request, province):
+    districts, error = geography_list(province)
+    if error:
+        return json_response({"error": error}, status=400)
+    return reference_response(request, districts)
+
+
+@async_api_view()
+async def get_municipalities(request, province, district):
+    municipalities, error = geography_list(province, district)
+    if error:
+        return json_response({"error": error}, status=400)
+    return reference_response(request, municipalities)
+
+
+@async_api_view()
+async def search_geography(request):
+    prefix = request.query_params.get('q', '').strip()
+    if not prefix:
+        return json_response({"error": "Query parameter 'q' is required"}, status=400)
+    return reference_response(request, geography_search(prefix))
+
+
+@async_api_view()
+async def serve_protected_media(request, name):
+    """
+    Serve an uploaded file to an authenticated user or a signed URL holder.
+    """
+    if not has_valid_signature(name, request.query_params.get('sig')) and await aauthenticate(request) is None:
+        return json_response({"detail": "Authentication credentials were not provided."}, status=401)
+    return await aserve_media(request, name)
+
+
+@async_api_view(methods=('POST',))
+async def login(request):
+    """
+    Authenticate and log in a user; the password hash is checked in the CPU pool.
+    """
+    username = request.data.get('username')
+    password = request.data.get('password')
+    if not username or not password:
+        return json_response({"non_field_errors": ["Must include 'username' and 'password'."]}, status=401)
+
+    user = await CustomUser.objects.filter(username=username).afirst()
+    if user is None:
+        # Hash anyway so response time does not reveal whether the username exists
+        await run_cpu(make_password, password)
+        return json_response({"non_field_errors": ["Invalid credentials."]}, status=401)
+    # Inactive users are refused like ModelBackend does, without saying why
+    if not await run_cpu(check_password, password, user.password) or not user.is_active:
+        return json_response({"non_field_errors": ["Invalid credentials."]}, status=401)
+
+    refresh, access = issue_tokens(user)
+    return json_response({
+        "user": login_user_data(user),
+        "token": str(access),
+        "refresh": str(refresh),
+    })
@@ -0,0 +1,126 @@
+import heapq
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import get_authorization_header
+from rest_framework.authtoken.models import Token
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+# Claims copied into every token so most views never need to load the user row
+USER_CLAIMS = ('username', 'email', 'employee_id', 'position', 'is_staff', 'is_superuser')
+
+# Optional cache alias shared by all workers; revocations stay per process without it
+JWT_REVOCATION_CACHE = getattr(settings, 'JWT_REVOCATION_CACHE', None)
+
+
+class RevocationSet:
+    """
+    Token ids (jti) revoked before their expiry.
+
+    Entries are kept in a dict for O(1) membership and a heap ordered by
+    expiry, so each entry is dropped as soon as its token would have expired
+    anyway and the set never grows beyond the tokens still alive.
+    """
+
+    def __init__(self, cache_alias=None):
+        self._expiries = {}
+        self._heap = []
+        self._lock = threading.Lock()
+        self._cache_alias = cache_alias
+
+    def _purge(self, now):
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, jti = heapq.heappop(self._heap)
+            if self._expiries.get(jti) == expires_at:
+                del self._expiries[jti]
+
+    def add(self, jti, expires_at):
+        now = time.time()
+        if expires_at <= now:
+            return
+        with self._lock:
+            self._purge(now)
+            self._expiries[jti] = expires_at
+            heapq.heappush(self._heap, (expires_at, jti))
+        if self._cache_alias:
+            caches[self._cache_alias].set(f'fts:jwt:revoked:{jti}', 1, timeout=int(expires_at - now) + 1)
+
+    def __contains__(self, jti):
+        with self._lock:
+            self._purge(time.time())
+            if jti in self._expiries:
+                return True
+        if self._cache_alias:
+            return caches[self._cache_alias].get(f'fts:jwt:revoked:{jti}') is not None
+        return False
+
+    def __len__(self):
+        with self._lock:
+            self._purge(time.time())
+            return len(self._expiries)
+
+
+revoked_tokens = RevocationSet(JWT_REVOCATION_CACHE)
+
+
+def revoke_token(token):
+    """
+    Revoke a validated simplejwt token until it expires.
+    """
+    revoked_tokens.add(token['jti'], token['exp'])
+
+
+def issue_tokens(user):
+    """
+    Return (refresh, access) tokens carrying the claims the views rely on.
+    """
+    refresh = RefreshToken.for_user(user)
+    for claim in USER_CLAIMS:
+        refresh[claim] = getattr(user, claim)
+    return refresh, refresh.access_token
+
+
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    JWT authentication that trusts the token's claims instead of loading the user.
+
+    `request.user` is a TokenUser, so reading a claim such as
+    `request.user.employee_id` needs no query. Values that are not JWTs are
+    left to the next authentication class, which keeps legacy DRF tokens working.
+    """
+
+    def get_raw_token(self, header):
+        raw_token = super().get_raw_token(header)
+        if raw_token is not None and raw_token.count(b'.') != 2:
+            return None
+        return raw_token
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        if validated_token.get('jti') in revoked_tokens:
+            raise InvalidToken({"detail": "Token has been revoked.", "code": "token_revoked"})
+        return validated_token
+
+
+async def aauthenticate(request):
+    """
+    Return the user behind a request's Authorization header, or None, from an async view.
+
+    JWTs are validated without a query; legacy DRF tokens need one async lookup.
+    Invalid or revoked JWTs raise like the sync authentication classes do.
+    """
+    result = StatelessJWTAuthentication().authenticate(request)
+    if result is not None:
+        return result[0]
+    auth = get_authorization_header(request).split()
+    if len(auth) != 2 or auth[0].lower() != b'token':
+        return None
+    token = await Token.objects.select_related('user').filter(key=auth[1].decode(errors='replace')).afirst()
+    if token is None or not token.user.is_active:
+        return None
+    return token.user
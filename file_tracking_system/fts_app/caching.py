@@ -0,0 +1,200 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from .db_routers import pin_primary
+from .metrics import record_cache_lookup
+
+
+# Cache alias shared by all workers; without one, responses are not cached at all
+RESPONSE_CACHE_ALIAS = getattr(settings, 'RESPONSE_CACHE_ALIAS', None)
+RESPONSE_CACHE_TTL = getattr(settings, 'RESPONSE_CACHE_TTL', 300)
+RESPONSE_CACHE_MAX_ENTRIES = getattr(settings, 'RESPONSE_CACHE_MAX_ENTRIES', 1024)
+# How long a request waits for another request that is already building the same response
+RESPONSE_CACHE_COALESCE_TIMEOUT = 5
+
+
+class LRUCache:
+    """
+    A thread-safe in-process cache with a size bound and a per-entry TTL.
+
+    Concurrent misses on the same key are coalesced: the first caller
+    computes the value while the others wait for it instead of all hitting
+    the database at once.
+    """
+
+    def __init__(self, max_entries, ttl, shared_alias=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._shared_alias = shared_alias
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    return value
+                del self._entries[key]
+        if self._shared_alias:
+            value = caches[self._shared_alias].get(key)
+            if value is not None:
+                self._set_local(key, value)
+                return value
+        return None
+
+    def set(self, key, value):
+        self._set_local(key, value)
+        if self._shared_alias:
+            caches[self._shared_alias].set(key, value, timeout=self.ttl)
+
+    def _set_local(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        """
+        Return (value, hit). `compute()` returns (value, cacheable).
+        """
+        value = self.get(key)
+        if value is not None:
+            return value, True
+
+        with self._lock:
+            event = self._inflight.get(key)
+            leader = event is None
+            if leader:
+                event = self._inflight[key] = threading.Event()
+
+        if not leader:
+            event.wait(RESPONSE_CACHE_COALESCE_TIMEOUT)
+            value = self.get(key)
+            if value is not None:
+                return value, True
+            return compute()[0], False
+
+        try:
+            value, cacheable = compute()
+            if cacheable:
+                self.set(key, value)
+            return value, False
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            event.set()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+response_cache = LRUCache(RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL, RESPONSE_CACHE_ALIAS)
+
+_local_versions = {}
+_versions_lock = threading.Lock()
+
+
+def _version_key(model):
+    return f'fts:cache:version:{model._meta.label_lower}'
+
+
+def model_versions(models):
+    """
+    Return the current cache version of every model in `models`.
+    """
+    with _versions_lock:
+        versions = [_local_versions.get(model, 0) for model in models]
+    if RESPONSE_CACHE_ALIAS:
+        shared = caches[RESPONSE_CACHE_ALIAS].get_many([_version_key(model) for model in models])
+        versions += [shared.get(_version_key(model), 0) for model in models]
+    return versions
+
+
+def bump_model_version(model):
+    """
+    Invalidate every cached response built from `model` rows.
+    """
+    with _versions_lock:
+        _local_versions[model] = _local_versions.get(model, 0) + 1
+    if RESPONSE_CACHE_ALIAS:
+        cache = caches[RESPONSE_CACHE_ALIAS]
+        key = _version_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Never bumped before (or evicted): any fresh value differs from the implicit 0
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+class CachedResponseMixin:
+    """
+    Serve list and retrieve responses from `response_cache`.
+
+    Entries are keyed on the full URL and the version of every model in
+    `cache_models` (the queryset's model by default), which the
+    post_save/post_delete signals bump, so a write invalidates them at once.
+    Writes through `QuerySet.update()` send no signals and are only picked
+    up when the entries expire. Set `cache_vary_on_user` for views whose
+    response depends on the requesting user.
+
+    Nothing is cached unless RESPONSE_CACHE_ALIAS names a cache shared by
+    all workers, since a version bump in one worker is invisible to the
+    others otherwise.
+    """
+    cache_actions = ('list', 'retrieve')
+    cache_models = None
+    cache_vary_on_user = False
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_cache_key(self, request):
+        models = self.cache_models or [self.get_queryset().model]
+        parts = [
+            f'{type(self).__module__}.{type(self).__qualname__}',
+            self.action,
+            request.build_absolute_uri(),
+            *map(str, model_versions(models)),
+        ]
+        if self.cache_vary_on_user:
+            parts.append(str(request.user.pk) if request.user.is_authenticated else '-')
+        return 'fts:response:' + hashlib.sha256('\n'.join(parts).encode()).hexdigest()
+
+    def _cached_response(self, handler, request, *args, **kwargs):
+        if not RESPONSE_CACHE_ALIAS or self.action not in self.cache_actions or \
+                request.method not in ('GET', 'HEAD'):
+            return handler(request, *args, **kwargs)
+
+        fresh = []
+
+        def compute():
+            # Built from the primary so a lagging replica cannot be cached under a new version
+            with pin_primary():
+                response = handler(request, *args, **kwargs)
+            fresh.append(response)
+            return response.data, response.status_code == 200
+
+        data, hit = response_cache.get_or_compute(self.get_cache_key(request), compute)
+        record_cache_lookup(type(self).__name__, hit)
+        response = fresh[0] if fresh else Response(data)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
@@ -0,0 +1,73 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+PRIMARY_DATABASE = DEFAULT_DB_ALIAS
+
+# True while the current request (or block) must read from the primary
+_use_primary = ContextVar('fts_use_primary', default=False)
+# Set once anything is written through the router in the current request
+_wrote = ContextVar('fts_wrote', default=False)
+
+
+def replica_aliases():
+    return [alias for alias in getattr(settings, 'REPLICA_DATABASES', ()) if alias in settings.DATABASES]
+
+
+@contextmanager
+def pin_primary():
+    """
+    Send every read inside the block to the primary.
+    """
+    token = _use_primary.set(True)
+    try:
+        yield
+    finally:
+        _use_primary.reset(token)
+
+
+def wrote_to_primary():
+    return _wrote.get()
+
+
+def start_request(use_primary):
+    """
+    Reset the routing state for a new request; pass the result to finish_request().
+    """
+    return _use_primary.set(use_primary), _wrote.set(False)
+
+
+def finish_request(tokens):
+    use_primary, wrote = tokens
+    _use_primary.reset(use_primary)
+    _wrote.reset(wrote)
+
+
+class ReplicaRouter:
+    """
+    Reads go to a random replica from REPLICA_DATABASES, writes to the primary.
+
+    Reads stay on the primary inside a transaction (so a transaction sees
+    its own writes) and whenever `pin_primary()` or ReplicaStickinessMiddleware
+    asks for it. With no replicas configured every query uses the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = replica_aliases()
+        if not replicas or _use_primary.get() or connections[PRIMARY_DATABASE].in_atomic_block:
+            return PRIMARY_DATABASE
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return PRIMARY_DATABASE
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY_DATABASE, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
@@ -0,0 +1,30 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+# Blocking work done on behalf of async views runs in these pools, so a slow
+# disk or an expensive password hash never stalls the event loop and the
+# number of threads it may occupy stays bounded.
+ASYNC_IO_WORKERS = getattr(settings, 'ASYNC_IO_WORKERS', 16)
+ASYNC_CPU_WORKERS = getattr(settings, 'ASYNC_CPU_WORKERS', None) or os.cpu_count() or 1
+
+io_executor = ThreadPoolExecutor(max_workers=ASYNC_IO_WORKERS, thread_name_prefix='fts-io')
+cpu_executor = ThreadPoolExecutor(max_workers=ASYNC_CPU_WORKERS, thread_name_prefix='fts-cpu')
+
+
+async def run_io(func, *args, **kwargs):
+    """
+    Run blocking file-system work in the I/O pool.
+    """
+    return await asyncio.get_running_loop().run_in_executor(io_executor, functools.partial(func, *args, **kwargs))
+
+
+async def run_cpu(func, *args, **kwargs):
+    """
+    Run CPU-bound work that releases the GIL (e.g. password hashing) in the CPU pool.
+    """
+    return await asyncio.get_running_loop().run_in_executor(cpu_executor, functools.partial(func, *args, **kwargs))
@@ -0,0 +1,248 @@
+import csv
+import hashlib
+import os
+import re
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+
+# Rows fetched per round trip; on PostgreSQL they come from a server-side cursor
+EXPORT_CHUNK_SIZE = getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+# Files in a Tippani bundle are copied into the ZIP this many bytes at a time
+BUNDLE_CHUNK_SIZE = 1024 * 1024
+# Formats that are compressed already; deflating them again costs CPU and saves nothing
+STORED_EXTENSIONS = frozenset({
+    '.7z', '.avi', '.bz2', '.docx', '.gif', '.gz', '.heic', '.jpeg', '.jpg', '.m4a', '.mkv', '.mov', '.mp3', '.mp4',
+    '.odp', '.ods', '.odt', '.pdf', '.png', '.pptx', '.rar', '.webm', '.webp', '.xlsx', '.xz', '.zip',
+})
+BUNDLE_MANIFEST_COLUMNS = ('path', 'file_number', 'letter_document', 'registration_no', 'size', 'sha256', 'status')
+# Characters XML 1.0 does not allow, even escaped
+ILLEGAL_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+
+class StreamBuffer:
+    """
+    Write-only, unseekable file object whose bytes are handed out with take().
+
+    Writers such as csv and zipfile write into it while a generator yields
+    whatever has accumulated, so nothing larger than one chunk is held.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class Echo:
+    """
+    Pseudo-buffer that hands back what csv.writer writes instead of storing it.
+    """
+
+    def write(self, value):
+        return value
+
+
+def text(value):
+    """
+    How a value is written to a CSV cell or an XLSX text cell.
+    """
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return (timezone.localtime(value) if timezone.is_aware(value) else value).isoformat(sep=' ')
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def iter_csv(columns, rows):
+    """
+    Yield a CSV file in chunks of EXPORT_CHUNK_SIZE rows.
+    """
+    writer = csv.writer(Echo())
+    # A byte order mark lets Excel detect UTF-8
+    buffer = ['\ufeff', writer.writerow(columns)]
+    for index, row in enumerate(rows, start=1):
+        buffer.append(writer.writerow([text(value) for value in row]))
+        if index % EXPORT_CHUNK_SIZE == 0:
+            yield ''.join(buffer).encode()
+            buffer.clear()
+    yield ''.join(buffer).encode()
+
+
+def _xlsx_cell(value):
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f'<c><v>{value}</v></c>'
+    if value is None:
+        return '<c/>'
+    value = escape(ILLEGAL_XML_CHARS.sub('', text(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{value}</t></is></c>'
+
+
+XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="xl/workbook.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+        '</Relationships>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def iter_xlsx(columns, rows, sheet_name='Export'):
+    """
+    Yield a single-sheet XLSX workbook in chunks.
+
+    The workbook is a ZIP written straight into a StreamBuffer, with the
+    sheet XML deflated as rows arrive, so no spreadsheet library or
+    temporary file is needed.
+    """
+    output = StreamBuffer()
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_PARTS.items():
+            archive.writestr(name, content)
+        archive.writestr('xl/workbook.xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets><sheet name="{escape(sheet_name[:31])}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+        ))
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                '<row>' + ''.join(_xlsx_cell(column) for column in columns) + '</row>'
+            ).encode())
+            buffer = []
+            for index, row in enumerate(rows, start=1):
+                buffer.append('<row>' + ''.join(_xlsx_cell(value) for value in row) + '</row>')
+                if index % EXPORT_CHUNK_SIZE == 0:
+                    sheet.write(''.join(buffer).encode())
+                    buffer.clear()
+                    yield output.take()
+            sheet.write((''.join(buffer) + '</sheetData></worksheet>').encode())
+    yield output.take()
+
+
+def export_response(queryset, columns, file_format, filename):
+    """
+    Stream `columns` of every row in `queryset` as a CSV or XLSX download.
+
+    `columns` are values_list() lookups; "office__office_name" is headed
+    "office.office_name", the column name the employee import accepts.
+    Rows are read with iterator(), so memory use does not grow with the
+    number of rows exported.
+    """
+    rows = queryset.prefetch_related(None).values_list(*columns).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    headers = [column.replace('__', '.') for column in columns]
+    if file_format == 'xlsx':
+        content = iter_xlsx(headers, rows, sheet_name=filename)
+    else:
+        content = iter_csv(headers, rows)
+    response = StreamingHttpResponse(content, content_type=EXPORT_FORMATS[file_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}-{timezone.localdate():%Y%m%d}.{file_format}"'
+    return response
+
+
+def iter_bundle(members, date_time):
+    """
+    Yield a ZIP of `members`, (archive path, FieldFile, manifest fields), plus manifest.csv.
+
+    Each file is copied from storage BUNDLE_CHUNK_SIZE bytes at a time into
+    a StreamBuffer, so neither the archive nor a whole file is held in
+    memory or written to disk. Files missing from storage are listed in the
+    manifest instead of failing the download.
+    """
+    output = StreamBuffer()
+    writer = csv.writer(Echo())
+    manifest = [writer.writerow(BUNDLE_MANIFEST_COLUMNS)]
+    with zipfile.ZipFile(output, 'w', allowZip64=True) as archive:
+        for path, field_file, fields in members:
+            try:
+                source = field_file.storage.open(field_file.name, 'rb')
+            except OSError:
+                manifest.append(writer.writerow((path, *fields, '', '', 'missing')))
+                continue
+            info = zipfile.ZipInfo(path, date_time)
+            extension = os.path.splitext(path)[1].lower()
+            info.compress_type = zipfile.ZIP_STORED if extension in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+            digest = hashlib.sha256()
+            size = 0
+            with source, archive.open(info, 'w', force_zip64=source.size >= zipfile.ZIP64_LIMIT) as entry:
+                while chunk := source.read(BUNDLE_CHUNK_SIZE):
+                    digest.update(chunk)
+                    size += len(chunk)
+                    entry.write(chunk)
+                    yield output.take()
+            manifest.append(writer.writerow((path, *fields, size, digest.hexdigest(), 'ok')))
+        info = zipfile.ZipInfo('manifest.csv', date_time)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        archive.writestr(info, ''.join(manifest))
+    yield output.take()
+
+
+def tippani_bundle_response(tippani, files):
+    """
+    Stream a Tippani's present_file and its letters' `files` as one ZIP download.
+
+    Letter files are stored as "letters/<letter id>/<file number><ext>";
+    manifest.csv maps every entry back to its file number and letter.
+    """
+    members = []
+    if tippani.present_file:
+        extension = os.path.splitext(tippani.present_file.name)[1].lower()
+        members.append((f'present_file{extension}', tippani.present_file, ('', '', '')))
+    for file in files:
+        if file.file:
+            extension = os.path.splitext(file.file.name)[1].lower()
+            members.append((
+                f'letters/{file.letter_document_id}/{file.file_number}{extension}', file.file,
+                (file.file_number, file.letter_document_id, file.letter_document.registration_no),
+            ))
+    # ZIP timestamps cannot predate 1980
+    date_time = max(timezone.localtime(tippani.updated_at).timetuple()[:6], (1980, 1, 1, 0, 0, 0))
+    response = StreamingHttpResponse(iter_bundle(members, date_time), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="tippani-{tippani.pk}.zip"'
+    return response
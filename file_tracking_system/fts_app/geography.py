@@ -0,0 +1,617 @@
+import hashlib
+import json
+from bisect import bisect_left
+from functools import lru_cache
+from types import MappingProxyType
+
+
+# Province data with respective districts
+PROVINCE_DISTRICTS = {
+    "Koshi": ["Jhapa", "Morang", "Sunsari", "Bhojpur", "Ilam", "Khotang", "Okhaldhunga", "Panchthar", "Sankhuwasabha", "Solukhumbu", "Taplejung", "Terhathum", "Udayapur"],
+    "Madhesh": ["Saptari", "Dhanusha", "Mahottari", "Sarlahi", "Siraha", "Bara", "Parsa", "Rautahat", "Chhathapol"],
+    "Bagmati": ["Kathmandu", "Bhaktapur", "Lalitpur", "Kavrepalanchok", "Nuwakot", "Rasuwa", "Sindhuli", "Sindhupalchok", "Chitwan", "Makawanpur", "Bhaktapur", "Nawalparasi", "Tanahu"],
+    "Gandaki": ["Kaski", "Parbat", "Tanahun", "Gorkha", "Lamjung", "Manang", "Mustang", "Syangja", "Nawalparasi", "Syangja"],
+    "Lumbini": ["Rupandehi", "Kapilvastu", "Palpa", "Nawalparasi", "Arghakhanchi", "Rukum", "Salyan", "Dang", "Banke", "Bardiya"],
+    "Karnali": ["Surkhet", "Dailekh", "Jajarkot", "Jumla", "Kalikot", "Mugu", "Humla", "Dolpa", "Rukum", "Salyan"],
+    "Sudurpaschim": ["Kanchanpur", "Baitadi", "Darchula", "Achham", "Kailali", "Bajura", "Bajhang", "Dadeldhura", "Doti", "Dadeldhura"]
+}
+
+DISTRICT_MUNICIPALITIES = {
+    # Koshi Province (Province 1)
+    "Bhojpur": [
+        "Bhojpur Municipality", "Shadananda Municipality",
+        "Hatuwagadhi Rural Municipality", "Aamchowk Rural Municipality",
+        "Arun Rural Municipality", "Pauwadungma Rural Municipality",
+        "Ramprasad Rai Rural Municipality", "Salpasilichho Rural Municipality",
+        "Tyamke Maiyum Rural Municipality"
+    ],
+    "Dhankuta": [
+        "Dhankuta Municipality", "Pakhribas Municipality",
+        "Mahalaxmi Municipality", "Chhathar Jorpati Rural Municipality",
+        "Shahidbhumi Rural Municipality", "Sangurigadhi Rural Municipality"
+    ],
+    "Ilam": [
+        "Ilam Municipality", "Deumai Municipality", "Mai Municipality",
+        "Suryodaya Municipality", "Fakfokthum Rural Municipality",
+        "Chulachuli Rural Municipality", "Mangsebung Rural Municipality",
+        "Maijogmai Rural Municipality", "Rong Rural Municipality",
+        "Sandakpur Rural Municipality"
+    ],
+    "Jhapa": [
+        "Bhadrapur Municipality", "Birtamod Municipality", "Damak Municipality",
+        "Mechinagar Municipality", "Kankai Municipality", "Shivasatakshi Municipality",
+        "Arjundhara Municipality", "Buddhashanti Rural Municipality",
+        "Barhadashi Rural Municipality", "Gauriganj Rural Municipality",
+        "Gauradaha Municipality", "Haldibari Rural Municipality",
+        "Jhapa Rural Municipality", "Kamal Rural Municipality"
+    ],
+    "Khotang": [
+        "Diktel Rupakot Majhuwagadhi Municipality", "Halesi Tuwachung Municipality",
+        "Aiselukharka Rural Municipality", "Barahapokhari Rural Municipality",
+        "Diprung Chuichumma Rural Municipality", "Jantedhunga Rural Municipality",
+        "Khotehang Rural Municipality", "Lamidanda Rural Municipality",
+        "Rawabesi Rural Municipality", "Sakela Rural Municipality"
+    ],
+    "Morang": [
+        "Biratnagar Metropolitan City", "Sundar Haraicha Municipality",
+        "Belbari Municipality", "Pathari Sanischare Municipality",
+        "Rangeli Municipality", "Letang Municipality",
+        "Ratuwamai Municipality", "Urlabari Municipality",
+        "Katahari Rural Municipality", "Kerabari Rural Municipality",
+        "Gramthan Rural Municipality", "Miklajung Rural Municipality",
+        "Budhiganga Rural Municipality", "Dhanpalthan Rural Municipality"
+    ],
+    "Okhaldhunga": [
+        "Siddhicharan Municipality", "Molung Rural Municipality",
+        "Champadevi Rural Municipality", "Khijidemba Rural Municipality",
+        "Likhu Rural Municipality", "Manebhanjyang Rural Municipality",
+        "Chisankhugadhi Rural Municipality"
+    ],
+    "Panchthar": [
+        "Phidim Municipality", "Hilihang Rural Municipality",
+        "Kummayak Rural Municipality", "Miklajung Rural Municipality",
+        "Tumbewa Rural Municipality", "Yangwarak Rural Municipality",
+        "Falelung Rural Municipality"
+    ],
+    "Sankhuwasabha": [
+        "Khandbari Municipality", "Dharan Sub-Metropolitan City",
+        "Chainpur Municipality", "Madi Municipality",
+        "Makalu Rural Municipality", "Bhotkhola Rural Municipality",
+        "Chichila Rural Municipality", "Silichong Rural Municipality",
+        "Sabhapokhari Rural Municipality"
+    ],
+    "Solukhumbu": [
+        "Solu Dudhkunda Municipality", "Khumbu Pasang Lhamu Rural Municipality",
+        "Necha Salyan Rural Municipality", "Mahakulung Rural Municipality",
+        "Likhupike Rural Municipality", "Thulung Dudhkoshi Rural Municipality",
+        "Mapya Dudhkoshi Rural Municipality"
+    ],
+    "Sunsari": [
+        "Dharan Sub-Metropolitan City", "Itahari Sub-Metropolitan City",
+        "Inaruwa Municipality", "Duhabi Municipality",
+        "Ramnagar Bhulke Municipality", "Harinagara Rural Municipality",
+        "Dewanganj Rural Municipality", "Koshi Rural Municipality",
+        "Barju Rural Municipality", "Gadhi Rural Municipality",
+        "Bhokraha Narsingh Rural Municipality"
+    ],
+    "Taplejung": [
+        "Phungling Municipality", "Aathrai Tribeni Rural Municipality",
+        "Maiwakhola Rural Municipality", "Mikwa Khola Rural Municipality",
+        "Meringden Rural Municipality", "Phaktanglung Rural Municipality",
+        "Sidingwa Rural Municipality", "Sirijunga Rural Municipality",
+        "Pathivara Yangwarak Rural Municipality"
+    ],
+    "Terhathum": [
+        "Myanglung Municipality", "Laligurans Municipality",
+        "Chhathar Rural Municipality", "Menchayam Rural Municipality",
+        "Phedap Rural Municipality", "Aathrai Rural Municipality"
+    ],
+    "Udayapur": [
+        "Triyuga Municipality", "Katari Municipality", "Chaudandigadhi Municipality",
+        "Belaka Municipality", "Udayapurgadhi Rural Municipality",
+        "Tapli Rural Municipality", "Rautamai Rural Municipality",
+        "Limchungbung Rural Municipality"
+    ],
+
+    # Madhesh Province (Province 2)
+    "Bara": [
+        "Kalaiya Sub-Metropolitan City", "Jeetpur Simara Sub-Metropolitan City",
+        "Kolhabi Municipality", "Nijgadh Municipality", "Mahagadhimai Municipality",
+        "Simraungadh Municipality", "Pacharauta Municipality", "Adarsh Kotwal Rural Municipality",
+        "Baragadhi Rural Municipality", "Devtal Rural Municipality", "Feta Rural Municipality",
+        "Karaiyamai Rural Municipality", "Parwanipur Rural Municipality", "Prasauni Rural Municipality",
+        "Suwarna Rural Municipality"
+    ],
+    "Dhanusha": [
+        "Janakpurdham Sub-Metropolitan City", "Chhireshwarnath Municipality",
+        "Dhanusadham Municipality", "Ganeshman Charnath Municipality",
+        "Kamala Municipality", "Mithila Municipality", "Mithila Bihari Municipality",
+        "Nagarain Municipality", "Sahidnagar Municipality", "Bateshwar Rural Municipality",
+        "Bideha Rural Municipality", "Janaknandini Rural Municipality",
+        "Laxminiya Rural Municipality", "Mukhiyapatti Musarmiya Rural Municipality",
+        "Sabaila Municipality", "Hansapur Municipality", "Aurahi Rural Municipality"
+    ],
+    "Mahottari": [
+        "Jaleshwar Municipality", "Bardibas Municipality", "Gaushala Municipality",
+        "Loharpatti Municipality", "Matihani Municipality", "Balwa Municipality",
+        "Ramgopalpur Municipality", "Manara Shiswa Municipality", "Sonama Rural Municipality",
+        "Ekdara Rural Municipality", "Samsi Rural Municipality", "Mahottari Rural Municipality",
+        "Pipra Rural Municipality"
+    ],
+    "Parsa": [
+        "Birgunj Metropolitan City", "Bahudarmai Municipality", "Parsagadhi Municipality",
+        "Pokhariya Municipality", "Bindabasini Rural Municipality", "Chhipaharmai Rural Municipality",
+        "Dhobini Rural Municipality", "Jagarnathpur Rural Municipality",
+        "Kalikamai Rural Municipality", "Paterwa Sugauli Rural Municipality",
+        "Sakhuwa Prasauni Rural Municipality", "Thori Rural Municipality"
+    ],
+    "Rautahat": [
+        "Gaur Municipality", "Chandrapur Municipality", "Garuda Municipality",
+        "Gadhimai Municipality", "Baudhimai Municipality", "Brindaban Municipality",
+        "Gujara Municipality", "Katahariya Municipality", "Dewahi Gonahi Municipality",
+        "Phatuwa Bijayapur Municipality", "Paroha Municipality", "Rajpur Municipality",
+        "Ishnath Municipality", "Durga Bhagwati Rural Municipality",
+        "Madhav Narayan Rural Municipality", "Maulapur Municipality", "Yamunamai Rural Municipality"
+    ],
+    "Saptari": [
+        "Rajbiraj Municipality", "Bodebarsain Municipality", "Dakneshwori Municipality",
+        "Hanumannagar Kankalini Municipality", "Kanchanrup Municipality",
+        "Khadak Municipality", "Saptakoshi Municipality", "Shambhunath Municipality",
+        "Agnisair Krishna Savaran Rural Municipality", "Bishnupur Rural Municipality",
+        "Chhinnamasta Rural Municipality", "Mahadeva Rural Municipality",
+        "Rupani Rural Municipality", "Surunga Municipality", "Tilathi Koiladi Rural Municipality",
+        "Tirhut Rural Municipality"
+    ],
+    "Sarlahi": [
+        "Malangwa Municipality", "Haripur Municipality", "Harion Municipality",
+        "Bagmati Municipality", "Balara Municipality", "Barahathawa Municipality",
+        "Chandranagar Rural Municipality", "Godaita Municipality", "Ishworpur Municipality",
+        "Kabilasi Municipality", "Kaudena Rural Municipality", "Lalbandi Municipality",
+        "Parsa Rural Municipality", "Ramnagar Rural Municipality", "Bishnu Rural Municipality",
+        "Basbariya Rural Municipality"
+    ],
+    "Siraha": [
+        "Siraha Municipality", "Lahan Municipality", "Golbazar Municipality",
+        "Dhangadhimai Municipality", "Mirchaiya Municipality", "Kalyanpur Municipality",
+        "Bhagawanpur Rural Municipality", "Aurahi Rural Municipality",
+        "Bariyarpatti Rural Municipality", "Bishnupur Rural Municipality",
+        "Laxmipur Patari Rural Municipality", "Naraha Rural Municipality",
+        "Sakhuwanankarkatti Rural Municipality", "Sukhipur Municipality",
+        "Arnama Rural Municipality"
+    ],
+
+    # Bagmati Province (Province 3)
+    "Bhaktapur": [
+        "Bhaktapur Municipality", "Changunarayan Municipality",
+        "Madhyapur Thimi Municipality", "Suryabinayak Municipality"
+    ],
+    "Chitwan": [
+        "Bharatpur Metropolitan City", "Ratnanagar Municipality",
+        "Khairahani Municipality", "Madi Municipality",
+        "Rapti Municipality", "Kalika Municipality", "Ichchhakamana Rural Municipality"
+    ],
+    "Dhading": [
+        "Nilkantha Municipality", "Dhunibesi Municipality",
+        "Gajuri Rural Municipality", "Galchhi Rural Municipality",
+        "Jwalamukhi Rural Municipality", "Khaniyabas Rural Municipality",
+        "Netrawati Dabjong Rural Municipality", "Rubi Valley Rural Municipality",
+        "Siddhalek Rural Municipality", "Thakre Rural Municipality",
+        "Tripurasundari Rural Municipality"
+    ],
+    "Dolakha": [
+        "Bhimeshwar Municipality", "Jiri Municipality",
+        "Baiteshwor Rural Municipality", "Bigu Rural Municipality",
+        "Gaurishankar Rural Municipality", "Kalinchowk Rural Municipality",
+        "Melung Rural Municipality", "Shailung Rural Municipality",
+        "Tamakoshi Rural Municipality"
+    ],
+    "Kathmandu": [
+        "Kathmandu Metropolitan City", "Kageshwari-Manohara Municipality",
+        "Kirtipur Municipality", "Chandragiri Municipality",
+        "Gokarneshwar Municipality", "Nagarjun Municipality",
+        "Shankharapur Municipality", "Tarakeshwar Municipality",
+        "Tokha Municipality", "Budhanilkantha Municipality"
+    ],
+    "Kavrepalanchok": [
+        "Banepa Municipality", "Dhulikhel Municipality",
+        "Panauti Municipality", "Panchkhal Municipality",
+        "Mandandeupur Municipality", "Namobuddha Municipality",
+        "Bhumlu Rural Municipality", "Chaurideurali Rural Municipality",
+        "Khanikhola Rural Municipality", "Mahabharat Rural Municipality",
+        "Roshi Rural Municipality", "Temal Rural Municipality"
+    ],
+    "Lalitpur": [
+        "Lalitpur Metropolitan City", "Godawari Municipality",
+        "Mahalaxmi Municipality", "Konjyosom Rural Municipality",
+        "Bagmati Rural Municipality"
+    ],
+    "Makwanpur": [
+        "Hetauda Sub-Metropolitan City", "Thaha Municipality",
+        "Bakaiya Rural Municipality", "Bhimphedi Rural Municipality",
+        "Indrasarowar Rural Municipality", "Kailash Rural Municipality",
+        "Makawanpurgadhi Rural Municipality", "Manahari Rural Municipality",
+        "Raksirang Rural Municipality"
+    ],
+    "Nuwakot": [
+        "Bidur Municipality", "Belkotgadhi Municipality",
+        "Kakani Rural Municipality", "Kispang Rural Municipality",
+        "Likhu Rural Municipality", "Meghang Rural Municipality",
+        "Panchakanya Rural Municipality", "Shivapuri Rural Municipality",
+        "Suryagadhi Rural Municipality", "Tadi Rural Municipality",
+        "Tarkeshwar Rural Municipality"
+    ],
+    "Ramechhap": [
+        "Manthali Municipality", "Ramechhap Municipality",
+        "Doramba Rural Municipality", "Gokulganga Rural Municipality",
+        "Khadadevi Rural Municipality", "Likhu Tamakoshi Rural Municipality",
+        "Umakunda Rural Municipality", "Sunapati Rural Municipality"
+    ],
+    "Rasuwa": [
+        "Kalika Rural Municipality", "Gosaikunda Rural Municipality",
+        "Naukunda Rural Municipality", "Aamachhodingmo Rural Municipality"
+    ],
+    "Sindhuli": [
+        "Kamalamai Municipality", "Dudhauli Municipality",
+        "Golanjor Rural Municipality", "Hariharpurgadhi Rural Municipality",
+        "Marin Rural Municipality", "Phikkal Rural Municipality",
+        "Sunkoshi Rural Municipality", "Tinpatan Rural Municipality"
+    ],
+    "Sindhupalchok": [
+        "Chautara Sangachowkgadi Municipality", "Bahrabise Municipality",
+        "Melamchi Municipality", "Balefi Rural Municipality",
+        "Bhotekoshi Rural Municipality", "Helambu Rural Municipality",
+        "Indrawati Rural Municipality", "Jugal Rural Municipality",
+        "Lisankhupakhar Rural Municipality", "Panchpokhari Thangpal Rural Municipality",
+        "Sunkoshi Rural Municipality", "Tripurasundari Rural Municipality"
+    ],
+    # Gandaki Province (Province 4)
+    "Baglung": [
+        "Baglung Municipality", "Jaimini Municipality",
+        "Bareng Rural Municipality", "Dhorpatan Rural Municipality",
+        "Galkot Rural Municipality", "Kanthekhola Rural Municipality",
+        "Nisikhola Rural Municipality", "Tamankhola Rural Municipality"
+    ],
+    "Gorkha": [
+        "Gorkha Municipality", "Palungtar Municipality",
+        "Ajirkot Rural Municipality", "Aarughat Rural Municipality",
+        "Barpak Sulikot Rural Municipality", "Bhimsen Thapa Rural Municipality",
+        "Chumanuwri Rural Municipality", "Dharche Rural Municipality",
+        "Gandaki Rural Municipality", "Shahid Lakhan Rural Municipality",
+        "Siranchowk Rural Municipality", "Tsum Nubri Rural Municipality"
+    ],
+    "Kaski": [
+        "Pokhara Metropolitan City",
+        "Annapurna Rural Municipality", "Machhapuchhre Rural Municipality",
+        "Madi Rural Municipality", "Rupa Rural Municipality"
+    ],
+    "Lamjung": [
+        "Besishahar Municipality", "Madhya Nepal Municipality",
+        "Rainas Municipality", "Sundarbazar Municipality",
+        "Dordi Rural Municipality", "Kwhlosothar Rural Municipality",
+        "Marsyangdi Rural Municipality"
+    ],
+    "Manang": [
+        "Narpa Bhumi Rural Municipality", "Nashong Rural Municipality",
+        "Chame Rural Municipality", "Narpabhumi Rural Municipality",
+        "Manang Disyang Rural Municipality"
+    ],
+    "Mustang": [
+        "Gharpajhong Rural Municipality", "Thasang Rural Municipality",
+        "Lo-Ghekar Damodarkunda Rural Municipality",
+        "Barhagaun Muktichhetra Rural Municipality", "Lomanthang Rural Municipality"
+    ],
+    "Myagdi": [
+        "Beni Municipality", "Annapurna Rural Municipality",
+        "Dhawalagiri Rural Municipality", "Mangala Rural Municipality",
+        "Malika Rural Municipality", "Raghuganga Rural Municipality"
+    ],
+    "Nawalpur (East Nawalparasi)": [
+        "Kawasoti Municipality", "Devchuli Municipality",
+        "Gaindakot Municipality", "Madhyabindu Municipality",
+        "Binayi Tribeni Rural Municipality", "Bulingtar Rural Municipality",
+        "Hupsekot Rural Municipality"
+    ],
+    "Parbat": [
+        "Kushma Municipality", "Jaljala Rural Municipality",
+        "Mahashila Rural Municipality", "Modi Rural Municipality",
+        "Paiyun Rural Municipality", "Phalewas Municipality"
+    ],
+    "Syangja": [
+        "Putalibazar Municipality", "Bhirkot Municipality",
+        "Chapakot Municipality", "Galyang Municipality",
+        "Waling Municipality", "Arjunchaupari Rural Municipality",
+        "Aandhikhola Rural Municipality", "Biruwa Rural Municipality",
+        "Harinas Rural Municipality", "Kaligandaki Rural Municipality"
+    ],
+    "Tanahun": [
+        "Damauli (Byas) Municipality", "Bhimad Municipality",
+        "Bhanu Municipality", "Shuklagandaki Municipality",
+        "Anbukhaireni Rural Municipality", "Bandipur Rural Municipality",
+        "Devghat Rural Municipality", "Myagde Rural Municipality",
+        "Rishing Rural Municipality"
+    ],
+
+    # Lumbini Province (Province 5)
+    "Arghakhanchi": [
+        "Sandhikharka Municipality", "Sitganga Municipality", 
+        "Bhumikasthan Municipality", "Panini Rural Municipality", 
+        "Chhatradev Rural Municipality", "Malarani Rural Municipality"
+    ],
+    "Banke": [
+        "Nepalgunj Sub-Metropolitan City", "Kohalpur Municipality",
+        "Baijanath Rural Municipality", "Duduwa Rural Municipality",
+        "Janaki Rural Municipality", "Khajura Rural Municipality",
+        "Narainapur Rural Municipality", "Rapti Sonari Rural Municipality"
+    ],
+    "Bardiya": [
+        "Gulariya Municipality", "Madhuwan Municipality",
+        "Rajapur Municipality", "Thakurbaba Municipality",
+        "Bansgadhi Municipality", "Barbardiya Municipality",
+        "Badaiyaatal Rural Municipality", "Geruwa Rural Municipality"
+    ],
+    "Dang": [
+        "Tulsipur Sub-Metropolitan City", "Ghorahi Sub-Metropolitan City",
+        "Lamahi Municipality", "Banglachuli Rural Municipality",
+        "Dangisharan Rural Municipality", "Rajpur Rural Municipality",
+        "Rapti Rural Municipality", "Shantinagar Rural Municipality",
+        "Babai Rural Municipality"
+    ],
+    "Eastern Rukum": [
+        "Bhume Rural Municipality", "Putha Uttarganga Rural Municipality",
+        "Sisne Rural Municipality"
+    ],
+    "Gulmi": [
+        "Resunga Municipality", "Musikot Municipality",
+        "Isma Rural Municipality", "Chandrakot Rural Municipality",
+        "Dhurkot Rural Municipality", "Gulmi Darbar Rural Municipality",
+        "Madane Rural Municipality", "Malika Rural Municipality",
+        "Ruru Rural Municipality", "Satyawati Rural Municipality"
+    ],
+    "Kapilvastu": [
+        "Kapilvastu Municipality", "Maharajgunj Municipality",
+        "Krishnanagar Municipality", "Buddhabhumi Municipality",
+        "Shivaraj Municipality", "Banganga Municipality",
+        "Yashodhara Rural Municipality", "Suddhodhan Rural Municipality"
+    ],
+    "Nawalparasi (Bardaghat Susta West)": [
+        "Bardaghat Municipality", "Ramgram Municipality",
+        "Sunwal Municipality", "Palhinandan Rural Municipality",
+        "Pratappur Rural Municipality", "Sarawal Rural Municipality"
+    ],
+    "Palpa": [
+        "Tansen Municipality", "Rampur Municipality",
+        "Nisdi Rural Municipality", "Rambha Rural Municipality",
+        "Mathagadhi Rural Municipality", "Rainadevi Chhahara Rural Municipality",
+        "Baganaskali Rural Municipality", "Purbakhola Rural Municipality",
+        "Tinau Rural Municipality"
+    ],
+    "Pyuthan": [
+        "Pyuthan Municipality", "Swargadwari Municipality",
+        "Gaumukhi Rural Municipality", "Jhimruk Rural Municipality",
+        "Mallarani Rural Municipality", "Naubahini Rural Municipality",
+        "Sarumarani Rural Municipality", "Mandavi Rural Municipality"
+    ],
+    "Rolpa": [
+        "Rolpa Municipality", "Triveni Rural Municipality",
+        "Runtigadhi Rural Municipality", "Sunil Smriti Rural Municipality",
+        "Sunchhahari Rural Municipality", "Paribartan Rural Municipality",
+        "Lungri Rural Municipality", "Madi Rural Municipality",
+        "Thabang Rural Municipality"
+    ],
+    "Rupandehi": [
+        "Butwal Sub-Metropolitan City", "Siddharthanagar Municipality",
+        "Devdaha Municipality", "Tilottama Municipality",
+        "Lumbini Sanskritik Municipality", "Sainamaina Municipality",
+        "Marchawari Rural Municipality", "Omsatiya Rural Municipality",
+        "Kotahimai Rural Municipality", "Gaidahawa Rural Municipality",
+        "Suddhodhan Rural Municipality", "Mayadevi Rural Municipality"
+    ],
+
+    # Karnali Province (Province 6)
+    "Dailekh": [
+        "Narayan Municipality", "Dullu Municipality", "Chamunda Bindrasaini Municipality",
+        "Aathabis Municipality", "Bhagawatimai Rural Municipality",
+        "Dungeshwor Rural Municipality", "Gurans Rural Municipality",
+        "Mahabu Rural Municipality", "Naumule Rural Municipality"
+    ],
+    "Dolpa": [
+        "Thuli Bheri Municipality", "Tripurasundari Municipality",
+        "Dolpo Buddha Rural Municipality", "Jagadulla Rural Municipality",
+        "Kaike Rural Municipality", "She Phoksundo Rural Municipality",
+        "Mudkechula Rural Municipality"
+    ],
+    "Humla": [
+        "Simkot Rural Municipality", "Namkha Rural Municipality",
+        "Chankheli Rural Municipality", "Kharpunath Rural Municipality",
+        "Sarkegad Rural Municipality", "Tanjakot Rural Municipality",
+        "Adanchuli Rural Municipality"
+    ],
+    "Jajarkot": [
+        "Bheri Municipality", "Chhedagad Municipality",
+        "Barekot Rural Municipality", "Kuse Rural Municipality",
+        "Junichande Rural Municipality", "Shivalaya Rural Municipality"
+    ],
+    "Jumla": [
+        "Chandannath Municipality", "Guthichaur Rural Municipality",
+        "Hima Rural Municipality", "Kankasundari Rural Municipality",
+        "Patarasi Rural Municipality", "Sinja Rural Municipality",
+        "Tatopani Rural Municipality", "Tila Rural Municipality"
+    ],
+    "Kalikot": [
+        "Raskot Municipality", "Tilagufa Municipality",
+        "Narharinath Rural Municipality", "Pachaljharana Rural Municipality",
+        "Sanni Triveni Rural Municipality", "Shubha Kalika Rural Municipality",
+        "Palata Rural Municipality", "Mahawai Rural Municipality"
+    ],
+    "Mugu": [
+        "Chhayanath Rara Municipality", "Khatyad Rural Municipality",
+        "Mugum Karmarong Rural Municipality", "Soru Rural Municipality"
+    ],
+    "Salyan": [
+        "Bangad Kupinde Municipality", "Sharada Municipality",
+        "Bagchaur Municipality", "Darma Rural Municipality",
+        "Kalimati Rural Municipality", "Kapurkot Rural Municipality",
+        "Chatreshwori Rural Municipality", "Siddha Kumakh Rural Municipality",
+        "Triveni Rural Municipality"
+    ],
+    "Surkhet": [
+        "Birendranagar Municipality", "Bheriganga Municipality",
+        "Gurbhakot Municipality", "Lekbesi Municipality",
+        "Panchapuri Municipality", "Barahatal Rural Municipality",
+        "Chaukune Rural Municipality", "Simta Rural Municipality"
+    ],
+
+    # Sudurpashchim Province (Province 7)
+    "Kanchanpur": [
+        "Bhimdatta Municipality", "Bedkot Municipality", "Krishnapur Municipality",
+        "Shuklaphanta Municipality", "Belauri Municipality", "Punarbas Municipality",
+        "Mahakali Municipality", "Laljhadi Rural Municipality"
+    ],
+    "Kailali": [
+        "Dhangadhi Sub-Metropolitan City", "Tikapur Municipality", "Lamkichuha Municipality",
+        "Ghodaghodi Municipality", "Bhajani Municipality", "Gauriganga Municipality",
+        "Gokuleshwar Municipality", "Joshipur Rural Municipality", "Janaki Rural Municipality",
+        "Bardagoriya Rural Municipality", "Mohanyal Rural Municipality", "Chure Rural Municipality"
+    ],
+    "Doti": [
+        "Dipayal Silgadhi Municipality", "Shikhar Municipality",
+        "Purbichauki Rural Municipality", "Aadarsha Rural Municipality",
+        "K I Singh Rural Municipality", "Jorayal Rural Municipality",
+        "Sayal Rural Municipality", "Badikedar Rural Municipality"
+    ],
+    "Achham": [
+        "Mangalsen Municipality", "Sanphebagar Municipality",
+        "Kamalbazar Municipality", "Panchdeval Binayak Municipality",
+        "Chaurpati Rural Municipality", "Dhakari Rural Municipality",
+        "Bannigadhi Jayagad Rural Municipality", "Mellekh Rural Municipality",
+        "Ramaroshan Rural Municipality", "Turmakhand Rural Municipality"
+    ],
+    "Bajhang": [
+        "Jaya Prithvi Municipality", "Bungal Municipality", "Talkot Rural Municipality",
+        "Kedarsyu Rural Municipality", "Surma Rural Municipality", "Chhabis Pathivera Rural Municipality",
+        "Durgathali Rural Municipality", "Khaptad Chhanna Rural Municipality", "Masta Rural Municipality",
+        "Thalara Rural Municipality", "Bitthadchir Rural Municipality"
+    ],
+    "Bajura": [
+        "Budhinanda Municipality", "Triveni Municipality", "Badimalika Municipality",
+        "Himali Rural Municipality", "Gaumul Rural Municipality", "Swami Kartik Rural Municipality",
+        "Chhededaha Rural Municipality", "Jagannath Rural Municipality"
+    ],
+    "Dadeldhura": [
+        "Amargadhi Municipality", "Aalital Rural Municipality",
+        "Bhageshwar Rural Municipality", "Navadurga Rural Municipality",
+        "Ganyapadhura Rural Municipality", "Ajayameru Rural Municipality",
+        "Parashuram Municipality"
+    ],
+    "Baitadi": [
+        "Dasharathchand Municipality", "Patan Municipality",
+        "Melauli Municipality", "Purchaudi Municipality",
+        "Dilasaini Rural Municipality", "Dogadakedar Rural Municipality",
+        "Pancheshwar Rural Municipality", "Sigas Rural Municipality",
+        "Shivanath Rural Municipality"
+    ],
+    "Darchula": [
+        "Mahakali Municipality", "Shailyashikhar Municipality",
+        "Byas Rural Municipality", "Apihimal Rural Municipality",
+        "Naugad Rural Municipality", "Duhun Rural Municipality",
+        "Malikaarjun Rural Municipality", "Marma Rural Municipality"
+    ]
+}
+
+
+def _unique(values):
+    return tuple(dict.fromkeys(values))
+
+
+class GeographyIndex:
+    """
+    Immutable lookup tables over the province, district and municipality data.
+
+    Built once per process by `get_geography_index()`; every lookup is a dict
+    access, and prefix search is a binary search over a sorted name list.
+    """
+
+    def __init__(self, province_districts, district_municipalities):
+        self.provinces = tuple(province_districts)
+        self._districts = MappingProxyType({
+            province: _unique(districts) for province, districts in province_districts.items()
+        })
+        self._municipalities = MappingProxyType({
+            district: _unique(municipalities) for district, municipalities in district_municipalities.items()
+        })
+
+        district_provinces = {}
+        for province, districts in self._districts.items():
+            for district in districts:
+                district_provinces.setdefault(district, []).append(province)
+        self._district_provinces = MappingProxyType({
+            district: tuple(provinces) for district, provinces in district_provinces.items()
+        })
+
+        # Some municipality names (e.g. "Madi Municipality") exist in more than one district
+        municipality_districts = {}
+        for district, municipalities in self._municipalities.items():
+            for municipality in municipalities:
+                municipality_districts.setdefault(municipality, []).append(district)
+        self._municipality_districts = MappingProxyType({
+            municipality: tuple(districts) for municipality, districts in municipality_districts.items()
+        })
+
+        entries = {(name.casefold(), 'province', name) for name in self.provinces}
+        entries.update((name.casefold(), 'district', name) for name in {**self._district_provinces, **self._municipalities})
+        entries.update((name.casefold(), 'municipality', name) for name in self._municipality_districts)
+        self._search_entries = tuple(sorted(entries))
+        self._search_keys = tuple(entry[0] for entry in self._search_entries)
+
+    def is_province(self, province):
+        return province in self._districts
+
+    def districts(self, province):
+        return self._districts.get(province, ())
+
+    def municipalities(self, district):
+        return self._municipalities.get(district, ())
+
+    def provinces_of_district(self, district):
+        return self._district_provinces.get(district, ())
+
+    def districts_of_municipality(self, municipality):
+        return self._municipality_districts.get(municipality, ())
+
+    def locate(self, municipality):
+        """
+        Return every (province, district) pair the municipality belongs to.
+        """
+        return tuple(
+            (province, district)
+            for district in self.districts_of_municipality(municipality)
+            for province in self.provinces_of_district(district)
+        )
+
+    def search(self, prefix, limit=20):
+        """
+        Return up to `limit` names starting with `prefix` (case-insensitive).
+        """
+        prefix = prefix.casefold()
+        if not prefix:
+            return []
+        results = []
+        position = bisect_left(self._search_keys, prefix)
+        for key, kind, name in self._search_entries[position:]:
+            if not key.startswith(prefix) or len(results) >= limit:
+                break
+            results.append({'name': name, 'type': kind})
+        return results
+
+
+@lru_cache(maxsize=None)
+def get_geography_index():
+    return GeographyIndex(PROVINCE_DISTRICTS, DISTRICT_MUNICIPALITIES)
+
+
+def etag_for(data):
+    """
+    Return a strong ETag for a JSON-serialisable geography payload.
+    """
+    payload = json.dumps(data, sort_keys=True, ensure_ascii=False)
+    return '"%s"' % hashlib.sha256(payload.encode()).hexdigest()[:32]
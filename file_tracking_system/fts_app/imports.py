@@ -0,0 +1,214 @@
+import codecs
+import csv
+import os
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import DatabaseError, transaction
+
+from .caching import bump_model_version
+from .executors import cpu_executor
+from .models import Awards, CustomUser, Education, Loan, Office, Punishments
+from .serializers import UserImportSerializer
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+
+USER_IMPORT_BATCH_SIZE = getattr(settings, 'USER_IMPORT_BATCH_SIZE', 500)
+IMPORT_FORMATS = ('csv', 'xlsx')
+# One-to-one rows created alongside each user, in the order UserRegistrationSerializer.create makes them.
+# Spreadsheet columns for these are prefixed with the relation, e.g. "education.institution".
+NESTED_MODELS = {
+    'education': Education,
+    'awards': Awards,
+    'punishments': Punishments,
+    'loan': Loan,
+    'office': Office,
+}
+# Reference data whose cached API responses must be invalidated when rows are added
+CACHED_MODELS = (Loan, Office)
+
+
+class SpreadsheetError(Exception):
+    """
+    The uploaded file cannot be read as a spreadsheet at all.
+    """
+
+
+def import_format(filename, file_format=None):
+    """
+    Return 'csv' or 'xlsx' from an explicit format or the file name's extension.
+    """
+    file_format = (file_format or os.path.splitext(filename or '')[1].lstrip('.')).lower()
+    if file_format not in IMPORT_FORMATS:
+        raise SpreadsheetError(f"Unsupported format '{file_format}'; upload a .csv or .xlsx file.")
+    if file_format == 'xlsx' and openpyxl is None:
+        raise SpreadsheetError("Reading .xlsx files requires openpyxl; upload a .csv file instead.")
+    return file_format
+
+
+def read_rows(file, file_format):
+    """
+    Yield (row number, {column: value}) for each data row, reading the file lazily.
+
+    The first row holds the column names. Empty cells are left out so the
+    serializer treats them as not given.
+    """
+    if file_format == 'xlsx':
+        try:
+            workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+        except Exception as exc:
+            raise SpreadsheetError(f"Not a readable .xlsx file: {exc}")
+        try:
+            yield from _rows(workbook.active.iter_rows(values_only=True))
+        finally:
+            workbook.close()
+    else:
+        try:
+            yield from _rows(csv.reader(codecs.iterdecode(file, 'utf-8-sig')))
+        except (UnicodeDecodeError, csv.Error) as exc:
+            raise SpreadsheetError(f"Not a readable UTF-8 .csv file: {exc}")
+
+
+def _rows(rows):
+    header = next(rows, None)
+    if not header or not any(header):
+        raise SpreadsheetError("The file has no header row.")
+    columns = [str(column).strip() if column is not None else '' for column in header]
+    for number, values in enumerate(rows, start=2):
+        row = {
+            column: _cell(value)
+            for column, value in zip(columns, values)
+            if column and value is not None and value != ''
+        }
+        if row:
+            yield number, row
+
+
+def _cell(value):
+    if isinstance(value, datetime) and not value.hour and not value.minute and not value.second:
+        return value.date()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def nest(row):
+    """
+    Turn "education.institution"-style columns into nested serializer data.
+    """
+    data = {}
+    for column, value in row.items():
+        relation, _, field = column.partition('.')
+        if field and relation in NESTED_MODELS:
+            data.setdefault(relation, {})[field] = value
+        else:
+            data[column] = value
+    return data
+
+
+class UserImporter:
+    """
+    Creates employees from spreadsheet rows in batches.
+
+    Each batch is validated with UserImportSerializer, checked for clashes
+    with existing users and earlier rows in one query per unique field,
+    password hashed on the CPU pool and written with bulk_create in its
+    own transaction. A failing row never stops the import; it is listed in
+    the report instead.
+    """
+
+    def __init__(self, batch_size=USER_IMPORT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.rows = 0
+        self.created = 0
+        self.errors = []
+        self.seen = {name: set() for name in UserImportSerializer.unique_fields}
+
+    def run(self, rows):
+        batch = []
+        for number, row in rows:
+            batch.append((number, row))
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch)
+                batch = []
+        if batch:
+            self.import_batch(batch)
+        return self.report()
+
+    def report(self):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'failed': len(self.errors),
+            'errors': sorted(self.errors, key=lambda error: error['row']),
+        }
+
+    def import_batch(self, batch):
+        self.rows += len(batch)
+        valid = []
+        for number, row in batch:
+            serializer = UserImportSerializer(data=nest(row))
+            if serializer.is_valid():
+                valid.append((number, serializer.validated_data))
+            else:
+                self.errors.append({'row': number, 'errors': serializer.errors})
+        valid = self.check_unique(valid)
+        if not valid:
+            return
+
+        passwords = cpu_executor.map(make_password, [data['password'] for _, data in valid])
+        users, related = [], {name: [] for name in NESTED_MODELS}
+        for (_, data), password in zip(valid, passwords):
+            user = CustomUser(**{
+                name: value for name, value in data.items() if name not in NESTED_MODELS and name != 'password'
+            })
+            user.password = password
+            for name, model in NESTED_MODELS.items():
+                if data.get(name):
+                    related[name].append((user, model(**data[name])))
+            users.append(user)
+
+        try:
+            with transaction.atomic():
+                for name, model in NESTED_MODELS.items():
+                    model.objects.bulk_create([instance for _, instance in related[name]])
+                    for user, instance in related[name]:
+                        setattr(user, name, instance)
+                CustomUser.objects.bulk_create(users)
+                for model in CACHED_MODELS:
+                    if related[model._meta.model_name]:
+                        transaction.on_commit(lambda model=model: bump_model_version(model))
+        except DatabaseError as exc:
+            # Only a concurrent insert of the same keys gets here; the batch is rolled back as a whole
+            self.errors += [
+                {'row': number, 'errors': {'non_field_errors': [f"Not saved: {exc}"]}} for number, _ in valid
+            ]
+            return
+        self.created += len(users)
+
+    def check_unique(self, valid):
+        """
+        Drop and report rows whose unique fields clash with existing users or earlier rows.
+        """
+        clashes = {}
+        for name in UserImportSerializer.unique_fields:
+            values = [data[name] for _, data in valid]
+            taken = set(
+                CustomUser.objects.filter(**{f'{name}__in': values}).values_list(name, flat=True)
+            ) if values else set()
+            for number, data in valid:
+                value = data[name]
+                if value in taken:
+                    clashes.setdefault(number, {})[name] = [f"A user with this {name} already exists."]
+                elif value in self.seen[name]:
+                    clashes.setdefault(number, {})[name] = [f"Duplicate {name} in the file."]
+                self.seen[name].add(value)
+        self.errors += [{'row': number, 'errors': errors} for number, errors in clashes.items()]
+        return [(number, data) for number, data in valid if number not in clashes]
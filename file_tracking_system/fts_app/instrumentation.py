@@ -0,0 +1,213 @@
+import atexit
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+
+logger = logging.getLogger('fts_app.requests')
+
+INSTRUMENTATION_ENABLED = getattr(settings, 'INSTRUMENTATION_ENABLED', False)
+# A SQL shape repeated more than this many times in one request is reported as a likely N+1
+NPLUSONE_THRESHOLD = getattr(settings, 'INSTRUMENTATION_NPLUSONE_THRESHOLD', 5)
+# Per-route summaries are written here (one file per process); None keeps them in memory only
+ROUTE_STATS_DIR = getattr(settings, 'ROUTE_STATS_DIR', None)
+ROUTE_STATS_FLUSH_INTERVAL = getattr(settings, 'ROUTE_STATS_FLUSH_INTERVAL', 30)
+# Number of recent requests per route the percentiles are computed over
+ROUTE_STATS_WINDOW = getattr(settings, 'ROUTE_STATS_WINDOW', 1000)
+
+_current = ContextVar('fts_request_metrics', default=None)
+
+IN_LIST_RE = re.compile(r'\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)', re.IGNORECASE)
+LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def sql_shape(sql):
+    """
+    Reduce a statement to its shape: literals and IN-list lengths removed.
+    """
+    return LITERAL_RE.sub('?', IN_LIST_RE.sub('IN (...)', sql))
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.render_time = 0.0
+        self.shapes = Counter()
+        self._depth = 0
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def repeated_shapes(self):
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > NPLUSONE_THRESHOLD]
+
+    def server_timing(self):
+        return ', '.join([
+            f'db;dur={self.sql_time * 1000:.2f};desc="{self.sql_count} queries"',
+            f'serialize;dur={self.serializer_time * 1000:.2f}',
+            f'render;dur={self.render_time * 1000:.2f}',
+            f'total;dur={self.elapsed * 1000:.2f}',
+        ])
+
+
+def current_metrics():
+    return _current.get()
+
+
+def start_request():
+    return _current.set(RequestMetrics())
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    """
+    Database execute wrapper that counts and times queries for the current request.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.sql_time += time.perf_counter() - started
+        metrics.sql_count += 1
+        metrics.shapes[sql_shape(sql)] += 1
+
+
+def install_sql_wrapper(sender, connection, **kwargs):
+    """
+    connection_created receiver: add sql_wrapper to every new database connection.
+    """
+    if sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(sql_wrapper)
+
+
+@contextmanager
+def timed(attribute):
+    """
+    Add the block's duration to the current request's `attribute` (outermost block only).
+    """
+    metrics = _current.get()
+    if metrics is None or metrics._depth:
+        yield
+        return
+    metrics._depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        setattr(metrics, attribute, getattr(metrics, attribute) + time.perf_counter() - started)
+        metrics._depth -= 1
+
+
+class RouteStats:
+    """
+    Rolling per-route summary for this process, flushed to ROUTE_STATS_DIR.
+    """
+
+    def __init__(self, window=ROUTE_STATS_WINDOW, directory=ROUTE_STATS_DIR, interval=ROUTE_STATS_FLUSH_INTERVAL):
+        self.window = window
+        self.directory = directory
+        self.interval = interval
+        self._routes = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def record(self, route, status, metrics):
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = {
+                    'count': 0, 'errors': 0, 'nplusone': 0,
+                    'durations': deque(maxlen=self.window), 'queries': deque(maxlen=self.window),
+                }
+            stats['count'] += 1
+            stats['errors'] += status >= 500
+            stats['nplusone'] += bool(metrics.repeated_shapes())
+            stats['durations'].append(metrics.elapsed * 1000)
+            stats['queries'].append(metrics.sql_count)
+            due = self.directory and time.monotonic() - self._last_flush >= self.interval
+        if due:
+            self.flush()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                route: {
+                    'count': stats['count'], 'errors': stats['errors'], 'nplusone': stats['nplusone'],
+                    'durations': list(stats['durations']), 'queries': list(stats['queries']),
+                }
+                for route, stats in self._routes.items()
+            }
+
+    def flush(self):
+        """
+        Atomically replace this process's summary file.
+        """
+        if not self.directory:
+            return
+        self._last_flush = time.monotonic()
+        os.makedirs(self.directory, exist_ok=True)
+        data = {'pid': os.getpid(), 'written_at': time.time(), 'routes': self.snapshot()}
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(handle, 'w') as temp_file:
+            json.dump(data, temp_file)
+        os.replace(temp_path, os.path.join(self.directory, f'{os.getpid()}.json'))
+
+
+route_stats = RouteStats()
+atexit.register(route_stats.flush)
+
+
+def route_name(request):
+    """
+    The URL name a request resolved to (e.g. `tippani-list`), never the raw path.
+    """
+    match = getattr(request, 'resolver_match', None)
+    return (match.view_name or match.route) if match else 'unresolved'
+
+
+def request_route(request):
+    return f'{request.method} {route_name(request)}'
+
+
+def record_request(request, response, metrics):
+    """
+    Add the Server-Timing header, log the request and update the route summary.
+    """
+    route = request_route(request)
+    response['Server-Timing'] = metrics.server_timing()
+    repeated = metrics.repeated_shapes()
+    entry = {
+        'route': route,
+        'path': request.path,
+        'status': response.status_code,
+        'duration_ms': round(metrics.elapsed * 1000, 2),
+        'sql_count': metrics.sql_count,
+        'sql_ms': round(metrics.sql_time * 1000, 2),
+        'serializer_ms': round(metrics.serializer_time * 1000, 2),
+        'render_ms': round(metrics.render_time * 1000, 2),
+    }
+    if repeated:
+        entry['n_plus_one'] = [{'sql': shape, 'count': count} for shape, count in repeated]
+        logger.warning(json.dumps(entry), extra={'request_metrics': entry})
+    else:
+        logger.info(json.dumps(entry), extra={'request_metrics': entry})
+    route_stats.record(route, response.status_code, metrics)
@@ -0,0 +1,275 @@
+import asyncio
+import multiprocessing
+import queue
+import random
+import time
+from collections import Counter, defaultdict
+from urllib.parse import urlsplit
+
+
+class HTTPConnection:
+    """
+    A minimal keep-alive HTTP/1.1 client on asyncio streams.
+
+    Load generators need thousands of concurrent requests from one process
+    without a third-party client; this handles Content-Length, chunked and
+    read-until-close bodies, which covers every response the API sends.
+    """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+            self.reader = self.writer = None
+
+    async def request(self, method, path, headers=None, body=b''):
+        """
+        Send one request and return (status, body).
+        """
+        if self.writer is None:
+            await self.connect()
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}', f'Content-Length: {len(body)}']
+        lines += [f'{name}: {value}' for name, value in (headers or {}).items()]
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed by server")
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+
+        if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+            content = b''
+        elif 'content-length' in response_headers:
+            content = await self.reader.readexactly(int(response_headers['content-length']))
+        elif response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            content = await self._read_chunked()
+        else:
+            content = await self.reader.read()
+            await self.close()
+        if response_headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, content
+
+    async def _read_chunked(self):
+        chunks = []
+        while True:
+            size = int((await self.reader.readline()).split(b';')[0], 16)
+            if size == 0:
+                # Skip trailers up to the final blank line
+                while (await self.reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                return b''.join(chunks)
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readline()
+
+
+class Target:
+    """
+    One weighted entry of a traffic mix.
+    """
+
+    def __init__(self, name, path, weight=1, method='GET', headers=None, body=b''):
+        self.name = name
+        self.path = path
+        self.weight = weight
+        self.method = method
+        self.headers = headers or {}
+        self.body = body
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies):
+    """
+    Return count, mean and p50/p95/p99/max (milliseconds) for a list of latencies in seconds.
+    """
+    values = sorted(latency * 1000 for latency in latencies)
+    return {
+        'count': len(values),
+        'mean': sum(values) / len(values) if values else None,
+        'p50': percentile(values, 0.50),
+        'p95': percentile(values, 0.95),
+        'p99': percentile(values, 0.99),
+        'max': values[-1] if values else None,
+    }
+
+
+class LoadResult:
+    """
+    Latencies and outcomes of a load run, per target name.
+
+    A request failed when it raised a transport error or got a 4xx or 5xx
+    response; failed, error_rate and errors_for() all count it that way.
+    """
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.errors = Counter()
+        self.elapsed = 0.0
+
+    @property
+    def total(self):
+        return sum(len(values) for values in self.latencies.values()) + sum(self.errors.values())
+
+    @property
+    def failed(self):
+        responses = sum(
+            count for statuses in self.statuses.values() for status, count in statuses.items() if status >= 400
+        )
+        return responses + sum(self.errors.values())
+
+    @property
+    def error_rate(self):
+        return self.failed / self.total if self.total else 0.0
+
+    @property
+    def throughput(self):
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+    def attempts(self, name):
+        return len(self.latencies[name]) + self._transport_errors(name)
+
+    def errors_for(self, name):
+        """
+        Transport errors and 4xx/5xx responses for one target name.
+        """
+        responses = sum(count for status, count in self.statuses[name].items() if status >= 400)
+        return responses + self._transport_errors(name)
+
+    def _transport_errors(self, name):
+        return sum(count for key, count in self.errors.items() if key.partition(': ')[0] == name)
+
+    def summary(self, name=None):
+        if name is not None:
+            return summarize(self.latencies[name])
+        return summarize([latency for values in self.latencies.values() for latency in values])
+
+
+async def run_load(base_url, targets, concurrency, duration=None, requests=None, rate=None, seed=0, timeout=30):
+    """
+    Drive `targets` (weighted) against `base_url` and return a LoadResult.
+
+    `concurrency` connections issue requests back to back until `duration`
+    seconds or `requests` requests have passed. With `rate` (requests per
+    second) starts follow a fixed schedule instead, and latency is measured
+    from the scheduled start so a stalled server cannot hide queueing delay.
+    """
+    url = urlsplit(base_url)
+    host, port = url.hostname, url.port or 80
+    prefix = url.path.rstrip('/')
+    rng = random.Random(seed)
+    weights = [target.weight for target in targets]
+    result = LoadResult()
+    issued = 0
+    started = time.perf_counter()
+    deadline = started + duration if duration else None
+
+    def next_slot():
+        nonlocal issued
+        if requests is not None and issued >= requests:
+            return None
+        scheduled = started + issued / rate if rate else time.perf_counter()
+        if deadline is not None and scheduled >= deadline:
+            return None
+        issued += 1
+        return scheduled, rng.choices(targets, weights)[0]
+
+    async def worker():
+        connection = HTTPConnection(host, port)
+        try:
+            while True:
+                slot = next_slot()
+                if slot is None:
+                    return
+                scheduled, target = slot
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                try:
+                    status, _ = await asyncio.wait_for(
+                        connection.request(target.method, prefix + target.path, target.headers, target.body), timeout
+                    )
+                except (OSError, ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as exc:
+                    result.errors[f'{target.name}: {type(exc).__name__}'] += 1
+                    await connection.close()
+                    continue
+                result.latencies[target.name].append(time.perf_counter() - scheduled)
+                result.statuses[target.name][status] += 1
+        finally:
+            await connection.close()
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def serve(host, port, ready, quiet=True):
+    """
+    Run the project's WSGI application on a threaded server until killed.
+
+    Sends the bound port through `ready`. Used as a child process by
+    start_server; with quiet the per-request log lines are suppressed.
+    """
+    import logging
+
+    from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+    from django.core.wsgi import get_wsgi_application
+
+    application = get_wsgi_application()
+
+    class RequestHandler(WSGIRequestHandler):
+        def log_message(self, format, *args):
+            if not quiet:
+                super().log_message(format, *args)
+
+    if quiet:
+        # After get_wsgi_application(), which reapplies LOGGING
+        logging.getLogger('fts_app.requests').setLevel(logging.WARNING)
+    server = ThreadedWSGIServer((host, port), RequestHandler)
+    server.set_app(application)
+    ready.put(server.server_port)
+    server.serve_forever()
+
+
+def start_server(host='127.0.0.1', port=0, quiet=True, timeout=30):
+    """
+    Start `serve` in a child process and return (process, base_url).
+    """
+    from django.db import connections
+
+    # A forked child must not share the parent's database connections
+    connections.close_all()
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve, args=(host, port, ready, quiet), daemon=True)
+    process.start()
+    try:
+        port = ready.get(timeout=timeout)
+    except queue.Empty:
+        process.terminate()
+        raise RuntimeError(f"The test server did not start within {timeout} seconds")
+    return process, f'http://{host}:{port}'
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Now
+
+from fts_app.models import Approval, Tippani
+
+
+class Command(BaseCommand):
+    help = "Fill Tippani.current_status and current_holder from each Tippani's latest Approval."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        latest = Approval.objects.filter(tippani=OuterRef('pk')).order_by('-id')
+        last_id = Tippani.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+
+        updated = 0
+        for start in range(0, last_id + 1, batch_size):
+            # One UPDATE per id range keeps each transaction and its locks short
+            with transaction.atomic():
+                updated += Tippani.objects.filter(pk__gte=start, pk__lt=start + batch_size).update(
+                    current_status=Subquery(latest.values('status')[:1]),
+                    current_holder=Subquery(
+                        latest.annotate(holder=Coalesce('approved_by', 'submitted_by')).values('holder')[:1]
+                    ),
+                    updated_at=Now(),
+                )
+        self.stdout.write(self.style.SUCCESS(f"Backfilled {updated} Tippanis."))
@@ -0,0 +1,52 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from fts_app.authentication import issue_tokens
+from fts_app.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = "Compare requests per second for JWT and legacy DRF token authentication."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--path', default=None, help="Authenticated GET endpoint to call (default: provinces).")
+
+    def handle(self, *args, **options):
+        path = options['path'] or reverse('get-provinces')
+        user = CustomUser.objects.create_user(
+            username=f'bench-{uuid.uuid4().hex[:12]}', password=uuid.uuid4().hex,
+            employee_id=f'bench-{uuid.uuid4().hex[:12]}', citizenship_id=uuid.uuid4().hex[:12],
+        )
+        try:
+            token = Token.objects.create(user=user)
+            _, access = issue_tokens(user)
+            results = [
+                ('token', self.run(path, f'Token {token.key}', options['requests'])),
+                ('jwt', self.run(path, f'Bearer {access}', options['requests'])),
+            ]
+        finally:
+            user.delete()
+
+        for name, (rps, queries) in results:
+            self.stdout.write(f"{name:>6}: {rps:10.1f} req/s, {queries:.2f} queries/request")
+        self.stdout.write(self.style.SUCCESS(f"JWT speed-up: {results[1][1][0] / results[0][1][0]:.2f}x"))
+
+    def run(self, path, authorization, count):
+        client = Client(HTTP_AUTHORIZATION=authorization)
+        response = client.get(path)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{path} returned {response.status_code} for {authorization.split()[0]}")
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(count):
+                client.get(path)
+            elapsed = time.perf_counter() - started
+        return count / elapsed, len(queries.captured_queries) / count
@@ -0,0 +1,47 @@
+import asyncio
+
+from django.core.management.base import BaseCommand, CommandError
+
+from fts_app.loadtest import Target, run_load
+
+
+DEFAULT_PATHS = ('/api/tippani/', '/api/tippani/1/dossier/', '/api/approval/inbox/?designation=1', '/api/provinces/')
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure throughput and latency of running servers at increasing concurrency, e.g. "
+        "`uvicorn file_tracking_system.asgi:application --workers 4` (with ASYNC_READ_VIEWS = True) "
+        "against `gunicorn file_tracking_system.wsgi -w 4`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', action='append', required=True,
+                            help="Base URL of a running server; repeat to compare servers.")
+        parser.add_argument('--path', action='append', help="Endpoint to request (repeatable).")
+        parser.add_argument('--concurrency', default='1,8,32,128,512',
+                            help="Comma-separated numbers of concurrent connections.")
+        parser.add_argument('--duration', type=float, default=10.0, help="Seconds per concurrency level.")
+        parser.add_argument('--authorization', help="Authorization header to send, e.g. 'Bearer <token>'.")
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(level) for level in options['concurrency'].split(',')]
+        except ValueError:
+            raise CommandError("--concurrency must be a comma-separated list of integers")
+        headers = {'Authorization': options['authorization']} if options['authorization'] else {}
+        targets = [Target(path, path, headers=headers) for path in options['path'] or DEFAULT_PATHS]
+
+        for url in options['url']:
+            self.stdout.write(f"{url}")
+            self.stdout.write(f"  {'conc':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+            for level in levels:
+                result = asyncio.run(run_load(url, targets, level, duration=options['duration']))
+                summary = result.summary()
+                if not summary['count']:
+                    self.stdout.write(f"  {level:>5} {'-':>9} {'-':>9} {'-':>9} {'-':>9} {result.failed:>7}")
+                    continue
+                self.stdout.write(
+                    f"  {level:>5} {result.throughput:>9.1f} {summary['p50']:>9.2f} {summary['p95']:>9.2f} "
+                    f"{summary['p99']:>9.2f} {result.failed:>7}"
+                )
@@ -0,0 +1,105 @@
+import gzip
+import random
+import statistics
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from fts_app.middleware import COMPRESSION_BROTLI_QUALITY, brotli
+from fts_app.models import CustomUser, Education, Loan, Office, Tippani
+from fts_app.renderers import FastJSONRenderer, MessagePackRenderer, msgpack, orjson
+from fts_app.serializers import TippaniSerializer, UserDetailSerializer
+
+
+class Command(BaseCommand):
+    help = "Measure encode time and bytes on the wire for representative API payloads."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200, help="Rows per payload (one page).")
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        # Unsaved instances serialize like database rows without touching the database
+        payloads = {
+            '/api/user/all/': UserDetailSerializer(self.users(rng, options['rows']), many=True).data,
+            '/api/tippani/': TippaniSerializer(self.tippanis(rng, options['rows']), many=True).data,
+        }
+        renderers = [('drf-json', JSONRenderer())]
+        if orjson is not None:
+            renderers.append(('orjson', FastJSONRenderer()))
+        if msgpack is not None:
+            renderers.append(('msgpack', MessagePackRenderer()))
+
+        for path, data in payloads.items():
+            self.stdout.write(f"{path} ({options['rows']} rows)")
+            for name, renderer in renderers:
+                body, encode_ms = self.time(lambda: renderer.render(data), options['repeat'])
+                sizes = [f"raw {len(body):>9,} B"]
+                gzipped, gzip_ms = self.time(lambda: gzip.compress(body, compresslevel=6), options['repeat'])
+                sizes.append(f"gzip {len(gzipped):>8,} B ({gzip_ms:.2f} ms)")
+                if brotli is not None:
+                    compressed, br_ms = self.time(
+                        lambda: brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY), options['repeat']
+                    )
+                    sizes.append(f"br {len(compressed):>8,} B ({br_ms:.2f} ms)")
+                self.stdout.write(f"  {name:>8}: encode {encode_ms:7.2f} ms  " + '  '.join(sizes))
+        if orjson is None:
+            self.stdout.write(self.style.WARNING("orjson is not installed; FastJSONRenderer uses the standard library."))
+
+    def time(self, func, repeat):
+        """
+        Return (result, median milliseconds) over `repeat` calls.
+        """
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func()
+            timings.append((time.perf_counter() - started) * 1000)
+        return result, statistics.median(timings)
+
+    def users(self, rng, count):
+        users = []
+        for pk in range(1, count + 1):
+            users.append(CustomUser(
+                id=pk, username=f'user{pk}', email=f'user{pk}@example.gov.np', employee_id=f'EMP{pk:06d}',
+                position='Section Officer', perm_state='Bagmati', perm_district='Kathmandu',
+                perm_municipality='Kathmandu Metropolitan City', temp_state='Gandaki', temp_district='Kaski',
+                temp_municipality='Pokhara Metropolitan City', citizenship_id=f'{rng.randint(10**9, 10**10)}',
+                citizenship_date_of_issue=date(2000, 1, 1) + timedelta(days=rng.randint(0, 7000)),
+                citizenship_district='Kathmandu', home_number='01-4200000', phone_number='01-4200001',
+                mobile_number=f'98{rng.randint(10**7, 10**8 - 1)}',
+                date_joined=timezone.make_aware(datetime(2020, 1, 1) + timedelta(minutes=rng.randint(0, 10**6))),
+                employee_type=CustomUser.EmployeeType.PERMANENT, na_la_kos_no=f'NLK{pk}',
+                accumulation_fund_no=f'AF{pk}', bank_account_no=f'{rng.randint(10**11, 10**12)}',
+                bank_name=CustomUser.Bank.NABIL_BANK,
+                education=Education(
+                    education_level=Education.EducationLevel.BACHELOR, institution='Tribhuvan University',
+                    board='TU', percentage=Decimal(rng.randint(4000, 9500)) / 100, year=rng.randint(1995, 2020),
+                ),
+                loan=Loan(
+                    loan_type=Loan.LoanType.HOME_LOAN, name='Home loan', interest_rate=Decimal('8.50'),
+                    max_amount=Decimal('5000000.00'), min_amount=Decimal('100000.00'), max_tenure=240, min_tenure=12,
+                ),
+                office=Office(
+                    duration=timedelta(days=rng.randint(30, 3650)), office_name='District Administration Office',
+                    position='Section Officer', position_category=Office.PositionCategory.DARBANDI,
+                ),
+            ))
+        return users
+
+    def tippanis(self, rng, count):
+        return [
+            Tippani(
+                id=pk, office_id=rng.randint(1, 50), present_subject=f'Budget approval request {pk} for ward office',
+                present_by='Section Officer', present_date=date(2024, 1, 1) + timedelta(days=rng.randint(0, 600)),
+                page_no=1, total_page=rng.randint(1, 40), current_status='pending', current_holder_id=rng.randint(1, 20),
+                updated_at=timezone.now(),
+            )
+            for pk in range(1, count + 1)
+        ]
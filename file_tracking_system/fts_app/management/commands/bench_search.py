@@ -0,0 +1,90 @@
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import setup_databases, teardown_databases
+
+from fts_app.loadtest import percentile
+from fts_app.models import Office, Tippani
+from fts_app.search import search
+
+BENCH_MARKER = 'bench-search'
+WORDS = (
+    'budget approval road construction maintenance staff leave transfer promotion audit circular '
+    'ministry finance education health drinking water irrigation bridge school hospital land survey '
+    'tender contract payment salary pension allowance training vehicle fuel repair building office '
+    'district municipality ward committee meeting minutes report inspection monitoring program '
+    'plan annual quarterly fiscal year revenue expenditure grant subsidy loan insurance disaster'
+).split()
+
+
+class Command(BaseCommand):
+    help = "Seed synthetic Tippanis into a separate benchmark database and measure full-text search latency."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keepdb', action='store_true',
+                            help="Keep the benchmark database, and its seeded rows, for the next run.")
+        parser.add_argument('--i-know-this-is-scratch', action='store_true', dest='scratch',
+                            help="Seed and search DATABASES['default'] itself instead of a separate "
+                                 "benchmark database. The rows are left in place for later runs.")
+
+    def handle(self, *args, **options):
+        if options['scratch']:
+            return self.run(options)
+
+        # Like bench_suite: the seeded rows never reach the real database, its search or inboxes
+        verbosity = options['verbosity']
+        old_config = setup_databases(verbosity, interactive=False, keepdb=options['keepdb'], aliases={'default'})
+        try:
+            self.run(options)
+        finally:
+            teardown_databases(old_config, verbosity, keepdb=options['keepdb'])
+
+    def run(self, options):
+        rng = random.Random(options['seed'])
+        existing = Tippani.objects.filter(present_by=BENCH_MARKER).count()
+        if existing < options['rows']:
+            self.seed(rng, options['rows'] - existing)
+
+        latencies = []
+        for _ in range(options['queries']):
+            query = ' '.join(rng.sample(WORDS, rng.choice((1, 2, 3))))
+            started = time.perf_counter()
+            search('tippani', query, limit=20)
+            latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+
+        self.stdout.write(
+            f"{options['rows']} rows, {options['queries']} queries: "
+            f"p50 {statistics.median(latencies):.2f} ms, "
+            f"p95 {percentile(latencies, 0.95):.2f} ms, "
+            f"max {latencies[-1]:.2f} ms"
+        )
+
+    def seed(self, rng, count, batch_size=5000):
+        office = Office.objects.create(
+            duration=timedelta(days=365), office_name=BENCH_MARKER, position=BENCH_MARKER,
+            position_category=Office.PositionCategory.DARBANDI,
+        )
+        start = date(2015, 1, 1)
+        for offset in range(0, count, batch_size):
+            with transaction.atomic():
+                Tippani.objects.bulk_create([
+                    Tippani(
+                        office=office,
+                        present_subject=' '.join(rng.choices(WORDS, k=rng.randint(3, 9))),
+                        present_by=BENCH_MARKER,
+                        present_date=start + timedelta(days=rng.randint(0, 3650)),
+                        page_no=1,
+                        total_page=1,
+                    )
+                    for _ in range(min(batch_size, count - offset))
+                ])
+            self.stdout.write(f"Seeded {min(offset + batch_size, count)}/{count}", ending='\r')
+        self.stdout.write('')
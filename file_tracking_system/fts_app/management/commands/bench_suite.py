@@ -0,0 +1,220 @@
+import glob
+import json
+import os
+import platform
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_databases, teardown_databases
+from django.urls import reverse
+from rest_framework.test import APIRequestFactory
+
+from fts_app.geography import get_geography_index
+from fts_app.loadtest import percentile
+from fts_app.models import File
+from fts_app.seeding import SEED_PASSWORD, Seeder
+from fts_app.serializers import UserDetailSerializer
+from fts_app.views import ApprovalViewSet, LettersAndDocumentsViewSet, geography_list, geography_search
+
+
+SCALES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic data at a given scale into a separate benchmark database, time the ORM and "
+        "serializer hot paths, store the results as JSON and compare them with the previous run at "
+        "the same scale."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', default='1k', choices=SCALES,
+                            help="Number of Tippanis and users to seed (Approvals are 1-3 per Tippani).")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--repeat', type=int, default=20, help="Timed runs per benchmark.")
+        parser.add_argument('--only', action='append', help="Run only this benchmark (repeatable).")
+        parser.add_argument('--output', help="Results directory (default: BENCHMARK_RESULTS_DIR).")
+        parser.add_argument('--baseline', help="Results file to compare with (default: latest at this scale).")
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help="Relative slow-down of the median that counts as a regression.")
+        parser.add_argument('--fail-on-regression', action='store_true')
+        parser.add_argument('--keepdb', action='store_true',
+                            help="Keep the benchmark database, and its seeded rows, for the next run.")
+        parser.add_argument('--i-know-this-is-scratch', action='store_true', dest='scratch',
+                            help="Seed and benchmark DATABASES['default'] itself instead of a separate "
+                                 "benchmark database. Only for databases you can throw away.")
+
+    def handle(self, *args, **options):
+        directory = options['output'] or getattr(settings, 'BENCHMARK_RESULTS_DIR', None)
+        if not directory:
+            raise CommandError("Pass --output or set BENCHMARK_RESULTS_DIR")
+        if options['scratch']:
+            return self.run(directory, options)
+
+        # Like the test runner: a separate "test_" database and media root, so seeding
+        # never touches real rows, sequences or uploads
+        verbosity = options['verbosity']
+        old_config = setup_databases(verbosity, interactive=False, keepdb=options['keepdb'], aliases={'default'})
+        try:
+            with tempfile.TemporaryDirectory(prefix='fts-bench-media-') as media_root, \
+                    override_settings(MEDIA_ROOT=media_root):
+                self.run(directory, options)
+        finally:
+            teardown_databases(old_config, verbosity, keepdb=options['keepdb'])
+
+    def run(self, directory, options):
+        scale = options['scale']
+        Seeder(options['seed'], log=self.stdout.write).seed(users=SCALES[scale], tippanis=SCALES[scale])
+        rng = random.Random(options['seed'])
+        benchmarks = self.benchmarks(rng)
+        if options['only']:
+            unknown = set(options['only']) - set(benchmarks)
+            if unknown:
+                raise CommandError(f"Unknown benchmark(s): {', '.join(sorted(unknown))}")
+            benchmarks = {name: benchmarks[name] for name in options['only']}
+
+        results = {}
+        for name, run in benchmarks.items():
+            results[name] = self.measure(run, options['repeat'])
+            self.stdout.write(
+                f"{name:<28} median {results[name]['median_ms']:9.3f} ms  p95 {results[name]['p95_ms']:9.3f} ms  "
+                f"{results[name]['queries']:6.1f} queries"
+            )
+
+        baseline_path = options['baseline'] or self.latest_result(directory, scale)
+        report = {
+            'scale': scale,
+            'seed': options['seed'],
+            'repeat': options['repeat'],
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'machine': platform.machine(),
+            },
+            'results': results,
+        }
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{scale}-{datetime.now():%Y%m%dT%H%M%S}.json")
+        with open(path, 'w') as results_file:
+            json.dump(report, results_file, indent=2)
+        self.stdout.write(f"Results written to {path}")
+
+        if baseline_path:
+            with open(baseline_path) as baseline_file:
+                baseline = json.load(baseline_file)
+            regressions = self.compare(baseline['results'], results, options['threshold'])
+            self.stdout.write(f"Compared with {baseline_path}")
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f"{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+
+    def benchmarks(self, rng):
+        """
+        Return {name: callable} for the hot paths; each callable runs the path once.
+        """
+        seeder = Seeder()
+        users = list(seeder.users().order_by('id').values_list('id', flat=True)[:100_000])
+        usernames = list(seeder.users().order_by('id').values_list('username', flat=True)[:1000])
+        tippanis = list(seeder.tippanis().order_by('id').values_list('id', flat=True)[:10_000])
+        factory = APIRequestFactory()
+        letters_view = LettersAndDocumentsViewSet.as_view({'get': 'list'})
+        approvals_view = ApprovalViewSet.as_view({'get': 'list'})
+        geography = get_geography_index()
+        provinces = list(geography.provinces)
+        client = Client()
+        login_url = reverse('user-login')
+
+        def serialize_users():
+            start = rng.randrange(max(1, len(users) - 50))
+            queryset = UserDetailSerializer.setup_eager_loading(
+                seeder.users().filter(id__gte=users[start]).order_by('id')[:50]
+            )
+            return UserDetailSerializer(queryset, many=True).data
+
+        def save_files():
+            files = [File() for _ in range(20)]
+            for file in files:
+                file.save()
+            File.objects.filter(pk__in=[file.pk for file in files]).delete()
+
+        def filter_by_tippani(view, path):
+            def run():
+                request = factory.get(path, {'tippani_id': rng.choice(tippanis)})
+                response = view(request)
+                response.render()
+                return response
+            return run
+
+        def geography_lookups():
+            province = rng.choice(provinces)
+            district = rng.choice(list(geography.districts(province)))
+            geography_list()
+            geography_list(province)
+            geography_list(province, district)
+            geography_search(district[:3])
+
+        def login():
+            response = client.post(
+                login_url, {'username': rng.choice(usernames), 'password': SEED_PASSWORD},
+                content_type='application/json',
+            )
+            if response.status_code != 200:
+                raise CommandError(f"Login failed with {response.status_code}")
+
+        return {
+            'user_detail_serializer': serialize_users,
+            'file_save_numbering': save_files,
+            'letters_tippani_filter': filter_by_tippani(letters_view, '/api/letters/'),
+            'approvals_tippani_filter': filter_by_tippani(approvals_view, '/api/approval/'),
+            'geography_lookups': geography_lookups,
+            'login': login,
+        }
+
+    def measure(self, run, repeat):
+        run()  # warm-up: imports, caches, connection
+        durations = []
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(repeat):
+                started = time.perf_counter()
+                run()
+                durations.append((time.perf_counter() - started) * 1000)
+        durations.sort()
+        return {
+            'median_ms': statistics.median(durations),
+            'p95_ms': percentile(durations, 0.95),
+            'min_ms': durations[0],
+            'queries': len(queries.captured_queries) / repeat,
+        }
+
+    def latest_result(self, directory, scale):
+        paths = sorted(glob.glob(os.path.join(directory, f'{scale}-*.json')))
+        return paths[-1] if paths else None
+
+    def compare(self, baseline, results, threshold):
+        """
+        Print the change against the baseline and return the names of regressed benchmarks.
+        """
+        regressions = []
+        for name, result in results.items():
+            previous = baseline.get(name)
+            if previous is None:
+                continue
+            change = result['median_ms'] / previous['median_ms'] - 1 if previous['median_ms'] else 0.0
+            regressed = change > threshold or result['queries'] > previous['queries']
+            if regressed:
+                regressions.append(name)
+            marker = self.style.ERROR('REGRESSION') if regressed else ''
+            self.stdout.write(
+                f"  {name:<28} {previous['median_ms']:9.3f} -> {result['median_ms']:9.3f} ms ({change:+.1%}) "
+                f"queries {previous['queries']:.1f} -> {result['queries']:.1f} {marker}"
+            )
+        return regressions
@@ -0,0 +1,97 @@
+import os
+from collections import Counter
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models
+from django.template.defaultfilters import filesizeformat
+
+from fts_app.models import MediaBlob
+from fts_app.storage import ContentAddressedStorage, file_digest
+
+
+def file_fields():
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.FileField):
+                yield model, field
+
+
+class Command(BaseCommand):
+    help = "Move existing media into content-addressed storage and report the space reclaimed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report what would change without touching files.")
+
+    def handle(self, *args, **options):
+        storage = default_storage
+        if not isinstance(storage, ContentAddressedStorage):
+            raise CommandError("The default storage is not ContentAddressedStorage; check STORAGES.")
+        dry_run = options['dry_run']
+
+        migrated = {}
+        stored = set()
+        processed = duplicates = missing = reclaimed = 0
+        for model, field in file_fields():
+            rows = (
+                model._default_manager
+                .exclude(**{f'{field.name}__isnull': True})
+                .exclude(**{field.name: ''})
+                .exclude(**{f'{field.name}__startswith': f'{storage.blob_prefix}/'})
+                .values_list('pk', field.name)
+            )
+            for pk, name in rows.iterator(chunk_size=500):
+                blob_name = migrated.get(name)
+                if blob_name is None:
+                    path = storage.path(name)
+                    if not os.path.exists(path):
+                        missing += 1
+                        self.stderr.write(f"Missing: {name} ({model._meta.label}.{field.name} pk={pk})")
+                        continue
+                    digest, size = file_digest(path)
+                    blob_name = storage.blob_name(digest, os.path.splitext(name)[1].lower()[:16])
+                    processed += 1
+                    if blob_name in stored or storage.exists(blob_name):
+                        duplicates += 1
+                        reclaimed += size
+                        if not dry_run:
+                            os.remove(path)
+                    elif not dry_run:
+                        os.makedirs(os.path.dirname(storage.path(blob_name)), exist_ok=True)
+                        os.replace(path, storage.path(blob_name))
+                    stored.add(blob_name)
+                    migrated[name] = blob_name
+                if not dry_run:
+                    model._default_manager.filter(pk=pk).update(**{field.name: blob_name})
+
+        if not dry_run:
+            self.recount_references(storage)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Would migrate' if dry_run else 'Migrated'} {processed} files: "
+            f"{duplicates} duplicates, {missing} missing, {filesizeformat(reclaimed)} reclaimed."
+        ))
+
+    def recount_references(self, storage):
+        """
+        Rebuild MediaBlob reference counts from the rows that point at each blob.
+        """
+        references = Counter()
+        for model, field in file_fields():
+            names = (
+                model._default_manager
+                .filter(**{f'{field.name}__startswith': f'{storage.blob_prefix}/'})
+                .values_list(field.name, flat=True)
+            )
+            references.update(names.iterator(chunk_size=2000))
+
+        MediaBlob.objects.update(refcount=0)
+        for name, count in references.items():
+            if not storage.exists(name):
+                continue
+            digest = os.path.basename(name).split('.', 1)[0]
+            MediaBlob.objects.update_or_create(
+                name=name,
+                defaults={'digest': digest, 'size': storage.size(name), 'refcount': count},
+            )
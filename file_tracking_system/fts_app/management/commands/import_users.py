@@ -0,0 +1,41 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from fts_app.imports import IMPORT_FORMATS, USER_IMPORT_BATCH_SIZE, SpreadsheetError, UserImporter, import_format, \
+    read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Register the employees listed in a .csv or .xlsx file, one per row, with the registration fields as "
+        "columns and nested ones prefixed by their relation (e.g. 'education.institution'). Valid rows are "
+        "saved even when others fail."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', dest='file_format', choices=IMPORT_FORMATS,
+                            help="Default: taken from the file extension.")
+        parser.add_argument('--batch-size', type=int, default=USER_IMPORT_BATCH_SIZE)
+        parser.add_argument('--report', help="Also write the full report as JSON to this file.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            file_format = import_format(options['path'], options['file_format'])
+            with open(options['path'], 'rb') as spreadsheet:
+                report = UserImporter(options['batch_size']).run(read_rows(spreadsheet, file_format))
+        except (OSError, SpreadsheetError) as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - started
+
+        for error in report['errors']:
+            self.stdout.write(self.style.ERROR(f"row {error['row']}: {json.dumps(error['errors'], default=str)}"))
+        if options['report']:
+            with open(options['report'], 'w') as report_file:
+                json.dump(report, report_file, indent=2, default=str)
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {report['created']} of {report['rows']} users in {elapsed:.1f}s; {report['failed']} failed."
+        ))
@@ -0,0 +1,220 @@
+import asyncio
+import json
+import random
+import tempfile
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django.test.utils import setup_databases, teardown_databases
+from django.urls import reverse
+
+from fts_app.authentication import issue_tokens
+from fts_app.loadtest import Target, run_load, start_server
+from fts_app.seeding import SEED_PASSWORD, Seeder
+
+
+DEFAULT_MIX = {'login': 5, 'dossier': 60, 'approval_write': 20, 'upload': 15}
+# Milliseconds; every route is also held to --max-error-rate
+DEFAULT_SLOS = {
+    'login': {'p95': 2500},
+    'dossier': {'p95': 250, 'p99': 500},
+    'approval_write': {'p95': 300, 'p99': 600},
+    'upload': {'p95': 500, 'p99': 1000},
+}
+# Distinct ids / payloads per traffic kind, so requests do not all hit the same rows
+VARIANTS = 50
+
+
+class Command(BaseCommand):
+    help = (
+        "Start the app on a local threaded WSGI server against a freshly seeded, separate load-test "
+        "database, replay a mix of logins, dossier reads, approval writes and file uploads at a fixed "
+        "rate, and check per-route SLOs. With --url the traffic, including its writes, goes to an already "
+        "running server instead; it must share the configured database, which is read but not seeded."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rate', type=float, default=50.0, help="Requests per second.")
+        parser.add_argument('--duration', type=float, default=30.0, help="Seconds of traffic.")
+        parser.add_argument('--concurrency', type=int, default=64, help="Client connections.")
+        parser.add_argument('--mix', help="Weights, e.g. 'login=5,dossier=60,approval_write=20,upload=15'.")
+        parser.add_argument('--slo', action='append', default=[],
+                            help="Override an SLO, e.g. 'dossier:p95=200' (milliseconds; repeatable).")
+        parser.add_argument('--max-error-rate', type=float, default=0.01)
+        parser.add_argument('--scale', type=int, default=1000, help="Tippanis and users to seed beforehand.")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--url', help="Test an already running server instead of starting one.")
+        parser.add_argument('--output', help="Also write the report as JSON to this file.")
+        parser.add_argument('--keepdb', action='store_true',
+                            help="Keep the load-test database, and its seeded rows, for the next run.")
+        parser.add_argument('--i-know-this-is-scratch', action='store_true', dest='scratch',
+                            help="Seed and write to DATABASES['default'] itself instead of a separate "
+                                 "load-test database. Only for databases you can throw away.")
+
+    def handle(self, *args, **options):
+        mix = self.parse_mix(options['mix']) if options['mix'] else DEFAULT_MIX
+        slos = self.parse_slos(options['slo'])
+
+        if options['url']:
+            result = self.send(options['url'], Seeder(options['seed']), mix, options)
+        elif options['scratch']:
+            result = self.run_local(mix, options)
+        else:
+            # Like the test runner: a separate "test_" database and media root for the server
+            verbosity = options['verbosity']
+            old_config = setup_databases(verbosity, interactive=False, keepdb=options['keepdb'], aliases={'default'})
+            try:
+                with tempfile.TemporaryDirectory(prefix='fts-load-media-') as media_root, \
+                        override_settings(MEDIA_ROOT=media_root):
+                    result = self.run_local(mix, options)
+            finally:
+                teardown_databases(old_config, verbosity, keepdb=options['keepdb'])
+
+        report, breaches = self.evaluate(result, mix, slos, options['max_error_rate'])
+        self.stdout.write(
+            f"{'route':<16} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>8}  SLO"
+        )
+        for name, row in report['routes'].items():
+            if not row['count']:
+                self.stdout.write(f"{name:<16} {0:>7} {'-':>9} {'-':>9} {'-':>9} {'-':>8}  no requests")
+                continue
+            self.stdout.write(
+                f"{name:<16} {row['count']:>7} {row['p50'] or 0:>9.1f} {row['p95'] or 0:>9.1f} "
+                f"{row['p99'] or 0:>9.1f} {row['error_rate']:>8.2%}  "
+                + (self.style.ERROR('; '.join(row['breaches'])) if row['breaches'] else self.style.SUCCESS('ok'))
+            )
+        self.stdout.write(
+            f"{result.total} requests in {result.elapsed:.1f}s ({result.throughput:.1f} req/s achieved)"
+        )
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                json.dump(report, output_file, indent=2)
+        if breaches:
+            raise CommandError(f"{breaches} SLO breach(es)")
+
+    def run_local(self, mix, options):
+        """
+        Seed the current database, then load a server started on it.
+        """
+        seeder = Seeder(options['seed'], log=self.stdout.write)
+        seeder.seed(users=options['scale'], tippanis=options['scale'])
+        return self.send(None, seeder, mix, options)
+
+    def send(self, url, seeder, mix, options):
+        targets = self.build_targets(seeder, mix, random.Random(options['seed']))
+        process = None
+        if not url:
+            process, url = start_server()
+        self.stdout.write(f"Sending {options['rate']:g} req/s for {options['duration']:g}s to {url}")
+        try:
+            return asyncio.run(run_load(
+                url, targets, options['concurrency'], duration=options['duration'], rate=options['rate'],
+                seed=options['seed'],
+            ))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.join()
+
+    def parse_mix(self, value):
+        mix = {}
+        for item in value.split(','):
+            name, _, weight = item.partition('=')
+            if name.strip() not in DEFAULT_MIX:
+                raise CommandError(f"Unknown traffic kind '{name}'; choose from {', '.join(DEFAULT_MIX)}")
+            try:
+                mix[name.strip()] = float(weight)
+            except ValueError:
+                raise CommandError(f"Invalid weight in --mix: '{item}'")
+        return mix
+
+    def parse_slos(self, values):
+        slos = {name: dict(limits) for name, limits in DEFAULT_SLOS.items()}
+        for value in values:
+            name, _, limit = value.partition(':')
+            metric, _, milliseconds = limit.partition('=')
+            if name not in DEFAULT_MIX or metric not in ('p50', 'p95', 'p99'):
+                raise CommandError(f"Invalid --slo '{value}'; expected e.g. 'dossier:p95=200'")
+            try:
+                slos.setdefault(name, {})[metric] = float(milliseconds)
+            except ValueError:
+                raise CommandError(f"Invalid --slo '{value}'; expected e.g. 'dossier:p95=200'")
+        return slos
+
+    def build_targets(self, seeder, mix, rng):
+        """
+        Spread each traffic kind over VARIANTS targets with their own ids and payloads.
+        """
+        users = list(seeder.users().order_by('id')[:VARIANTS])
+        tippani_ids = list(seeder.tippanis().order_by('-id').values_list('id', flat=True)[:VARIANTS * 20])
+        designation_ids = list(seeder.designations().values_list('id', flat=True))
+        if not users or not tippani_ids:
+            raise CommandError("Seed at least one user and one Tippani (--scale, or seed_fts for --url)")
+        tokens = [f'Bearer {issue_tokens(user)[1]}' for user in users]
+        json_headers = {'Content-Type': 'application/json'}
+
+        def authorized(headers=None):
+            return {'Authorization': rng.choice(tokens), **(headers or {})}
+
+        builders = {
+            'login': lambda: ('POST', reverse('user-login'), json_headers, json.dumps({
+                'username': rng.choice(users).username, 'password': SEED_PASSWORD,
+            }).encode()),
+            'dossier': lambda: (
+                'GET', reverse('tippani-dossier', args=[rng.choice(tippani_ids)]), authorized(), b'',
+            ),
+            'approval_write': lambda: ('POST', reverse('approval-list'), authorized(json_headers), json.dumps({
+                'tippani': rng.choice(tippani_ids),
+                'submitted_by': rng.choice(designation_ids),
+                'approved_by': rng.choice(designation_ids),
+                'status': rng.choice(('approved', 'transferred', 'pending')),
+                'remarks': 'load test',
+            }).encode()),
+            'upload': lambda: ('POST', reverse('file-list'), *self.multipart(authorized(), rng)),
+        }
+        targets = []
+        for name, weight in mix.items():
+            for _ in range(VARIANTS):
+                method, path, headers, body = builders[name]()
+                targets.append(Target(name, path, weight / VARIANTS, method, headers, body))
+        return targets
+
+    def multipart(self, headers, rng):
+        boundary = uuid.UUID(int=rng.getrandbits(128)).hex
+        content = rng.randbytes(rng.randint(1024, 64 * 1024))
+        body = (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="load-test.bin"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n'
+        ).encode() + content + f'\r\n--{boundary}--\r\n'.encode()
+        return {**headers, 'Content-Type': f'multipart/form-data; boundary={boundary}'}, body
+
+    def evaluate(self, result, mix, slos, max_error_rate):
+        """
+        Return (report, number of breached limits).
+        """
+        routes = {}
+        breaches = 0
+        for name in mix:
+            summary = result.summary(name)
+            attempts = result.attempts(name)
+            row = {
+                **summary,
+                'count': attempts,
+                'error_rate': result.errors_for(name) / attempts if attempts else 0.0,
+                'breaches': [],
+            }
+            for metric, limit in slos.get(name, {}).items():
+                if row[metric] is not None and row[metric] > limit:
+                    row['breaches'].append(f"{metric} {row[metric]:.0f} > {limit:g} ms")
+            if row['error_rate'] > max_error_rate:
+                row['breaches'].append(f"error rate {row['error_rate']:.2%} > {max_error_rate:.2%}")
+            breaches += len(row['breaches'])
+            routes[name] = row
+        report = {
+            'requests': result.total,
+            'elapsed': result.elapsed,
+            'throughput': result.throughput,
+            'routes': routes,
+        }
+        return report, breaches
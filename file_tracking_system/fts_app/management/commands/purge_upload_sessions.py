@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from fts_app.models import UploadSession
+from fts_app.uploads import discard_part
+
+
+class Command(BaseCommand):
+    help = "Delete expired upload sessions and their partial files."
+
+    def handle(self, *args, **options):
+        expired = UploadSession.objects.filter(expires_at__lte=timezone.now())
+        count = 0
+        for session in expired.iterator(chunk_size=500):
+            discard_part(session)
+            session.delete()
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Purged {count} expired upload sessions."))
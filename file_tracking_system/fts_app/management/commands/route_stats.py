@@ -0,0 +1,82 @@
+import glob
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from fts_app.loadtest import percentile
+
+
+class Command(BaseCommand):
+    help = "Print the rolling per-route request summary collected by InstrumentationMiddleware."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help="Print JSON instead of a table.")
+        parser.add_argument('--sort', default='p95', choices=('route', 'count', 'p50', 'p95', 'p99', 'queries'))
+        parser.add_argument('--max-age', type=float, default=3600,
+                            help="Ignore summaries from workers that have not written for this many seconds.")
+        parser.add_argument('--reset', action='store_true', help="Delete the collected summaries afterwards.")
+
+    def handle(self, *args, **options):
+        directory = getattr(settings, 'ROUTE_STATS_DIR', None)
+        if not directory:
+            raise CommandError("ROUTE_STATS_DIR is not set")
+        paths = glob.glob(os.path.join(directory, '*.json'))
+
+        merged = {}
+        now = time.time()
+        for path in paths:
+            try:
+                with open(path) as stats_file:
+                    data = json.load(stats_file)
+            except (OSError, ValueError):
+                continue
+            if now - data['written_at'] > options['max_age']:
+                continue
+            for route, stats in data['routes'].items():
+                entry = merged.setdefault(route, {'count': 0, 'errors': 0, 'nplusone': 0, 'durations': [], 'queries': []})
+                for key in ('count', 'errors', 'nplusone'):
+                    entry[key] += stats[key]
+                entry['durations'] += stats['durations']
+                entry['queries'] += stats['queries']
+
+        rows = []
+        for route, stats in merged.items():
+            durations = sorted(stats['durations'])
+            rows.append({
+                'route': route,
+                'count': stats['count'],
+                'errors': stats['errors'],
+                'nplusone': stats['nplusone'],
+                'p50': percentile(durations, 0.50),
+                'p95': percentile(durations, 0.95),
+                'p99': percentile(durations, 0.99),
+                'queries': sum(stats['queries']) / len(stats['queries']) if stats['queries'] else 0,
+            })
+        sort = options['sort']
+        rows.sort(key=lambda row: row[sort] or 0, reverse=sort != 'route')
+
+        if options['json']:
+            self.stdout.write(json.dumps(rows, indent=2))
+        elif not rows:
+            self.stdout.write("No requests recorded.")
+        else:
+            width = max(len(row['route']) for row in rows)
+            self.stdout.write(
+                f"{'route':<{width}} {'count':>7} {'5xx':>5} {'n+1':>5} {'p50 ms':>9} {'p95 ms':>9} "
+                f"{'p99 ms':>9} {'queries':>8}"
+            )
+            for row in rows:
+                self.stdout.write(
+                    f"{row['route']:<{width}} {row['count']:>7} {row['errors']:>5} {row['nplusone']:>5} "
+                    f"{row['p50']:>9.2f} {row['p95']:>9.2f} {row['p99']:>9.2f} {row['queries']:>8.1f}"
+                )
+
+        if options['reset']:
+            for path in paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from fts_app.models import Approval, CustomUser, Designation, File, LettersAndDocuments, Office, Tippani
+from fts_app.seeding import SEED_BATCH_SIZE, SEED_PASSWORD, Seeder
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with deterministic synthetic users, offices, designations, Tippanis, letters, "
+        "files and approval chains. Counts are targets: running again with larger numbers extends the data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--tippanis', type=int, default=100_000,
+                            help="Each gets 1-3 approvals, 0-3 letters and 0-2 files per letter.")
+        parser.add_argument('--offices', type=int, help="Default: a tenth of the smaller of --users/--tippanis.")
+        parser.add_argument('--designations', type=int, help="Default: one per 100 Tippanis, 10 to 500.")
+        parser.add_argument('--no-letters', action='store_true', help="Skip letters and files.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=SEED_BATCH_SIZE)
+        parser.add_argument('--workers', type=int, default=1,
+                            help="Processes generating rows in parallel; inserts stay in this process.")
+
+    def handle(self, *args, **options):
+        models = (Designation, Office, CustomUser, Tippani, Approval, LettersAndDocuments, File)
+        before = {model: model.objects.count() for model in models}
+        started = time.perf_counter()
+
+        Seeder(options['seed'], options['batch_size'], log=self.stdout.write, workers=options['workers']).seed(
+            users=options['users'],
+            tippanis=options['tippanis'],
+            offices=options['offices'],
+            designations=options['designations'],
+            letters=not options['no_letters'],
+        )
+
+        elapsed = time.perf_counter() - started
+        created = 0
+        for model in models:
+            count = model.objects.count() - before[model]
+            created += count
+            self.stdout.write(f"  {model._meta.verbose_name_plural:<24} +{count}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {created} rows in {elapsed:.1f}s ({created / elapsed if elapsed else 0:.0f} rows/s). "
+            f"Seeded users log in with password '{SEED_PASSWORD}'."
+        ))
@@ -0,0 +1,203 @@
+import mimetypes
+import os
+import re
+from stat import S_ISREG
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.http import parse_etags
+
+from .executors import run_io
+
+
+MEDIA_URL_MAX_AGE = getattr(settings, 'MEDIA_URL_MAX_AGE', 300)
+# None serves files from Python; 'nginx' uses X-Accel-Redirect, 'apache' uses X-Sendfile
+MEDIA_ACCEL = getattr(settings, 'MEDIA_ACCEL', None)
+MEDIA_ACCEL_PREFIX = getattr(settings, 'MEDIA_ACCEL_PREFIX', '/protected-media/')
+MEDIA_CHUNK_SIZE = 64 * 1024
+# Work areas below MEDIA_ROOT holding incomplete uploads; never served
+PRIVATE_MEDIA_PREFIXES = ('uploads/partial/', 'cas/tmp/')
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+signer = signing.TimestampSigner(salt='fts_app.media')
+
+
+def sign_media_name(name):
+    """
+    Return the signature part of a signed media URL for `name`.
+    """
+    return signer.sign(name)[len(name) + 1:]
+
+
+def has_valid_signature(name, signature):
+    if not signature:
+        return False
+    try:
+        signer.unsign(f"{name}:{signature}", max_age=MEDIA_URL_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def signed_media_url(name, request=None):
+    """
+    Return a short-lived URL that serves `name` without further authentication.
+    """
+    url = f"{reverse('protected-media', kwargs={'name': name})}?sig={sign_media_name(name)}"
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def parse_range(header, size):
+    """
+    Parse a single `bytes=` range into (start, end) with end exclusive.
+
+    Returns None when the header is absent or names several ranges (the whole
+    file is served then) and False when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match((header or '').strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size
+    start = int(first)
+    end = min(int(last) + 1, size) if last else size
+    if start >= size or start >= end:
+        return False
+    return start, end
+
+
+def _read_range(path, start, end):
+    with open(path, 'rb') as media_file:
+        media_file.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = media_file.read(min(MEDIA_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+async def _aread_range(path, start, end):
+    # Every blocking open/read goes through the bounded I/O pool
+    media_file = await run_io(open, path, 'rb')
+    try:
+        await run_io(media_file.seek, start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = await run_io(media_file.read, min(MEDIA_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        await run_io(media_file.close)
+
+
+def _prepare_media_response(request, name, path, stat):
+    """
+    Return (response, byte_range) for the parts of serving that need no file reads.
+
+    `response` is set when the request is answered without a body from
+    Python: 304, 416 or a web-server offload. Otherwise the caller streams
+    `byte_range` (None for the whole file).
+    """
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    headers = {
+        'ETag': etag,
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': f'private, max-age={MEDIA_URL_MAX_AGE}',
+    }
+
+    if_none_match = [tag.removeprefix('W/') for tag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))]
+    if etag in if_none_match or '*' in if_none_match:
+        return HttpResponse(status=304, headers=headers), None
+
+    if MEDIA_ACCEL == 'nginx':
+        # nginx handles Range and sendfile for the internal location itself
+        headers['X-Accel-Redirect'] = MEDIA_ACCEL_PREFIX + quote(name)
+        return HttpResponse(content_type=content_type, headers=headers), None
+    if MEDIA_ACCEL == 'apache':
+        headers['X-Sendfile'] = path
+        return HttpResponse(content_type=content_type, headers=headers), None
+
+    byte_range = parse_range(request.META.get('HTTP_RANGE'), stat.st_size)
+    if byte_range is False:
+        headers['Content-Range'] = f'bytes */{stat.st_size}'
+        return HttpResponse(status=416, headers=headers), None
+
+    response = StreamingHttpResponse(content_type=content_type, headers=headers)
+    if byte_range is not None:
+        start, end = byte_range
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {start}-{end - 1}/{stat.st_size}'
+        response['Content-Length'] = str(end - start)
+    else:
+        response['Content-Length'] = str(stat.st_size)
+    return response, byte_range
+
+
+def media_path(name):
+    """
+    Return the filesystem path for `name`, or None if it may not be served.
+    """
+    path = default_storage.path(name)
+    relative = os.path.relpath(path, default_storage.location).replace(os.sep, '/')
+    if relative.startswith(PRIVATE_MEDIA_PREFIXES):
+        return None
+    return path
+
+
+def serve_media(request, name):
+    """
+    Build the response for a media file the caller is allowed to read.
+    """
+    path = media_path(name)
+    try:
+        stat = os.stat(path) if path else None
+    except (FileNotFoundError, NotADirectoryError):
+        stat = None
+    if stat is None or not S_ISREG(stat.st_mode):
+        return HttpResponse(status=404)
+
+    response, byte_range = _prepare_media_response(request, name, path, stat)
+    if not isinstance(response, StreamingHttpResponse):
+        return response
+    if byte_range is not None:
+        response.streaming_content = _read_range(path, *byte_range)
+        return response
+
+    # FileResponse lets the WSGI server use wsgi.file_wrapper (sendfile)
+    file_response = FileResponse(open(path, 'rb'), content_type=response['Content-Type'])
+    for header, value in response.items():
+        file_response[header] = value
+    return file_response
+
+
+async def aserve_media(request, name):
+    """
+    Async counterpart of serve_media; file access runs in the I/O pool.
+    """
+    path = media_path(name)
+    try:
+        stat = await run_io(os.stat, path) if path else None
+    except (FileNotFoundError, NotADirectoryError):
+        stat = None
+    if stat is None or not S_ISREG(stat.st_mode):
+        return HttpResponse(status=404)
+
+    response, byte_range = _prepare_media_response(request, name, path, stat)
+    if isinstance(response, StreamingHttpResponse):
+        response.streaming_content = _aread_range(path, *(byte_range or (0, stat.st_size)))
+    return response
@@ -0,0 +1,91 @@
+import os
+import time
+
+from django.conf import settings
+from django.http import HttpResponse
+
+from .instrumentation import route_name
+
+try:
+    import prometheus_client
+    from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+except ImportError:
+    prometheus_client = None
+
+
+# Opt-in: METRICS_ENABLED = True and `pip install prometheus_client`. Under a
+# multi-worker server also export PROMETHEUS_MULTIPROC_DIR (an empty directory
+# shared by the workers, cleared on deploy) so /metrics aggregates all of them.
+METRICS_ENABLED = getattr(settings, 'METRICS_ENABLED', False) and prometheus_client is not None
+METRICS_LATENCY_BUCKETS = getattr(settings, 'METRICS_LATENCY_BUCKETS', (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+))
+UPLOAD_CONTENT_TYPES = ('multipart/form-data', 'application/octet-stream')
+
+if METRICS_ENABLED:
+    REQUEST_LATENCY = Histogram(
+        'fts_request_duration_seconds', "Time spent handling a request.",
+        ['route', 'method'], buckets=METRICS_LATENCY_BUCKETS,
+    )
+    REQUESTS = Counter('fts_requests_total', "Requests handled.", ['route', 'method', 'status'])
+    IN_FLIGHT = Gauge('fts_requests_in_flight', "Requests currently being handled.", multiprocess_mode='livesum')
+    DB_QUERIES = Counter('fts_db_queries_total', "SQL statements executed.", ['route'])
+    DB_QUERY_SECONDS = Counter('fts_db_query_seconds_total', "Time spent executing SQL.", ['route'])
+    UPLOAD_BYTES = Counter('fts_upload_bytes_total', "Request body bytes received by upload endpoints.", ['route'])
+    CACHE_REQUESTS = Counter(
+        'fts_response_cache_requests_total', "Response cache lookups; hit ratio is hit / (hit + miss).",
+        ['view', 'result'],
+    )
+
+
+def request_started():
+    if METRICS_ENABLED:
+        IN_FLIGHT.inc()
+    return time.perf_counter()
+
+
+def request_finished(request, response, started, request_metrics=None):
+    """
+    Record one finished request; `request_metrics` holds its SQL totals.
+    """
+    if not METRICS_ENABLED:
+        return
+    IN_FLIGHT.dec()
+    route = route_name(request)
+    REQUEST_LATENCY.labels(route, request.method).observe(time.perf_counter() - started)
+    REQUESTS.labels(route, request.method, str(response.status_code)).inc()
+    if request_metrics is not None and request_metrics.sql_count:
+        DB_QUERIES.labels(route).inc(request_metrics.sql_count)
+        DB_QUERY_SECONDS.labels(route).inc(request_metrics.sql_time)
+    if request.content_type in UPLOAD_CONTENT_TYPES:
+        try:
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        if length:
+            UPLOAD_BYTES.labels(route).inc(length)
+
+
+def record_cache_lookup(view, hit):
+    if METRICS_ENABLED:
+        CACHE_REQUESTS.labels(view, 'hit' if hit else 'miss').inc()
+
+
+def mark_process_dead(pid):
+    """
+    Drop a dead worker's live gauges; call from gunicorn's `child_exit` hook.
+    """
+    if METRICS_ENABLED and os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid)
+
+
+def metrics_view(request):
+    """
+    Prometheus text exposition of every worker's metrics.
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return HttpResponse(prometheus_client.generate_latest(registry), content_type=prometheus_client.CONTENT_TYPE_LATEST)
@@ -0,0 +1,265 @@
+import hashlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_sequence, compress_string
+from rest_framework.permissions import SAFE_METHODS
+
+from . import instrumentation, metrics
+from .db_routers import finish_request, replica_aliases, start_request, wrote_to_primary
+from .instrumentation import INSTRUMENTATION_ENABLED
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESSION_MIN_SIZE = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+COMPRESSION_CONTENT_TYPES = getattr(settings, 'COMPRESSION_CONTENT_TYPES', (
+    'application/json', 'application/msgpack', 'application/javascript', 'application/xml', 'text/',
+))
+COMPRESSION_BROTLI_QUALITY = getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5)
+
+
+def accepted_encodings(header):
+    """
+    Return {coding: q} from an Accept-Encoding header.
+    """
+    encodings = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            encodings[coding.strip().lower()] = quality
+    return encodings
+
+
+def choose_encoding(header):
+    """
+    Pick the best coding we can produce, preferring brotli on a tie.
+    """
+    encodings = accepted_encodings(header)
+    candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best, best_quality = None, 0.0
+    for coding in candidates:
+        quality = encodings.get(coding, encodings.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def _brotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+    for item in sequence:
+        data = compressor.process(item)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compress API responses with brotli or gzip, whichever the client prefers.
+
+    Only responses of a compressible content type and at least
+    COMPRESSION_MIN_SIZE bytes are compressed; downloads such as PDFs and
+    images, partial content and already encoded bodies are left alone.
+    Brotli needs the optional brotli package.
+    """
+    # Same BREACH mitigation as django.middleware.gzip.GZipMiddleware
+    max_random_bytes = 100
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or response.status_code == 206:
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if not content_type.startswith(COMPRESSION_CONTENT_TYPES):
+            return response
+        if response.streaming:
+            if response.is_async:
+                return response
+        elif len(response.content) < COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        coding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if coding is None:
+            return response
+
+        if response.streaming:
+            if coding == 'br':
+                response.streaming_content = _brotli_sequence(response.streaming_content)
+            else:
+                response.streaming_content = compress_sequence(
+                    response.streaming_content, max_random_bytes=self.max_random_bytes
+                )
+            del response.headers['Content-Length']
+        else:
+            if coding == 'br':
+                compressed = brotli.compress(response.content, quality=COMPRESSION_BROTLI_QUALITY)
+            else:
+                compressed = compress_string(response.content, max_random_bytes=self.max_random_bytes)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # The compressed body differs byte for byte, so a strong ETag becomes weak
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = coding
+        return response
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Pins a client's reads to the primary for READ_YOUR_WRITES_WINDOW seconds after it writes.
+
+    Unsafe methods always use the primary. Clients are told apart by a hash
+    of their Authorization header (or session cookie), kept in the
+    REPLICA_STICKINESS_CACHE cache; requests with neither are never pinned.
+    Every worker only honours the pin if that cache is shared between them:
+    with a per-process cache such as LocMemCache, a client's next read can
+    land on another worker and go to a lagging replica.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.window = getattr(settings, 'READ_YOUR_WRITES_WINDOW', 5)
+        self.cache_alias = getattr(settings, 'REPLICA_STICKINESS_CACHE', 'default')
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def client_key(self, request):
+        credential = request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        if not credential:
+            return None
+        return 'fts:sticky:' + hashlib.sha256(credential.encode()).hexdigest()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not replica_aliases():
+            return self.get_response(request)
+        key = self.client_key(request)
+        cache = caches[self.cache_alias]
+        pinned = request.method not in SAFE_METHODS or (key is not None and cache.get(key) is not None)
+        tokens = start_request(pinned)
+        try:
+            response = self.get_response(request)
+            if key is not None and (request.method not in SAFE_METHODS or wrote_to_primary()):
+                cache.set(key, 1, timeout=self.window)
+            return response
+        finally:
+            finish_request(tokens)
+
+    async def __acall__(self, request):
+        if not replica_aliases():
+            return await self.get_response(request)
+        key = self.client_key(request)
+        cache = caches[self.cache_alias]
+        pinned = request.method not in SAFE_METHODS or (key is not None and await cache.aget(key) is not None)
+        tokens = start_request(pinned)
+        try:
+            response = await self.get_response(request)
+            if key is not None and (request.method not in SAFE_METHODS or wrote_to_primary()):
+                await cache.aset(key, 1, timeout=self.window)
+            return response
+        finally:
+            finish_request(tokens)
+
+
+class InstrumentationMiddleware:
+    """
+    Records SQL count and time, serializer time and render time for each request.
+
+    Totals go out as a Server-Timing header and a structured log line on the
+    `fts_app.requests` logger; repeated SQL shapes are flagged as likely N+1
+    queries and every request feeds the per-route summary.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not INSTRUMENTATION_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = instrumentation.start_request()
+        try:
+            response = self.get_response(request)
+            instrumentation.record_request(request, response, instrumentation.current_metrics())
+            return response
+        finally:
+            instrumentation.finish_request(token)
+
+    async def __acall__(self, request):
+        token = instrumentation.start_request()
+        try:
+            response = await self.get_response(request)
+            instrumentation.record_request(request, response, instrumentation.current_metrics())
+            return response
+        finally:
+            instrumentation.finish_request(token)
+
+
+class MetricsMiddleware:
+    """
+    Feeds the Prometheus metrics served at /metrics (see fts_app.metrics).
+
+    SQL totals come from the same per-request accounting as
+    InstrumentationMiddleware: the one it started, or one of its own when
+    instrumentation is off.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not metrics.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = metrics.request_started()
+        token = instrumentation.start_request() if instrumentation.current_metrics() is None else None
+        try:
+            response = self.get_response(request)
+            metrics.request_finished(request, response, started, instrumentation.current_metrics())
+            return response
+        finally:
+            if token is not None:
+                instrumentation.finish_request(token)
+
+    async def __acall__(self, request):
+        started = metrics.request_started()
+        token = instrumentation.start_request() if instrumentation.current_metrics() is None else None
+        try:
+            response = await self.get_response(request)
+            metrics.request_finished(request, response, started, instrumentation.current_metrics())
+            return response
+        finally:
+            if token is not None:
+                instrumentation.finish_request(token)
@@ -1,8 +1,10 @@
-import random
+import uuid
 from django.contrib.auth.models import AbstractUser, Group, Permission
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.translation import gettext_lazy as _
+from .geography import get_geography_index
+from .numbering import file_number_allocator
 
 class Loan(models.Model):
     class LoanType(models.TextChoices):
@@ -390,524 +392,11 @@ class CustomUser(AbstractUser):
 
     # Dynamic district and municipality choices based on the state
     def get_district_choices(state):
-        # Province data with respective districts
-        province_data = {
-            "Koshi": ["Jhapa", "Morang", "Sunsari", "Bhojpur", "Ilam", "Khotang", "Okhaldhunga", "Panchthar", "Sankhuwasabha", "Solukhumbu", "Taplejung", "Terhathum", "Udayapur"],
-            "Madhesh": ["Saptari", "Dhanusha", "Mahottari", "Sarlahi", "Siraha", "Bara", "Parsa", "Rautahat", "Chhathapol"],
-            "Bagmati": ["Kathmandu", "Bhaktapur", "Lalitpur", "Kavrepalanchok", "Nuwakot", "Rasuwa", "Sindhuli", "Sindhupalchok", "Chitwan", "Makawanpur", "Bhaktapur", "Nawalparasi", "Tanahu"],
-            "Gandaki": ["Kaski", "Parbat", "Tanahun", "Gorkha", "Lamjung", "Manang", "Mustang", "Syangja", "Nawalparasi", "Syangja"],
-            "Lumbini": ["Rupandehi", "Kapilvastu", "Palpa", "Nawalparasi", "Arghakhanchi", "Rukum", "Salyan", "Dang", "Banke", "Bardiya"],
-            "Karnali": ["Surkhet", "Dailekh", "Jajarkot", "Jumla", "Kalikot", "Mugu", "Humla", "Dolpa", "Rukum", "Salyan"],
-            "Sudurpaschim": ["Kanchanpur", "Baitadi", "Darchula", "Achham", "Kailali", "Bajura", "Bajhang", "Dadeldhura", "Doti", "Dadeldhura"]
-        }
-        return province_data.get(state, [])
+        return list(get_geography_index().districts(state))
 
     def get_municipality_choices(state, district):
-        # Expanded data for municipalities (to be filled with your data)
-        district_municipality_data = {
-           # Koshi Province (Province 1)
-            "Bhojpur": [
-                "Bhojpur Municipality", "Shadananda Municipality",
-                "Hatuwagadhi Rural Municipality", "Aamchowk Rural Municipality",
-                "Arun Rural Municipality", "Pauwadungma Rural Municipality",
-                "Ramprasad Rai Rural Municipality", "Salpasilichho Rural Municipality",
-                "Tyamke Maiyum Rural Municipality"
-            ],
-            "Dhankuta": [
-                "Dhankuta Municipality", "Pakhribas Municipality",
-                "Mahalaxmi Municipality", "Chhathar Jorpati Rural Municipality",
-                "Shahidbhumi Rural Municipality", "Sangurigadhi Rural Municipality"
-            ],
-            "Ilam": [
-                "Ilam Municipality", "Deumai Municipality", "Mai Municipality",
-                "Suryodaya Municipality", "Fakfokthum Rural Municipality",
-                "Chulachuli Rural Municipality", "Mangsebung Rural Municipality",
-                "Maijogmai Rural Municipality", "Rong Rural Municipality",
-                "Sandakpur Rural Municipality"
-            ],
-            "Jhapa": [
-                "Bhadrapur Municipality", "Birtamod Municipality", "Damak Municipality",
-                "Mechinagar Municipality", "Kankai Municipality", "Shivasatakshi Municipality",
-                "Arjundhara Municipality", "Buddhashanti Rural Municipality",
-                "Barhadashi Rural Municipality", "Gauriganj Rural Municipality",
-                "Gauradaha Municipality", "Haldibari Rural Municipality",
-                "Jhapa Rural Municipality", "Kamal Rural Municipality"
-            ],
-            "Khotang": [
-                "Diktel Rupakot Majhuwagadhi Municipality", "Halesi Tuwachung Municipality",
-                "Aiselukharka Rural Municipality", "Barahapokhari Rural Municipality",
-                "Diprung Chuichumma Rural Municipality", "Jantedhunga Rural Municipality",
-                "Khotehang Rural Municipality", "Lamidanda Rural Municipality",
-                "Rawabesi Rural Municipality", "Sakela Rural Municipality"
-            ],
-            "Morang": [
-                "Biratnagar Metropolitan City", "Sundar Haraicha Municipality",
-                "Belbari Municipality", "Pathari Sanischare Municipality",
-                "Rangeli Municipality", "Letang Municipality",
-                "Ratuwamai Municipality", "Urlabari Municipality",
-                "Katahari Rural Municipality", "Kerabari Rural Municipality",
-                "Gramthan Rural Municipality", "Miklajung Rural Municipality",
-                "Budhiganga Rural Municipality", "Dhanpalthan Rural Municipality"
-            ],
-            "Okhaldhunga": [
-                "Siddhicharan Municipality", "Molung Rural Municipality",
-                "Champadevi Rural Municipality", "Khijidemba Rural Municipality",
-                "Likhu Rural Municipality", "Manebhanjyang Rural Municipality",
-                "Chisankhugadhi Rural Municipality"
-            ],
-            "Panchthar": [
-                "Phidim Municipality", "Hilihang Rural Municipality",
-                "Kummayak Rural Municipality", "Miklajung Rural Municipality",
-                "Tumbewa Rural Municipality", "Yangwarak Rural Municipality",
-                "Falelung Rural Municipality"
-            ],
-            "Sankhuwasabha": [
-                "Khandbari Municipality", "Dharan Sub-Metropolitan City",
-                "Chainpur Municipality", "Madi Municipality",
-                "Makalu Rural Municipality", "Bhotkhola Rural Municipality",
-                "Chichila Rural Municipality", "Silichong Rural Municipality",
-                "Sabhapokhari Rural Municipality"
-            ],
-            "Solukhumbu": [
-                "Solu Dudhkunda Municipality", "Khumbu Pasang Lhamu Rural Municipality",
-                "Necha Salyan Rural Municipality", "Mahakulung Rural Municipality",
-                "Likhupike Rural Municipality", "Thulung Dudhkoshi Rural Municipality",
-                "Mapya Dudhkoshi Rural Municipality"
-            ],
-            "Sunsari": [
-                "Dharan Sub-Metropolitan City", "Itahari Sub-Metropolitan City",
-                "Inaruwa Municipality", "Duhabi Municipality",
-                "Ramnagar Bhulke Municipality", "Harinagara Rural Municipality",
-                "Dewanganj Rural Municipality", "Koshi Rural Municipality",
-                "Barju Rural Municipality", "Gadhi Rural Municipality",
-                "Bhokraha Narsingh Rural Municipality"
-            ],
-            "Taplejung": [
-                "Phungling Municipality", "Aathrai Tribeni Rural Municipality",
-                "Maiwakhola Rural Municipality", "Mikwa Khola Rural Municipality",
-                "Meringden Rural Municipality", "Phaktanglung Rural Municipality",
-                "Sidingwa Rural Municipality", "Sirijunga Rural Municipality",
-                "Pathivara Yangwarak Rural Municipality"
-            ],
-            "Terhathum": [
-                "Myanglung Municipality", "Laligurans Municipality",
-                "Chhathar Rural Municipality", "Menchayam Rural Municipality",
-                "Phedap Rural Municipality", "Aathrai Rural Municipality"
-            ],
-            "Udayapur": [
-                "Triyuga Municipality", "Katari Municipality", "Chaudandigadhi Municipality",
-                "Belaka Municipality", "Udayapurgadhi Rural Municipality",
-                "Tapli Rural Municipality", "Rautamai Rural Municipality",
-                "Limchungbung Rural Municipality"
-            ],
-                
-            # Madhesh Province (Province 2)
-            "Bara": [
-                "Kalaiya Sub-Metropolitan City", "Jeetpur Simara Sub-Metropolitan City",
-                "Kolhabi Municipality", "Nijgadh Municipality", "Mahagadhimai Municipality",
-                "Simraungadh Municipality", "Pacharauta Municipality", "Adarsh Kotwal Rural Municipality",
-                "Baragadhi Rural Municipality", "Devtal Rural Municipality", "Feta Rural Municipality",
-                "Karaiyamai Rural Municipality", "Parwanipur Rural Municipality", "Prasauni Rural Municipality",
-                "Suwarna Rural Municipality"
-            ],
-            "Dhanusha": [
-                "Janakpurdham Sub-Metropolitan City", "Chhireshwarnath Municipality",
-                "Dhanusadham Municipality", "Ganeshman Charnath Municipality",
-                "Kamala Municipality", "Mithila Municipality", "Mithila Bihari Municipality",
-                "Nagarain Municipality", "Sahidnagar Municipality", "Bateshwar Rural Municipality",
-                "Bideha Rural Municipality", "Janaknandini Rural Municipality",
-                "Laxminiya Rural Municipality", "Mukhiyapatti Musarmiya Rural Municipality",
-                "Sabaila Municipality", "Hansapur Municipality", "Aurahi Rural Municipality"
-            ],
-            "Mahottari": [
-                "Jaleshwar Municipality", "Bardibas Municipality", "Gaushala Municipality",
-                "Loharpatti Municipality", "Matihani Municipality", "Balwa Municipality",
-                "Ramgopalpur Municipality", "Manara Shiswa Municipality", "Sonama Rural Municipality",
-                "Ekdara Rural Municipality", "Samsi Rural Municipality", "Mahottari Rural Municipality",
-                "Pipra Rural Municipality"
-            ],
-            "Parsa": [
-                "Birgunj Metropolitan City", "Bahudarmai Municipality", "Parsagadhi Municipality",
-                "Pokhariya Municipality", "Bindabasini Rural Municipality", "Chhipaharmai Rural Municipality",
-                "Dhobini Rural Municipality", "Jagarnathpur Rural Municipality",
-                "Kalikamai Rural Municipality", "Paterwa Sugauli Rural Municipality",
-                "Sakhuwa Prasauni Rural Municipality", "Thori Rural Municipality"
-            ],
-            "Rautahat": [
-                "Gaur Municipality", "Chandrapur Municipality", "Garuda Municipality",
-                "Gadhimai Municipality", "Baudhimai Municipality", "Brindaban Municipality",
-                "Gujara Municipality", "Katahariya Municipality", "Dewahi Gonahi Municipality",
-                "Phatuwa Bijayapur Municipality", "Paroha Municipality", "Rajpur Municipality",
-                "Ishnath Municipality", "Durga Bhagwati Rural Municipality",
-                "Madhav Narayan Rural Municipality", "Maulapur Municipality", "Yamunamai Rural Municipality"
-            ],
-            "Saptari": [
-                "Rajbiraj Municipality", "Bodebarsain Municipality", "Dakneshwori Municipality",
-                "Hanumannagar Kankalini Municipality", "Kanchanrup Municipality",
-                "Khadak Municipality", "Saptakoshi Municipality", "Shambhunath Municipality",
-                "Agnisair Krishna Savaran Rural Municipality", "Bishnupur Rural Municipality",
-                "Chhinnamasta Rural Municipality", "Mahadeva Rural Municipality",
-                "Rupani Rural Municipality", "Surunga Municipality", "Tilathi Koiladi Rural Municipality",
-                "Tirhut Rural Municipality"
-            ],
-            "Sarlahi": [
-                "Malangwa Municipality", "Haripur Municipality", "Harion Municipality",
-                "Bagmati Municipality", "Balara Municipality", "Barahathawa Municipality",
-                "Chandranagar Rural Municipality", "Godaita Municipality", "Ishworpur Municipality",
-                "Kabilasi Municipality", "Kaudena Rural Municipality", "Lalbandi Municipality",
-                "Parsa Rural Municipality", "Ramnagar Rural Municipality", "Bishnu Rural Municipality",
-                "Basbariya Rural Municipality"
-            ],
-            "Siraha": [
-                "Siraha Municipality", "Lahan Municipality", "Golbazar Municipality",
-                "Dhangadhimai Municipality", "Mirchaiya Municipality", "Kalyanpur Municipality",
-                "Bhagawanpur Rural Municipality", "Aurahi Rural Municipality",
-                "Bariyarpatti Rural Municipality", "Bishnupur Rural Municipality",
-                "Laxmipur Patari Rural Municipality", "Naraha Rural Municipality",
-                "Sakhuwanankarkatti Rural Municipality", "Sukhipur Municipality",
-                "Arnama Rural Municipality"
-            ],
-            
-            # Bagmati Province (Province 3)
-            "Bhaktapur": [
-                "Bhaktapur Municipality", "Changunarayan Municipality",
-                "Madhyapur Thimi Municipality", "Suryabinayak Municipality"
-            ],
-            "Chitwan": [
-                "Bharatpur Metropolitan City", "Ratnanagar Municipality",
-                "Khairahani Municipality", "Madi Municipality",
-                "Rapti Municipality", "Kalika Municipality", "Ichchhakamana Rural Municipality"
-            ],
-            "Dhading": [
-                "Nilkantha Municipality", "Dhunibesi Municipality",
-                "Gajuri Rural Municipality", "Galchhi Rural Municipality",
-                "Jwalamukhi Rural Municipality", "Khaniyabas Rural Municipality",
-                "Netrawati Dabjong Rural Municipality", "Rubi Valley Rural Municipality",
-                "Siddhalek Rural Municipality", "Thakre Rural Municipality",
-                "Tripurasundari Rural Municipality"
-            ],
-            "Dolakha": [
-                "Bhimeshwar Municipality", "Jiri Municipality",
-                "Baiteshwor Rural Municipality", "Bigu Rural Municipality",
-                "Gaurishankar Rural Municipality", "Kalinchowk Rural Municipality",
-                "Melung Rural Municipality", "Shailung Rural Municipality",
-                "Tamakoshi Rural Municipality"
-            ],
-            "Kathmandu": [
-                "Kathmandu Metropolitan City", "Kageshwari-Manohara Municipality",
-                "Kirtipur Municipality", "Chandragiri Municipality",
-                "Gokarneshwar Municipality", "Nagarjun Municipality",
-                "Shankharapur Municipality", "Tarakeshwar Municipality",
-                "Tokha Municipality", "Budhanilkantha Municipality"
-            ],
-            "Kavrepalanchok": [
-                "Banepa Municipality", "Dhulikhel Municipality",
-                "Panauti Municipality", "Panchkhal Municipality",
-                "Mandandeupur Municipality", "Namobuddha Municipality",
-                "Bhumlu Rural Municipality", "Chaurideurali Rural Municipality",
-                "Khanikhola Rural Municipality", "Mahabharat Rural Municipality",
-                "Roshi Rural Municipality", "Temal Rural Municipality"
-            ],
-            "Lalitpur": [
-                "Lalitpur Metropolitan City", "Godawari Municipality",
-                "Mahalaxmi Municipality", "Konjyosom Rural Municipality",
-                "Bagmati Rural Municipality"
-            ],
-            "Makwanpur": [
-                "Hetauda Sub-Metropolitan City", "Thaha Municipality",
-                "Bakaiya Rural Municipality", "Bhimphedi Rural Municipality",
-                "Indrasarowar Rural Municipality", "Kailash Rural Municipality",
-                "Makawanpurgadhi Rural Municipality", "Manahari Rural Municipality",
-                "Raksirang Rural Municipality"
-            ],
-            "Nuwakot": [
-                "Bidur Municipality", "Belkotgadhi Municipality",
-                "Kakani Rural Municipality", "Kispang Rural Municipality",
-                "Likhu Rural Municipality", "Meghang Rural Municipality",
-                "Panchakanya Rural Municipality", "Shivapuri Rural Municipality",
-                "Suryagadhi Rural Municipality", "Tadi Rural Municipality",
-                "Tarkeshwar Rural Municipality"
-            ],
-            "Ramechhap": [
-                "Manthali Municipality", "Ramechhap Municipality",
-                "Doramba Rural Municipality", "Gokulganga Rural Municipality",
-                "Khadadevi Rural Municipality", "Likhu Tamakoshi Rural Municipality",
-                "Umakunda Rural Municipality", "Sunapati Rural Municipality"
-            ],
-            "Rasuwa": [
-                "Kalika Rural Municipality", "Gosaikunda Rural Municipality",
-                "Naukunda Rural Municipality", "Aamachhodingmo Rural Municipality"
-            ],
-            "Sindhuli": [
-                "Kamalamai Municipality", "Dudhauli Municipality",
-                "Golanjor Rural Municipality", "Hariharpurgadhi Rural Municipality",
-                "Marin Rural Municipality", "Phikkal Rural Municipality",
-                "Sunkoshi Rural Municipality", "Tinpatan Rural Municipality"
-            ],
-            "Sindhupalchok": [
-                "Chautara Sangachowkgadi Municipality", "Bahrabise Municipality",
-                "Melamchi Municipality", "Balefi Rural Municipality",
-                "Bhotekoshi Rural Municipality", "Helambu Rural Municipality",
-                "Indrawati Rural Municipality", "Jugal Rural Municipality",
-                "Lisankhupakhar Rural Municipality", "Panchpokhari Thangpal Rural Municipality",
-                "Sunkoshi Rural Municipality", "Tripurasundari Rural Municipality"
-            ],
-            # Gandaki Province (Province 4)
-            "Baglung": [
-                "Baglung Municipality", "Jaimini Municipality",
-                "Bareng Rural Municipality", "Dhorpatan Rural Municipality",
-                "Galkot Rural Municipality", "Kanthekhola Rural Municipality",
-                "Nisikhola Rural Municipality", "Tamankhola Rural Municipality"
-            ],
-            "Gorkha": [
-                "Gorkha Municipality", "Palungtar Municipality",
-                "Ajirkot Rural Municipality", "Aarughat Rural Municipality",
-                "Barpak Sulikot Rural Municipality", "Bhimsen Thapa Rural Municipality",
-                "Chumanuwri Rural Municipality", "Dharche Rural Municipality",
-                "Gandaki Rural Municipality", "Shahid Lakhan Rural Municipality",
-                "Siranchowk Rural Municipality", "Tsum Nubri Rural Municipality"
-            ],
-            "Kaski": [
-                "Pokhara Metropolitan City",
-                "Annapurna Rural Municipality", "Machhapuchhre Rural Municipality",
-                "Madi Rural Municipality", "Rupa Rural Municipality"
-            ],
-            "Lamjung": [
-                "Besishahar Municipality", "Madhya Nepal Municipality",
-                "Rainas Municipality", "Sundarbazar Municipality",
-                "Dordi Rural Municipality", "Kwhlosothar Rural Municipality",
-                "Marsyangdi Rural Municipality"
-            ],
-            "Manang": [
-                "Narpa Bhumi Rural Municipality", "Nashong Rural Municipality",
-                "Chame Rural Municipality", "Narpabhumi Rural Municipality",
-                "Manang Disyang Rural Municipality"
-            ],
-            "Mustang": [
-                "Gharpajhong Rural Municipality", "Thasang Rural Municipality",
-                "Lo-Ghekar Damodarkunda Rural Municipality",
-                "Barhagaun Muktichhetra Rural Municipality", "Lomanthang Rural Municipality"
-            ],
-            "Myagdi": [
-                "Beni Municipality", "Annapurna Rural Municipality",
-                "Dhawalagiri Rural Municipality", "Mangala Rural Municipality",
-                "Malika Rural Municipality", "Raghuganga Rural Municipality"
-            ],
-            "Nawalpur (East Nawalparasi)": [
-                "Kawasoti Municipality", "Devchuli Municipality",
-                "Gaindakot Municipality", "Madhyabindu Municipality",
-                "Binayi Tribeni Rural Municipality", "Bulingtar Rural Municipality",
-                "Hupsekot Rural Municipality"
-            ],
-            "Parbat": [
-                "Kushma Municipality", "Jaljala Rural Municipality",
-                "Mahashila Rural Municipality", "Modi Rural Municipality",
-                "Paiyun Rural Municipality", "Phalewas Municipality"
-            ],
-            "Syangja": [
-                "Putalibazar Municipality", "Bhirkot Municipality",
-                "Chapakot Municipality", "Galyang Municipality",
-                "Waling Municipality", "Arjunchaupari Rural Municipality",
-                "Aandhikhola Rural Municipality", "Biruwa Rural Municipality",
-                "Harinas Rural Municipality", "Kaligandaki Rural Municipality"
-            ],
-            "Tanahun": [
-                "Damauli (Byas) Municipality", "Bhimad Municipality",
-                "Bhanu Municipality", "Shuklagandaki Municipality",
-                "Anbukhaireni Rural Municipality", "Bandipur Rural Municipality",
-                "Devghat Rural Municipality", "Myagde Rural Municipality",
-                "Rishing Rural Municipality"
-            ],
-        
-            # Lumbini Province (Province 5)
-            "Arghakhanchi": [
-                "Sandhikharka Municipality", "Sitganga Municipality", 
-                "Bhumikasthan Municipality", "Panini Rural Municipality", 
-                "Chhatradev Rural Municipality", "Malarani Rural Municipality"
-            ],
-            "Banke": [
-                "Nepalgunj Sub-Metropolitan City", "Kohalpur Municipality",
-                "Baijanath Rural Municipality", "Duduwa Rural Municipality",
-                "Janaki Rural Municipality", "Khajura Rural Municipality",
-                "Narainapur Rural Municipality", "Rapti Sonari Rural Municipality"
-            ],
-            "Bardiya": [
-                "Gulariya Municipality", "Madhuwan Municipality",
-                "Rajapur Municipality", "Thakurbaba Municipality",
-                "Bansgadhi Municipality", "Barbardiya Municipality",
-                "Badaiyaatal Rural Municipality", "Geruwa Rural Municipality"
-            ],
-            "Dang": [
-                "Tulsipur Sub-Metropolitan City", "Ghorahi Sub-Metropolitan City",
-                "Lamahi Municipality", "Banglachuli Rural Municipality",
-                "Dangisharan Rural Municipality", "Rajpur Rural Municipality",
-                "Rapti Rural Municipality", "Shantinagar Rural Municipality",
-                "Babai Rural Municipality"
-            ],
-            "Eastern Rukum": [
-                "Bhume Rural Municipality", "Putha Uttarganga Rural Municipality",
-                "Sisne Rural Municipality"
-            ],
-            "Gulmi": [
-                "Resunga Municipality", "Musikot Municipality",
-                "Isma Rural Municipality", "Chandrakot Rural Municipality",
-                "Dhurkot Rural Municipality", "Gulmi Darbar Rural Municipality",
-                "Madane Rural Municipality", "Malika Rural Municipality",
-                "Ruru Rural Municipality", "Satyawati Rural Municipality"
-            ],
-            "Kapilvastu": [
-                "Kapilvastu Municipality", "Maharajgunj Municipality",
-                "Krishnanagar Municipality", "Buddhabhumi Municipality",
-                "Shivaraj Municipality", "Banganga Municipality",
-                "Yashodhara Rural Municipality", "Suddhodhan Rural Municipality"
-            ],
-            "Nawalparasi (Bardaghat Susta West)": [
-                "Bardaghat Municipality", "Ramgram Municipality",
-                "Sunwal Municipality", "Palhinandan Rural Municipality",
-                "Pratappur Rural Municipality", "Sarawal Rural Municipality"
-            ],
-            "Palpa": [
-                "Tansen Municipality", "Rampur Municipality",
-                "Nisdi Rural Municipality", "Rambha Rural Municipality",
-                "Mathagadhi Rural Municipality", "Rainadevi Chhahara Rural Municipality",
-                "Baganaskali Rural Municipality", "Purbakhola Rural Municipality",
-                "Tinau Rural Municipality"
-            ],
-            "Pyuthan": [
-                "Pyuthan Municipality", "Swargadwari Municipality",
-                "Gaumukhi Rural Municipality", "Jhimruk Rural Municipality",
-                "Mallarani Rural Municipality", "Naubahini Rural Municipality",
-                "Sarumarani Rural Municipality", "Mandavi Rural Municipality"
-            ],
-            "Rolpa": [
-                "Rolpa Municipality", "Triveni Rural Municipality",
-                "Runtigadhi Rural Municipality", "Sunil Smriti Rural Municipality",
-                "Sunchhahari Rural Municipality", "Paribartan Rural Municipality",
-                "Lungri Rural Municipality", "Madi Rural Municipality",
-                "Thabang Rural Municipality"
-            ],
-            "Rupandehi": [
-                "Butwal Sub-Metropolitan City", "Siddharthanagar Municipality",
-                "Devdaha Municipality", "Tilottama Municipality",
-                "Lumbini Sanskritik Municipality", "Sainamaina Municipality",
-                "Marchawari Rural Municipality", "Omsatiya Rural Municipality",
-                "Kotahimai Rural Municipality", "Gaidahawa Rural Municipality",
-                "Suddhodhan Rural Municipality", "Mayadevi Rural Municipality"
-            ],
-            
-        # Karnali Province (Province 6)
-            "Dailekh": [
-                "Narayan Municipality", "Dullu Municipality", "Chamunda Bindrasaini Municipality",
-                "Aathabis Municipality", "Bhagawatimai Rural Municipality",
-                "Dungeshwor Rural Municipality", "Gurans Rural Municipality",
-                "Mahabu Rural Municipality", "Naumule Rural Municipality"
-            ],
-            "Dolpa": [
-                "Thuli Bheri Municipality", "Tripurasundari Municipality",
-                "Dolpo Buddha Rural Municipality", "Jagadulla Rural Municipality",
-                "Kaike Rural Municipality", "She Phoksundo Rural Municipality",
-                "Mudkechula Rural Municipality"
-            ],
-            "Humla": [
-                "Simkot Rural Municipality", "Namkha Rural Municipality",
-                "Chankheli Rural Municipality", "Kharpunath Rural Municipality",
-                "Sarkegad Rural Municipality", "Tanjakot Rural Municipality",
-                "Adanchuli Rural Municipality"
-            ],
-            "Jajarkot": [
-                "Bheri Municipality", "Chhedagad Municipality",
-                "Barekot Rural Municipality", "Kuse Rural Municipality",
-                "Junichande Rural Municipality", "Shivalaya Rural Municipality"
-            ],
-            "Jumla": [
-                "Chandannath Municipality", "Guthichaur Rural Municipality",
-                "Hima Rural Municipality", "Kankasundari Rural Municipality",
-                "Patarasi Rural Municipality", "Sinja Rural Municipality",
-                "Tatopani Rural Municipality", "Tila Rural Municipality"
-            ],
-            "Kalikot": [
-                "Raskot Municipality", "Tilagufa Municipality",
-                "Narharinath Rural Municipality", "Pachaljharana Rural Municipality",
-                "Sanni Triveni Rural Municipality", "Shubha Kalika Rural Municipality",
-                "Palata Rural Municipality", "Mahawai Rural Municipality"
-            ],
-            "Mugu": [
-                "Chhayanath Rara Municipality", "Khatyad Rural Municipality",
-                "Mugum Karmarong Rural Municipality", "Soru Rural Municipality"
-            ],
-            "Salyan": [
-                "Bangad Kupinde Municipality", "Sharada Municipality",
-                "Bagchaur Municipality", "Darma Rural Municipality",
-                "Kalimati Rural Municipality", "Kapurkot Rural Municipality",
-                "Chatreshwori Rural Municipality", "Siddha Kumakh Rural Municipality",
-                "Triveni Rural Municipality"
-            ],
-            "Surkhet": [
-                "Birendranagar Municipality", "Bheriganga Municipality",
-                "Gurbhakot Municipality", "Lekbesi Municipality",
-                "Panchapuri Municipality", "Barahatal Rural Municipality",
-                "Chaukune Rural Municipality", "Simta Rural Municipality"
-            ],
-            
-            # Sudurpashchim Province (Province 7)
-            "Kanchanpur": [
-                "Bhimdatta Municipality", "Bedkot Municipality", "Krishnapur Municipality",
-                "Shuklaphanta Municipality", "Belauri Municipality", "Punarbas Municipality",
-                "Mahakali Municipality", "Laljhadi Rural Municipality"
-            ],
-            "Kailali": [
-                "Dhangadhi Sub-Metropolitan City", "Tikapur Municipality", "Lamkichuha Municipality",
-                "Ghodaghodi Municipality", "Bhajani Municipality", "Gauriganga Municipality",
-                "Gokuleshwar Municipality", "Joshipur Rural Municipality", "Janaki Rural Municipality",
-                "Bardagoriya Rural Municipality", "Mohanyal Rural Municipality", "Chure Rural Municipality"
-            ],
-            "Doti": [
-                "Dipayal Silgadhi Municipality", "Shikhar Municipality",
-                "Purbichauki Rural Municipality", "Aadarsha Rural Municipality",
-                "K I Singh Rural Municipality", "Jorayal Rural Municipality",
-                "Sayal Rural Municipality", "Badikedar Rural Municipality"
-            ],
-            "Achham": [
-                "Mangalsen Municipality", "Sanphebagar Municipality",
-                "Kamalbazar Municipality", "Panchdeval Binayak Municipality",
-                "Chaurpati Rural Municipality", "Dhakari Rural Municipality",
-                "Bannigadhi Jayagad Rural Municipality", "Mellekh Rural Municipality",
-                "Ramaroshan Rural Municipality", "Turmakhand Rural Municipality"
-            ],
-            "Bajhang": [
-                "Jaya Prithvi Municipality", "Bungal Municipality", "Talkot Rural Municipality",
-                "Kedarsyu Rural Municipality", "Surma Rural Municipality", "Chhabis Pathivera Rural Municipality",
-                "Durgathali Rural Municipality", "Khaptad Chhanna Rural Municipality", "Masta Rural Municipality",
-                "Thalara Rural Municipality", "Bitthadchir Rural Municipality"
-            ],
-            "Bajura": [
-                "Budhinanda Municipality", "Triveni Municipality", "Badimalika Municipality",
-                "Himali Rural Municipality", "Gaumul Rural Municipality", "Swami Kartik Rural Municipality",
-                "Chhededaha Rural Municipality", "Jagannath Rural Municipality"
-            ],
-            "Dadeldhura": [
-                "Amargadhi Municipality", "Aalital Rural Municipality",
-                "Bhageshwar Rural Municipality", "Navadurga Rural Municipality",
-                "Ganyapadhura Rural Municipality", "Ajayameru Rural Municipality",
-                "Parashuram Municipality"
-            ],
-            "Baitadi": [
-                "Dasharathchand Municipality", "Patan Municipality",
-                "Melauli Municipality", "Purchaudi Municipality",
-                "Dilasaini Rural Municipality", "Dogadakedar Rural Municipality",
-                "Pancheshwar Rural Municipality", "Sigas Rural Municipality",
-                "Shivanath Rural Municipality"
-            ],
-            "Darchula": [
-                "Mahakali Municipality", "Shailyashikhar Municipality",
-                "Byas Rural Municipality", "Apihimal Rural Municipality",
-                "Naugad Rural Municipality", "Duhun Rural Municipality",
-                "Malikaarjun Rural Municipality", "Marma Rural Municipality"
-            ]
-    }
-        
         # Return the relevant municipalities based on district selection
-        return district_municipality_data.get(district, [])
+        return list(get_geography_index().municipalities(district))
 
 
 class UserProfile(models.Model):
@@ -929,6 +418,14 @@ class Designation(models.Model):
         return self.name
 
 
+APPROVAL_STATUS_CHOICES = [
+    ('approved', 'Approved'),
+    ('rejected', 'Rejected'),
+    ('transferred', 'Transferred'),
+    ('pending', 'Pending'),
+]
+
+
 class Tippani(models.Model):
     office = models.ForeignKey(Office, on_delete=models.CASCADE, related_name='tippanis')
     present_file = models.FileField(null=True, blank=True)
@@ -939,6 +436,19 @@ class Tippani(models.Model):
     total_page = models.IntegerField()
     approved_by = models.CharField(max_length=200, null=True, blank=True)
     approve_date = models.DateField(null=True, blank=True)
+    # Denormalized from the latest Approval, kept in sync by signals.py
+    current_status = models.CharField(max_length=100, choices=APPROVAL_STATUS_CHOICES, null=True, blank=True)
+    current_holder = models.ForeignKey(Designation, on_delete=models.SET_NULL, related_name='held_tippanis', null=True,
+                                       blank=True)
+    # Also bumped when its letters, files or approvals change (see signals.py)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['present_date', 'id']),
+            # Serves the approval inbox: holder + status, in list order
+            models.Index(fields=['current_holder', 'current_status', 'present_date', 'id']),
+        ]
 
     def __str__(self):
         return f"Tippani: {self.present_subject}"
@@ -954,38 +464,76 @@ class LettersAndDocuments(models.Model):
     office = models.CharField(max_length=300)
     page_no = models.IntegerField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['tippani', 'id']),
+        ]
+
     def __str__(self):
         return f"Document: {self.subject} (Reg No: {self.registration_no})"
 
 
+class FileNumberSequence(models.Model):
+    """
+    Counter used to reserve blocks of file numbers on databases without sequences.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    last_value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.last_value}"
+
+
+class MediaBlob(models.Model):
+    """
+    A deduplicated upload stored by ContentAddressedStorage.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    digest = models.CharField(max_length=64, db_index=True)
+    size = models.BigIntegerField()
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
+class FileQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        unnumbered = [obj for obj in objs if not obj.file_number]
+        if unnumbered:
+            # One reservation for the whole batch instead of one per row
+            for obj, file_number in zip(unnumbered, file_number_allocator.allocate_many(len(unnumbered))):
+                obj.file_number = file_number
+        return super().bulk_create(objs, *args, **kwargs)
+
+
 class File(models.Model):
     
     letter_document = models.ForeignKey(LettersAndDocuments, on_delete=models.CASCADE, related_name='files', null=True)
     file = models.FileField(upload_to='supporting_files/', null=True)    
     file_number = models.CharField(max_length=50, unique=True, blank=True, editable=False)
 
+    objects = FileQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['letter_document', 'id']),
+        ]
+
     def __str__(self):
         return self.file_number
 
     def save(self, *args, **kwargs):
         if not self.file_number:
             # Generate a unique file number with "G.U." as a prefix
-            while True:
-                random_number = random.randint(10000, 99999)  # Generate a 5-digit random number
-                file_number = f"G.U.{random_number}"
-                if not File.objects.filter(file_number=file_number).exists():
-                    self.file_number = file_number
-                    break
+            self.file_number = file_number_allocator.allocate()
         super().save(*args, **kwargs)
 
 
 class Approval(models.Model):
-    STATUS_CHOICES = [
-        ('approved', 'Approved'),
-        ('rejected', 'Rejected'),
-        ('transferred', 'Transferred'),
-        ('pending', 'Pending'),
-    ]
+    STATUS_CHOICES = APPROVAL_STATUS_CHOICES
 
     tippani = models.ForeignKey(Tippani, on_delete=models.CASCADE, related_name='approvals')
     submitted_by = models.ForeignKey(Designation, on_delete=models.CASCADE, related_name='submitted_tippanis')
@@ -995,5 +543,50 @@ class Approval(models.Model):
     remarks = models.TextField(null=True, blank=True)
     approved_date = models.DateField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['tippani', 'id']),
+        ]
+
     def __str__(self):
         return self.tippani
+
+    def save(self, *args, **kwargs):
+        # The post_save handler updates the Tippani's current status in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class UploadSession(models.Model):
+    """
+    A resumable upload that becomes a File or a Tippani's present_file once complete.
+    """
+    TARGET_CHOICES = [
+        ('file', 'File'),
+        ('tippani', 'Tippani'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='upload_sessions', null=True, blank=True)
+    target = models.CharField(max_length=20, choices=TARGET_CHOICES)
+    letter_document = models.ForeignKey(LettersAndDocuments, on_delete=models.CASCADE, related_name='upload_sessions',
+                                        null=True, blank=True)
+    tippani = models.ForeignKey(Tippani, on_delete=models.CASCADE, related_name='upload_sessions', null=True, blank=True)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    checksum = models.CharField(max_length=64, help_text=_('SHA-256 of the complete file, hex encoded'))
+    # Sorted, disjoint [start, end) byte ranges already written to disk
+    received_ranges = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Upload {self.pk}: {self.filename}"
+
+    @property
+    def received_bytes(self):
+        return sum(end - start for start, end in self.received_ranges)
+
+    @property
+    def is_complete(self):
+        return self.received_ranges == [[0, self.size]]
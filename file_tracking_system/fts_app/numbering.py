@@ -0,0 +1,92 @@
+import os
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+
+FILE_NUMBER_PREFIX = getattr(settings, 'FILE_NUMBER_PREFIX', 'G.U.')
+FILE_NUMBER_WIDTH = getattr(settings, 'FILE_NUMBER_WIDTH', 7)
+FILE_NUMBER_BLOCK_SIZE = getattr(settings, 'FILE_NUMBER_BLOCK_SIZE', 50)
+
+
+class FileNumberAllocator:
+    """
+    Hands out file numbers from blocks reserved per worker process.
+
+    On PostgreSQL the block is drawn from a database sequence in a single
+    round trip; sequences are never rolled back, so two workers can never be
+    handed the same number. Other backends fall back to a locked counter row
+    in `FileNumberSequence`.
+    """
+
+    def __init__(self, name='file_number', prefix=FILE_NUMBER_PREFIX,
+                 width=FILE_NUMBER_WIDTH, block_size=FILE_NUMBER_BLOCK_SIZE):
+        self.name = name
+        self.prefix = prefix
+        self.width = width
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._pid = None
+        self._pool = []
+
+    @property
+    def sequence_name(self):
+        return f"fts_app_{self.name}_seq"
+
+    def format(self, value):
+        return f"{self.prefix}{value:0{self.width}d}"
+
+    def allocate(self):
+        return self.allocate_many(1)[0]
+
+    def allocate_many(self, count):
+        """
+        Return `count` unused, formatted file numbers.
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                # Numbers reserved before a fork belong to the parent process.
+                self._pid = os.getpid()
+                self._pool = []
+            if len(self._pool) < count:
+                self._pool.extend(self._reserve(count - len(self._pool)))
+            values, self._pool = self._pool[:count], self._pool[count:]
+        return [self.format(value) for value in values]
+
+    def _reserve(self, needed):
+        if connection.vendor == 'postgresql':
+            return self._reserve_from_sequence(max(needed, self.block_size))
+        if connection.in_atomic_block:
+            # The counter update would be rolled back together with the
+            # caller's transaction, so never keep spare numbers from it.
+            return self._reserve_from_counter(needed)
+        return self._reserve_from_counter(max(needed, self.block_size))
+
+    def _reserve_from_sequence(self, size):
+        with connection.cursor() as cursor:
+            cursor.execute(f"CREATE SEQUENCE IF NOT EXISTS {self.sequence_name}")
+            cursor.execute(
+                f"SELECT nextval('{self.sequence_name}') FROM generate_series(1, %s)",
+                [size],
+            )
+            return sorted(row[0] for row in cursor.fetchall())
+
+    def _reserve_from_counter(self, size):
+        from .models import FileNumberSequence
+
+        sequences = FileNumberSequence.objects.filter(name=self.name)
+        with transaction.atomic():
+            # Writing first takes the row (or table) lock up front instead of
+            # upgrading a read lock, which deadlocks concurrent writers.
+            if not sequences.update(last_value=F('last_value') + size):
+                try:
+                    with transaction.atomic():
+                        FileNumberSequence.objects.create(name=self.name, last_value=size)
+                except IntegrityError:
+                    sequences.update(last_value=F('last_value') + size)
+            last_value = sequences.values_list('last_value', flat=True).get()
+        return list(range(last_value - size + 1, last_value + 1))
+
+file_number_allocator = FileNumberAllocator()
@@ -0,0 +1,200 @@
+import base64
+import json
+from collections import OrderedDict
+from functools import reduce
+from operator import and_, or_
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import replace_query_param
+
+
+def estimate_count(queryset):
+    """
+    Return the planner's row estimate for `queryset`, or None if unavailable.
+
+    Only PostgreSQL exposes estimates; the value comes from table statistics
+    and costs the same on a thousand rows as on ten million.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks on the full ordering tuple, e.g. (present_date, id).
+
+    Each page is a single indexed range scan, so deep pages cost the same as
+    the first one. Views set `ordering` to a tuple of non-null fields that ends
+    with a unique one; cursors are opaque base64 tokens.
+    """
+    page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE') or 50
+    max_page_size = getattr(settings, 'KEYSET_MAX_PAGE_SIZE', 200)
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    ordering = ('id',)
+
+    def paginate_queryset(self, queryset, request, view=None, ordering=None):
+        page_queryset = self.get_page_queryset(queryset, request, view, ordering)
+        rows = self.finish_page(list(page_queryset))
+        self.count_estimate = None
+        if request.query_params.get(self.count_query_param) == 'estimate':
+            self.count_estimate = estimate_count(queryset)
+        return rows
+
+    async def apaginate_queryset(self, queryset, request, view=None, ordering=None):
+        """
+        Async counterpart of paginate_queryset for async views.
+        """
+        page_queryset = self.get_page_queryset(queryset, request, view, ordering)
+        rows = self.finish_page([row async for row in page_queryset])
+        self.count_estimate = None
+        if request.query_params.get(self.count_query_param) == 'estimate':
+            self.count_estimate = await sync_to_async(estimate_count)(queryset)
+        return rows
+
+    def get_page_queryset(self, queryset, request, view=None, ordering=None):
+        """
+        Return the unevaluated queryset for the requested page plus one look-ahead row.
+        """
+        self.request = request
+        self.ordering = tuple(ordering or getattr(view, 'ordering', None) or self.ordering)
+        self.page_size = self.get_page_size(request)
+        self.position, self.reverse = self.decode_cursor(request)
+        if self.position is not None:
+            self.position = self._clean_position(queryset.model, self.position)
+
+        order_by = [self._reverse(field) for field in self.ordering] if self.reverse else list(self.ordering)
+        page_queryset = queryset.order_by(*order_by)
+        if self.position is not None:
+            page_queryset = page_queryset.filter(self._seek(order_by, self.position))
+        return page_queryset[:self.page_size + 1]
+
+    def finish_page(self, rows):
+        """
+        Trim the look-ahead row and work out the next and previous positions.
+        """
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+
+        self.next_position = self.previous_position = None
+        if rows and (has_more if not self.reverse else self.position is not None):
+            self.next_position = self._position(rows[-1])
+        if rows and (has_more if self.reverse else self.position is not None):
+            self.previous_position = self._position(rows[0])
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        response = OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+        ])
+        if self.count_estimate is not None:
+            response['count_estimate'] = self.count_estimate
+        response['results'] = data
+        return response
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def encode_cursor(self, position, reverse):
+        token = json.dumps({'p': position, 'r': int(reverse)}, cls=JSONEncoder, separators=(',', ':'))
+        cursor = base64.urlsafe_b64encode(token.encode()).decode().rstrip('=')
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            token = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            position, reverse = token['p'], bool(token['r'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound('Invalid cursor')
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound('Invalid cursor')
+        return position, reverse
+
+    def _clean_position(self, model, position):
+        """
+        Convert a decoded position to the ordering fields' Python types.
+        """
+        try:
+            values = [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (FieldDoesNotExist, ValidationError, TypeError, ValueError):
+            raise NotFound('Invalid cursor')
+        if None in values:
+            raise NotFound('Invalid cursor')
+        return values
+
+    def _position(self, row):
+        return [getattr(row, field.lstrip('-')) for field in self.ordering]
+
+    @staticmethod
+    def _reverse(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def _seek(order_by, position):
+        """
+        Build `(a, b, c) > (x, y, z)` for the given ordering as a Q object.
+
+        The comparison is spelled out as `a > x OR (a = x AND b > y) OR ...`,
+        which also works for mixed directions; the extra `a >= x` gives the
+        planner a range to scan on the leading index column.
+        """
+        first = order_by[0]
+        bound = Q(**{f"{first.lstrip('-')}__{'lte' if first.startswith('-') else 'gte'}": position[0]})
+        clauses = []
+        for index, field in enumerate(order_by):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            equal = [Q(**{order_by[i].lstrip('-'): position[i]}) for i in range(index)]
+            clauses.append(reduce(and_, equal + [Q(**{f'{name}__{lookup}': position[index]})]))
+        return bound & reduce(or_, clauses)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {'name': self.cursor_query_param, 'required': False, 'in': 'query', 'schema': {'type': 'string'}},
+            {'name': self.page_size_query_param, 'required': False, 'in': 'query', 'schema': {'type': 'integer'}},
+            {'name': self.count_query_param, 'required': False, 'in': 'query', 'schema': {'type': 'string', 'enum': ['estimate']}},
+        ]
@@ -0,0 +1,75 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .instrumentation import timed
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+# Anything orjson or msgpack cannot encode natively is converted the way DRF's encoder does it
+_encoder = JSONEncoder()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer backed by orjson, producing the same output as DRF's.
+
+    Datetimes, Decimals, timedeltas and lazy strings are handed to DRF's
+    encoder so their representation does not change. Falls back to the
+    standard library when orjson is not installed or an indented or
+    ASCII-only response is requested.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed('render_time'):
+            return self._render(data, accepted_media_type, renderer_context)
+
+    def _render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(
+            data,
+            default=_encoder.default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+        # Same as DRF: keep the output a strict JavaScript subset
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+def _msgpack_default(obj):
+    value = _encoder.default(obj)
+    # DRF's encoder may return containers that msgpack still has to walk
+    return list(value) if isinstance(value, tuple) else value
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renders MessagePack for clients that send `Accept: application/msgpack`.
+
+    Needs the optional msgpack package; settings only enable it when installed.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        with timed('render_time'):
+            return msgpack.packb(data, default=_msgpack_default, use_bin_type=True)
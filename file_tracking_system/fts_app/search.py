@@ -0,0 +1,114 @@
+import logging
+import re
+
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, router
+
+from .models import LettersAndDocuments, Tippani
+
+logger = logging.getLogger(__name__)
+
+# Searchable columns per target with their PostgreSQL weight
+SEARCH_TARGETS = {
+    'tippani': (Tippani, [('present_subject', 'A'), ('present_by', 'B')]),
+    'letter': (LettersAndDocuments, [('subject', 'A'), ('registration_no', 'A'), ('invoice_no', 'A'), ('office', 'B')]),
+}
+BM25_WEIGHTS = {'A': 10.0, 'B': 4.0}
+MAX_QUERY_TERMS = 8
+
+TERM_SPLIT_RE = re.compile(r'''[\s'"():*&|!<>\-^+,.;\\]+''')
+
+
+def query_terms(query):
+    return [term for term in TERM_SPLIT_RE.split(query) if term][:MAX_QUERY_TERMS]
+
+
+def ensure_search_schema(using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Create the full-text index for every target if it does not exist yet.
+
+    PostgreSQL gets a generated tsvector column with a GIN index, so the
+    vector is maintained by the database on every write. SQLite gets an
+    external-content FTS5 table kept in sync by triggers.
+    """
+    database = connections[using]
+    try:
+        with database.cursor() as cursor:
+            for model, columns in SEARCH_TARGETS.values():
+                if database.vendor == 'postgresql':
+                    _ensure_postgres(cursor, model._meta.db_table, columns)
+                elif database.vendor == 'sqlite':
+                    _ensure_sqlite(cursor, model._meta.db_table, columns)
+    except DatabaseError:
+        logger.exception("Could not create the full-text search index")
+
+
+def _ensure_postgres(cursor, table, columns):
+    vector = ' || '.join(
+        f"setweight(to_tsvector('simple', coalesce({column}, '')), '{weight}')" for column, weight in columns
+    )
+    cursor.execute(
+        f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({vector}) STORED"
+    )
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS {table}_search_idx ON {table} USING GIN (search_vector)")
+
+
+def _ensure_sqlite(cursor, table, columns):
+    fts_table = f"{table}_fts"
+    names = [column for column, _ in columns]
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [fts_table])
+    if cursor.fetchone():
+        return
+    column_list = ', '.join(names)
+    new_values = ', '.join(f"new.{column}" for column in names)
+    old_values = ', '.join(f"old.{column}" for column in names)
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE {fts_table} USING fts5({column_list}, content='{table}', content_rowid='id')"
+    )
+    cursor.execute(
+        f"CREATE TRIGGER {fts_table}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+    )
+    cursor.execute(
+        f"CREATE TRIGGER {fts_table}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); END"
+    )
+    cursor.execute(
+        f"CREATE TRIGGER {fts_table}_au AFTER UPDATE ON {table} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+    )
+    cursor.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+
+
+def search(target, query, limit, offset=0):
+    """
+    Return [(id, rank), ...] for `target` rows matching every term of `query`,
+    best match first. Each term also matches as a prefix.
+    """
+    model, columns = SEARCH_TARGETS[target]
+    terms = query_terms(query)
+    if not terms:
+        return []
+    table = model._meta.db_table
+    connection = connections[router.db_for_read(model)]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            tsquery = ' & '.join(f"'{term}':*" for term in terms)
+            cursor.execute(
+                f"SELECT id, ts_rank_cd(search_vector, query) AS rank "
+                f"FROM {table}, to_tsquery('simple', %s) query "
+                f"WHERE search_vector @@ query ORDER BY rank DESC, id LIMIT %s OFFSET %s",
+                [tsquery, limit, offset],
+            )
+        else:
+            fts_table = f"{table}_fts"
+            weights = ', '.join(str(BM25_WEIGHTS[weight]) for _, weight in columns)
+            match = ' '.join(f'"{term}"*' for term in terms)
+            # bm25() is lower for better matches; negate it so callers always sort descending
+            cursor.execute(
+                f"SELECT rowid, -bm25({fts_table}, {weights}) AS rank FROM {fts_table} "
+                f"WHERE {fts_table} MATCH %s ORDER BY rank DESC, rowid LIMIT %s OFFSET %s",
+                [match, limit, offset],
+            )
+        return cursor.fetchall()
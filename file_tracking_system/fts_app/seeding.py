@@ -0,0 +1,469 @@
+import hashlib
+import io
+import multiprocessing
+import random
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, router, transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from .geography import get_geography_index
+from .models import (
+    APPROVAL_STATUS_CHOICES, Approval, CustomUser, Designation, File, LettersAndDocuments, MediaBlob, Office, Tippani,
+)
+from .numbering import file_number_allocator
+from .storage import ContentAddressedStorage
+
+
+# Every generated row carries this marker so seeding can be resumed and told apart from real data
+SEED_MARKER = 'fts-seed'
+SEED_PASSWORD = 'fts-seed-password'
+SEED_BATCH_SIZE = 5000
+# Distinct placeholder blobs shared by all seeded Files
+PLACEHOLDER_FILES = 16
+# Upper bounds per Tippani (and per letter for files); each batch reserves primary keys for the maximum
+MAX_APPROVALS = 3
+MAX_LETTERS = 3
+MAX_FILES = 2
+# Generated dates are relative to this day, not today, so every run produces the same rows
+SEED_REFERENCE_DATE = date(2025, 1, 1)
+# Field types whose Python values need the backend's conversion before insertion
+ADAPTED_FIELD_TYPES = {'DateField', 'DateTimeField', 'DurationField', 'DecimalField', 'JSONField', 'TimeField',
+                       'UUIDField'}
+
+FIRST_NAMES = (
+    'Aarati Anil Bikash Binita Chandra Deepa Dipak Gita Hari Ishwor Janaki Kamala Krishna Laxmi Manish Nabin '
+    'Niruta Prakash Pramila Rajesh Ramesh Sabina Sanjay Sarita Shyam Sita Sunil Sushma Umesh Yamuna'
+).split()
+LAST_NAMES = (
+    'Adhikari Bhandari Basnet Chaudhary Dahal Gurung Karki Khadka Koirala Magar Maharjan Neupane Pandey Poudel '
+    'Rai Regmi Shah Sharma Shrestha Subedi Tamang Thapa Yadav'
+).split()
+SUBJECT_WORDS = (
+    'budget approval road construction maintenance staff leave transfer promotion audit circular ministry '
+    'finance education health drinking water irrigation bridge school hospital land survey tender contract '
+    'payment salary pension allowance training vehicle fuel repair building district municipality ward '
+    'committee meeting report inspection monitoring program plan annual quarterly fiscal revenue grant'
+).split()
+POSITIONS = ('Officer', 'Section Officer', 'Under Secretary', 'Joint Secretary', 'Assistant', 'Accountant', 'Engineer')
+APPROVAL_STATUSES = [value for value, _ in APPROVAL_STATUS_CHOICES]
+POSITION_CATEGORIES = Office.PositionCategory.values
+EMPLOYEE_TYPES = CustomUser.EmployeeType.values
+BANKS = CustomUser.Bank.values
+
+
+@lru_cache(maxsize=None)
+def geography_triples():
+    """
+    Every valid (province, district, municipality) combination in the geography data.
+    """
+    geography = get_geography_index()
+    return tuple(
+        (province, district, municipality)
+        for province in geography.provinces
+        for district in geography.districts(province)
+        for municipality in geography.municipalities(district)
+    )
+
+
+def batch_rng(seed, kind, start):
+    """
+    The random generator for the batch of `kind` rows starting at index `start`.
+
+    Each batch has its own generator so a resumed or partial run produces
+    exactly the rows a single full run would have.
+    """
+    return random.Random(f'{seed}:{kind}:{start}')
+
+
+def reserve_pks(model, count):
+    """
+    Return the first of `count` consecutive primary keys no other insert will be given.
+
+    The block is taken from the table's id sequence (PostgreSQL) or its
+    sqlite_sequence row (SQLite) while the table is locked, so concurrent
+    writers, which draw ids from the same sequence, skip it. Other backends
+    fall back to the highest existing id.
+    """
+    connection = connections[router.db_for_write(model)]
+    table = connection.ops.quote_name(model._meta.db_table)
+    column = connection.ops.quote_name(model._meta.pk.column)
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # Blocks inserts, and with them nextval() through the column default, until the sequence has moved
+            cursor.execute(f'LOCK TABLE {table} IN EXCLUSIVE MODE')
+            cursor.execute('SELECT pg_get_serial_sequence(%s, %s)', [table, model._meta.pk.column])
+            sequence = cursor.fetchone()[0]
+            cursor.execute(
+                f'SELECT GREATEST(nextval(%s), (SELECT COALESCE(MAX({column}), 0) + 1 FROM {table}))', [sequence]
+            )
+            first = cursor.fetchone()[0]
+            cursor.execute('SELECT setval(%s, %s)', [sequence, first + count - 1])
+        elif connection.vendor == 'sqlite':
+            # The first write takes the database lock; AUTOINCREMENT never hands out ids up to sqlite_sequence
+            cursor.execute('UPDATE sqlite_sequence SET seq = seq WHERE name = %s', [model._meta.db_table])
+            cursor.execute(
+                f'SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = %s), 0), '
+                f'COALESCE((SELECT MAX({column}) FROM {table}), 0)) + 1', [model._meta.db_table]
+            )
+            first = cursor.fetchone()[0]
+            cursor.execute('DELETE FROM sqlite_sequence WHERE name = %s', [model._meta.db_table])
+            cursor.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)',
+                           [model._meta.db_table, first + count - 1])
+        else:
+            first = (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+    return first
+
+
+def bulk_insert(model, rows):
+    """
+    Insert `rows` (dicts of attname -> value, primary key included) into `model`'s table.
+
+    Skips what makes bulk_create cost ~150us per row: model instances and
+    per-value SQL compilation. PostgreSQL gets a COPY, other backends one
+    executemany(). Columns missing from a row get the field's default
+    (`now` for auto_now fields). No signals are sent and no save() runs.
+    """
+    if not rows:
+        return
+    connection = connections[router.db_for_write(model)]
+    now = timezone.now()
+    columns = []
+    for field in model._meta.concrete_fields:
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+            default = now
+        elif field.has_default():
+            default = field.get_default()
+        else:
+            default = None if field.null else field.get_default()
+        adapt = None
+        if field.get_internal_type() in ADAPTED_FIELD_TYPES:
+            adapt = (lambda field: lambda value: field.get_db_prep_save(value, connection))(field)
+        columns.append((field.attname, field.column, default, adapt))
+
+    values = []
+    for row in rows:
+        record = []
+        for attname, _, default, adapt in columns:
+            value = row.get(attname, default)
+            record.append(adapt(value) if adapt is not None and value is not None else value)
+        values.append(record)
+    table = connection.ops.quote_name(model._meta.db_table)
+    names = ', '.join(connection.ops.quote_name(column) for _, column, _, _ in columns)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            _copy_rows(cursor.cursor, f'COPY {table} ({names}) FROM STDIN', values)
+        else:
+            placeholders = ', '.join(['%s'] * len(columns))
+            cursor.executemany(f'INSERT INTO {table} ({names}) VALUES ({placeholders})', values)
+
+
+def _copy_rows(cursor, sql, values):
+    if hasattr(cursor, 'copy'):
+        # psycopg 3
+        with cursor.copy(sql) as copy:
+            for row in values:
+                copy.write_row(row)
+        return
+    # psycopg2: COPY text format
+    buffer = io.StringIO()
+    for row in values:
+        buffer.write('\t'.join(_copy_text(value) for value in row))
+        buffer.write('\n')
+    buffer.seek(0)
+    cursor.copy_expert(sql, buffer)
+
+
+def _copy_text(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, timedelta):
+        return f'{value // timedelta(microseconds=1)} microseconds'
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def build_user(rng, pk, index, office_id, password):
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    triples = geography_triples()
+    perm = rng.choice(triples)
+    temp = perm if rng.random() < 0.7 else rng.choice(triples)
+    return {
+        'id': pk,
+        'username': f'{SEED_MARKER}-{index:08d}',
+        'password': password,
+        'first_name': first,
+        'last_name': last,
+        'email': f'{first}.{last}.{index}@example.com'.lower(),
+        'perm_state': perm[0], 'perm_district': perm[1], 'perm_municipality': perm[2],
+        'perm_ward_no': str(rng.randint(1, 32)),
+        'temp_state': temp[0], 'temp_district': temp[1], 'temp_municipality': temp[2],
+        'temp_ward_no': str(rng.randint(1, 32)),
+        'citizenship_id': f'{SEED_MARKER}-C{index:08d}',
+        'citizenship_district': perm[1],
+        'citizenship_date_of_issue': date(1990, 1, 1) + timedelta(days=rng.randint(0, 12000)),
+        'father_name': f'{rng.choice(FIRST_NAMES)} {last}',
+        'mother_name': f'{rng.choice(FIRST_NAMES)} {last}',
+        'grand_father_name': f'{rng.choice(FIRST_NAMES)} {last}',
+        'home_number': f'01-{rng.randint(4000000, 4999999)}',
+        'phone_number': f'01-{rng.randint(4000000, 4999999)}',
+        'mobile_number': f'98{rng.randint(10000000, 99999999)}',
+        'position': rng.choice(POSITIONS),
+        'position_category': rng.choice(POSITION_CATEGORIES),
+        'employee_id': f'{SEED_MARKER}-E{index:08d}',
+        'employee_type': rng.choice(EMPLOYEE_TYPES),
+        'na_la_kos_no': str(rng.randint(100000, 999999)),
+        'accumulation_fund_no': str(rng.randint(100000, 999999)),
+        'bank_account_no': str(rng.randint(10 ** 11, 10 ** 12 - 1)),
+        'bank_name': rng.choice(BANKS),
+        'office_id': office_id,
+    }
+
+
+def build_user_batch(spec):
+    """
+    The user rows for one batch. Runs in pool workers, so it never touches the database.
+    """
+    seed, start, end, first_pk, offices, password = spec
+    rng = batch_rng(seed, 'users', start)
+    return [build_user(rng, first_pk + i - start, i, offices.get(i), password) for i in range(start, end)]
+
+
+def build_tippani_batch(spec):
+    """
+    (tippanis, approvals, letters, files) rows for one batch of Tippanis; never touches the database.
+
+    Primary keys come from fixed-size blocks per Tippani (MAX_APPROVALS,
+    MAX_LETTERS, MAX_FILES), so every batch can be built independently.
+    Unused keys are simply skipped.
+    """
+    seed, start, end, offset, bases, office_ids, designation_ids, placeholders = spec
+    rng = batch_rng(seed, 'tippanis', start)
+    triples = geography_triples()
+    tippanis, approvals, letters, files = [], [], [], []
+    for position in range(offset, offset + end - start):
+        tippani_pk = bases['tippani'] + position
+        present_date = SEED_REFERENCE_DATE - timedelta(days=rng.randint(0, 5 * 365))
+
+        holder = rng.choice(designation_ids)
+        for step in range(rng.randint(1, MAX_APPROVALS)):
+            approver = rng.choice(designation_ids)
+            status = rng.choice(APPROVAL_STATUSES)
+            approvals.append({
+                'id': bases['approval'] + position * MAX_APPROVALS + step,
+                'tippani_id': tippani_pk,
+                'submitted_by_id': holder,
+                'approved_by_id': None if status == 'pending' else approver,
+                'status': status,
+                'remarks': rng.choice(('', 'Please review.', 'Forwarded for approval.', 'Documents incomplete.')),
+                'approved_date': None if status == 'pending' else present_date + timedelta(days=step + 1),
+            })
+            holder = approver
+        latest = approvals[-1]
+        tippanis.append({
+            'id': tippani_pk,
+            'office_id': rng.choice(office_ids),
+            'present_subject': ' '.join(rng.sample(SUBJECT_WORDS, rng.randint(3, 8))).capitalize(),
+            'present_by': SEED_MARKER,
+            'present_date': present_date,
+            'page_no': rng.randint(1, 20),
+            'total_page': rng.randint(20, 200),
+            'current_status': latest['status'],
+            'current_holder_id': latest['approved_by_id'] or latest['submitted_by_id'],
+        })
+
+        if not placeholders:
+            continue
+        for number in range(rng.choice((0, 1, 1, 2, MAX_LETTERS))):
+            letter_slot = position * MAX_LETTERS + number
+            letter_date = present_date - timedelta(days=rng.randint(0, 60))
+            letters.append({
+                'id': bases['letter'] + letter_slot,
+                'tippani_id': tippani_pk,
+                'registration_no': f'{rng.randint(1, 9999)}/{letter_date.year}',
+                'invoice_no': str(rng.randint(1, 99999)),
+                'date': present_date,
+                'subject': ' '.join(rng.sample(SUBJECT_WORDS, rng.randint(4, 12))).capitalize(),
+                'letter_date': letter_date,
+                'office': f'{rng.choice(triples)[2]} office',
+                'page_no': rng.randint(1, 30),
+            })
+            for file_number in range(rng.choice((0, 1, 1, MAX_FILES))):
+                files.append({
+                    'id': bases['file'] + letter_slot * MAX_FILES + file_number,
+                    'letter_document_id': letters[-1]['id'],
+                    'file': rng.choice(placeholders),
+                })
+    return tippanis, approvals, letters, files
+
+
+class Seeder:
+    """
+    Fills the schema with deterministic synthetic rows.
+
+    `seed()` tops each model up to the requested count, so it can be run
+    again with a larger scale to extend an existing data set. Generated
+    users share one password, SEED_PASSWORD, hashed once.
+
+    Rows are generated per batch from the batch's own random generator,
+    optionally in `workers` forked processes, and written by this process
+    with bulk_insert() and explicit primary keys reserved up front with
+    reserve_pks(), so other writers can keep inserting meanwhile.
+    """
+
+    def __init__(self, seed=0, batch_size=SEED_BATCH_SIZE, log=None, workers=1):
+        self.seed_value = seed
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.workers = workers
+
+    def seed(self, users=0, tippanis=0, offices=None, designations=None, letters=True):
+        """
+        Make sure at least the given numbers of seeded rows exist.
+        """
+        self.seed_designations(designations if designations is not None else max(10, min(500, tippanis // 100)))
+        self.seed_offices(offices if offices is not None else max(10, min(users, tippanis) // 10))
+        self.seed_users(users)
+        self.seed_tippanis(tippanis, letters)
+
+    def _ranges(self, kind, queryset, target):
+        existing = queryset.count()
+        if existing >= target:
+            return []
+        self.log(f"{kind}: {existing} -> {target}")
+        return [(start, min(start + self.batch_size, target)) for start in range(existing, target, self.batch_size)]
+
+    @contextmanager
+    def _mapper(self):
+        """
+        Yield an ordered map() that spreads the calls over `workers` processes.
+        """
+        if self.workers <= 1:
+            yield map
+            return
+        # Forked workers must not inherit open database connections
+        connections.close_all()
+        with multiprocessing.get_context('fork').Pool(self.workers) as pool:
+            yield pool.imap
+
+    def seed_designations(self, count):
+        for start, end in self._ranges('designations', self.designations(), count):
+            Designation.objects.bulk_create([
+                Designation(name=f'{SEED_MARKER} designation {i:05d}') for i in range(start, end)
+            ])
+
+    def seed_offices(self, count):
+        for start, end in self._ranges('offices', self.offices(), count):
+            rng = batch_rng(self.seed_value, 'offices', start)
+            Office.objects.bulk_create([
+                Office(
+                    office_name=f'{SEED_MARKER} office {i:06d}',
+                    duration=timedelta(days=rng.randint(30, 5 * 365)),
+                    position=rng.choice(POSITIONS),
+                    position_category=rng.choice(POSITION_CATEGORIES),
+                )
+                for i in range(start, end)
+            ])
+
+    def seed_users(self, count):
+        ranges = self._ranges('users', self.users(), count)
+        if not ranges:
+            return
+        # Users hold an office one-to-one: the first users get the seeded offices in order
+        office_ids = list(self.offices().order_by('id').values_list('id', flat=True))
+        taken = set(CustomUser.objects.filter(office_id__in=office_ids).values_list('office_id', flat=True))
+        password = make_password(SEED_PASSWORD)
+        first_pk = reserve_pks(CustomUser, ranges[-1][1] - ranges[0][0]) - ranges[0][0]
+        specs = [
+            (self.seed_value, start, end, first_pk + start,
+             {i: office_ids[i] for i in range(start, min(end, len(office_ids))) if office_ids[i] not in taken},
+             password)
+            for start, end in ranges
+        ]
+        with self._mapper() as mapper:
+            for rows in mapper(build_user_batch, specs):
+                bulk_insert(CustomUser, rows)
+
+    def seed_tippanis(self, count, letters=True):
+        """
+        Create Tippanis with 1-3 Approvals each, their denormalized status already set.
+
+        With `letters`, each Tippani also gets 0-3 LettersAndDocuments with
+        0-2 Files apiece, pointing at a few shared placeholder blobs.
+        """
+        ranges = self._ranges('tippanis', self.tippanis(), count)
+        if not ranges:
+            return
+        office_ids = list(self.offices().order_by('id').values_list('id', flat=True))
+        designation_ids = list(self.designations().order_by('id').values_list('id', flat=True))
+        placeholders = self.placeholder_files() if letters else []
+        first = ranges[0][0]
+        total = ranges[-1][1] - first
+        bases = {
+            'tippani': reserve_pks(Tippani, total),
+            'approval': reserve_pks(Approval, total * MAX_APPROVALS),
+            'letter': reserve_pks(LettersAndDocuments, total * MAX_LETTERS),
+            'file': reserve_pks(File, total * MAX_LETTERS * MAX_FILES),
+        }
+        specs = [
+            (self.seed_value, start, end, start - first, bases, office_ids, designation_ids, placeholders)
+            for start, end in ranges
+        ]
+        with self._mapper() as mapper:
+            for tippanis, approvals, letter_rows, files in mapper(build_tippani_batch, specs):
+                with transaction.atomic():
+                    bulk_insert(Tippani, tippanis)
+                    bulk_insert(Approval, approvals)
+                    bulk_insert(LettersAndDocuments, letter_rows)
+                    self.insert_files(files)
+
+    def insert_files(self, files):
+        # One number reservation for the whole batch, as FileQuerySet.bulk_create does
+        for file, file_number in zip(files, file_number_allocator.allocate_many(len(files))):
+            file['file_number'] = file_number
+        bulk_insert(File, files)
+        if isinstance(default_storage, ContentAddressedStorage):
+            for name, references in Counter(file['file'] for file in files).items():
+                MediaBlob.objects.filter(name=name).update(refcount=F('refcount') + references)
+
+    def placeholder_files(self):
+        """
+        Store PLACEHOLDER_FILES tiny PDFs once and return their storage names.
+        """
+        names = []
+        for index in range(PLACEHOLDER_FILES):
+            content = (
+                f'%PDF-1.4\n% {SEED_MARKER} placeholder {index}\n1 0 obj << /Type /Catalog >> endobj\n'
+                f'trailer << /Root 1 0 R >>\n%%EOF\n'
+            ).encode()
+            if isinstance(default_storage, ContentAddressedStorage):
+                name = default_storage.blob_name(hashlib.sha256(content).hexdigest(), '.pdf')
+            else:
+                name = f'supporting_files/{SEED_MARKER}-placeholder-{index}.pdf'
+            if not default_storage.exists(name):
+                name = default_storage.save(f'supporting_files/{SEED_MARKER}-placeholder-{index}.pdf',
+                                            ContentFile(content))
+            names.append(name)
+        return names
+
+    def designations(self):
+        return Designation.objects.filter(name__startswith=f'{SEED_MARKER} ')
+
+    def offices(self):
+        return Office.objects.filter(office_name__startswith=f'{SEED_MARKER} ')
+
+    def users(self):
+        return CustomUser.objects.filter(username__startswith=f'{SEED_MARKER}-')
+
+    def tippanis(self):
+        return Tippani.objects.filter(present_by=SEED_MARKER)
@@ -1,46 +1,228 @@
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.validators import UniqueValidator
 from django.contrib.auth import get_user_model, authenticate
-from django.core.exceptions import ValidationError
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import models
 from .models import CustomUser, Loan, Education, Awards, Punishments, Office
 from django.contrib.auth import get_user_model
 from .models import CustomUser, Loan, Education, Awards, Punishments, Office, Designation, Tippani, LettersAndDocuments, \
-    File, Approval
+    File, Approval, UploadSession
+from .instrumentation import timed
+from .media import signed_media_url
+from .uploads import UPLOAD_SESSION_MAX_SIZE
 from django.contrib.auth import authenticate
 
 CustomUser = get_user_model()
 
+
+class SignedMediaUrlMixin:
+    """
+    Renders a stored file as a short-lived signed URL to the protected media view.
+    """
+    def to_representation(self, value):
+        if not value:
+            return None
+        return signed_media_url(value.name, self.context.get('request'))
+
+
+class SignedFileField(SignedMediaUrlMixin, serializers.FileField):
+    pass
+
+
+class SignedImageField(SignedMediaUrlMixin, serializers.ImageField):
+    pass
+
+
+def sparse_params(request):
+    """
+    Return the raw (fields, expand) lists from `?fields=` and `?expand=`.
+
+    Only reads apply them; writes always accept and return every field.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None, []
+    fields = request.query_params.get('fields')
+    expand = request.query_params.get('expand')
+    fields = [name.strip() for name in fields.split(',') if name.strip()] if fields is not None else None
+    expand = [name.strip() for name in expand.split(',') if name.strip()] if expand else []
+    return fields, expand
+
+
+class EagerLoadingMixin:
+    """
+    Lets a serializer declare the relations it reads so views can fetch them
+    up front instead of issuing one query per row.
+
+    `expandable_fields` maps a field name to (serializer class or its name,
+    kwargs) and is the allow-list for `?expand=`.
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+    expandable_fields = {}
+
+    @classmethod
+    def get_expandable(cls, name):
+        serializer_class, kwargs = cls.expandable_fields[name]
+        if isinstance(serializer_class, str):
+            serializer_class = globals()[serializer_class]
+        return serializer_class, kwargs
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None, expand=(), extra_columns=()):
+        """
+        Apply the relations (and with `fields`, the columns) the given fieldset reads.
+        """
+        def wanted(path):
+            return fields is None or path.split('__')[0] in fields
+
+        select_related = [path for path in cls.select_related_fields if wanted(path)]
+        prefetch_related = [path for path in cls.prefetch_related_fields if wanted(path)]
+        for name in expand:
+            serializer_class, kwargs = cls.get_expandable(name)
+            source = kwargs.get('source', name)
+            model_field = queryset.model._meta.get_field(source)
+            if model_field.concrete and (model_field.many_to_one or model_field.one_to_one):
+                select_related.append(source)
+                select_related += [f'{source}__{path}' for path in serializer_class.select_related_fields]
+                prefetch_related += [f'{source}__{path}' for path in serializer_class.prefetch_related_fields]
+            else:
+                prefetch_related.append(source)
+                prefetch_related += [
+                    f'{source}__{path}'
+                    for path in serializer_class.select_related_fields + serializer_class.prefetch_related_fields
+                ]
+
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        if fields is not None:
+            columns = cls.columns_for(queryset.model, fields, extra_columns)
+            if columns is not None:
+                queryset = queryset.only(*columns)
+        return queryset
+
+
+class SparseFieldsetMixin:
+    """
+    Restricts a top-level serializer to `?fields=` and nests the `?expand=`
+    relations allowed by `expandable_fields`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._sparse_fields, self._expand = None, []
+        # Nested serializers get their context when bound, so only the top level reads the request
+        request = self.context.get('request')
+        if request is not None:
+            self._sparse_fields, self._expand = self.sparse_fieldset(request)
+
+    @classmethod
+    def available_fields(cls):
+        if '_available_fields' not in cls.__dict__:
+            cls._available_fields = {name: field.source for name, field in cls().fields.items()}
+        return cls._available_fields
+
+    @classmethod
+    def sparse_fieldset(cls, request):
+        """
+        Return the validated (fields, expand) for `request`; fields is None for all.
+        """
+        fields, expand = sparse_params(request)
+        not_expandable = [name for name in expand if name not in cls.expandable_fields]
+        if not_expandable:
+            raise serializers.ValidationError({'expand': f"Cannot expand: {', '.join(not_expandable)}."})
+        if fields is None:
+            return None, expand
+        available = cls.available_fields()
+        unknown = [name for name in fields if name not in available and name not in cls.expandable_fields]
+        if unknown:
+            raise serializers.ValidationError({'fields': f"Unknown fields: {', '.join(unknown)}."})
+        return list(dict.fromkeys(fields + expand)), expand
+
+    @classmethod
+    def columns_for(cls, model, fields, extra_columns=()):
+        """
+        Return the model columns `fields` read, or None when that cannot be told.
+        """
+        available = cls.available_fields()
+        columns = {column.lstrip('-') for column in extra_columns}
+        for name in fields:
+            if name in cls.expandable_fields:
+                source = cls.get_expandable(name)[1].get('source', name)
+            else:
+                source = available[name]
+            root = name if source == '*' else source.split('.')[0]
+            try:
+                model_field = model._meta.get_field(root)
+            except FieldDoesNotExist:
+                # A property or method may read any column
+                return None
+            if model_field.concrete and not model_field.many_to_many:
+                columns.add(root)
+        return columns or {model._meta.pk.name}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for name in self._expand:
+            serializer_class, kwargs = self.get_expandable(name)
+            fields[name] = serializer_class(read_only=True, **kwargs)
+        if self._sparse_fields is not None:
+            fields = {name: field for name, field in fields.items() if name in self._sparse_fields}
+        return fields
+
+
+class TimedRepresentationMixin:
+    """
+    Counts time spent turning instances into primitives towards the request's serializer time.
+    """
+
+    def to_representation(self, instance):
+        with timed('serializer_time'):
+            return super().to_representation(instance)
+
+
+class BaseModelSerializer(TimedRepresentationMixin, SparseFieldsetMixin, EagerLoadingMixin,
+                          serializers.ModelSerializer):
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.FileField: SignedFileField,
+        models.ImageField: SignedImageField,
+    }
+
 # Nested serializers for related models
-class LoanSerializer(serializers.ModelSerializer):
+class LoanSerializer(BaseModelSerializer):
     class Meta:
         model = Loan
         fields = '__all__'
 
 
-class EducationSerializer(serializers.ModelSerializer):
+class EducationSerializer(BaseModelSerializer):
     class Meta:
         model = Education
         fields = '__all__'
 
 
-class AwardsSerializer(serializers.ModelSerializer):
+class AwardsSerializer(BaseModelSerializer):
     class Meta:
         model = Awards
         fields = '__all__'
 
 
-class PunishmentsSerializer(serializers.ModelSerializer):
+class PunishmentsSerializer(BaseModelSerializer):
     class Meta:
         model = Punishments
         fields = '__all__'
 
 
-class OfficeSerializer(serializers.ModelSerializer):
+class OfficeSerializer(BaseModelSerializer):
     class Meta:
         model = Office
         fields = '__all__'
 
 
-class UserRegistrationSerializer(serializers.ModelSerializer):
+class UserRegistrationSerializer(BaseModelSerializer):
     # Handle nested relationships as writable fields
     education = EducationSerializer(required=False)
     awards = AwardsSerializer(required=False)
@@ -158,6 +340,31 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return instance
 
 
+class UserImportSerializer(UserRegistrationSerializer):
+    """
+    Validates one spreadsheet row of a bulk employee import.
+
+    Uniqueness is checked for the whole batch at once by fts_app.imports,
+    so the per-row UniqueValidator queries are dropped here.
+    """
+    unique_fields = ('username', 'citizenship_id', 'employee_id')
+
+    class Meta(UserRegistrationSerializer.Meta):
+        fields = None
+        exclude = (
+            'groups', 'user_permissions', 'last_login', 'date_joined', 'is_staff', 'is_superuser',
+            'citizenship_front_image', 'citizenship_back_image',
+        )
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for name in self.unique_fields:
+            fields[name].validators = [
+                validator for validator in fields[name].validators if not isinstance(validator, UniqueValidator)
+            ]
+        return fields
+
+
 class UserLoginSerializer(serializers.Serializer):
     username = serializers.CharField()
     password = serializers.CharField(write_only=True)
@@ -181,16 +388,20 @@ class UserLoginSerializer(serializers.Serializer):
             raise ValidationError("Must include 'username' and 'password'.")
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(BaseModelSerializer):
     """
     Serializer for updating user profile information.
     """
+    prefetch_related_fields = ('groups', 'user_permissions')
+
     class Meta:
         model = CustomUser
         fields = '__all__'
 
 
-class UserDetailSerializer(serializers.ModelSerializer):
+class UserDetailSerializer(BaseModelSerializer):
+    select_related_fields = ('education', 'awards', 'punishments', 'loan', 'office')
+
     education = serializers.SerializerMethodField()
     awards = serializers.SerializerMethodField()
     punishments = serializers.SerializerMethodField()
@@ -258,31 +469,105 @@ class UserDetailSerializer(serializers.ModelSerializer):
         return None        
 
 
-class DesignationSerializer(serializers.ModelSerializer):
+class DesignationSerializer(BaseModelSerializer):
     class Meta:
         model = Designation
         fields = '__all__'
 
 
-class TippaniSerializer(serializers.ModelSerializer):
+class TippaniSerializer(BaseModelSerializer):
+    expandable_fields = {
+        'office': ('OfficeSerializer', {}),
+        'current_holder': ('DesignationSerializer', {}),
+        'letters': ('LettersAndDocumentsSerializer', {'source': 'letterandocuments', 'many': True}),
+        'approvals': ('ApprovalSerializer', {'many': True}),
+    }
+
     class Meta:
         model = Tippani
         fields = '__all__'
+        read_only_fields = ['current_status', 'current_holder']
 
 
-class LettersAndDocumentsSerializer(serializers.ModelSerializer):
+class LettersAndDocumentsSerializer(BaseModelSerializer):
+    expandable_fields = {
+        'tippani': ('TippaniSerializer', {}),
+        'files': ('FileSerializer', {'many': True}),
+    }
+
     class Meta:
         model = LettersAndDocuments
         fields = '__all__'
 
 
-class FileSerializer(serializers.ModelSerializer):
+class FileSerializer(BaseModelSerializer):
+    expandable_fields = {
+        'letter_document': ('LettersAndDocumentsSerializer', {}),
+    }
+
     class Meta:
         model = File
         fields = '__all__'  # ['id', 'file']
 
 
-class ApprovalSerializer(serializers.ModelSerializer):
+class ApprovalSerializer(BaseModelSerializer):
+    expandable_fields = {
+        'tippani': ('TippaniSerializer', {}),
+        'submitted_by': ('DesignationSerializer', {}),
+        'approved_by': ('DesignationSerializer', {}),
+    }
+
     class Meta:
         model = Approval
         fields = '__all__'
+
+
+class DossierLetterSerializer(LettersAndDocumentsSerializer):
+    expandable_fields = {}
+
+    files = FileSerializer(many=True, read_only=True)
+
+
+class TippaniDossierSerializer(TippaniSerializer):
+    """
+    A Tippani together with its letters, their files and its approvals.
+    """
+    prefetch_related_fields = ('letterandocuments__files', 'approvals')
+    expandable_fields = {
+        'office': ('OfficeSerializer', {}),
+        'current_holder': ('DesignationSerializer', {}),
+    }
+
+    letters = DossierLetterSerializer(source='letterandocuments', many=True, read_only=True)
+    approvals = ApprovalSerializer(many=True, read_only=True)
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    received_bytes = serializers.IntegerField(read_only=True)
+    is_complete = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'target', 'letter_document', 'tippani', 'filename', 'size', 'checksum',
+            'received_ranges', 'received_bytes', 'is_complete', 'created_at', 'expires_at'
+        ]
+        read_only_fields = ['received_ranges', 'created_at', 'expires_at']
+
+    def validate_size(self, value):
+        if value < 1 or value > UPLOAD_SESSION_MAX_SIZE:
+            raise serializers.ValidationError(f"Size must be between 1 and {UPLOAD_SESSION_MAX_SIZE} bytes.")
+        return value
+
+    def validate_checksum(self, value):
+        value = value.lower()
+        if len(value) != 64 or any(char not in '0123456789abcdef' for char in value):
+            raise serializers.ValidationError("Checksum must be a hex encoded SHA-256 digest.")
+        return value
+
+    def validate(self, data):
+        if data['target'] == 'file' and not data.get('letter_document'):
+            raise serializers.ValidationError({'letter_document': "Required when target is 'file'."})
+        if data['target'] == 'tippani' and not data.get('tippani'):
+            raise serializers.ValidationError({'tippani': "Required when target is 'tippani'."})
+        return data
@@ -0,0 +1,117 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .caching import bump_model_version
+from .models import Approval, Designation, File, LettersAndDocuments, Loan, Office, Tippani
+from .storage import ContentAddressedStorage
+
+
+def touch_tippani(**lookup):
+    """
+    Mark a Tippani's dossier as changed so cached copies are revalidated.
+    """
+    Tippani.objects.filter(**lookup).update(updated_at=timezone.now())
+
+
+def stored_values(instance, *fields):
+    """
+    The values `fields` have in the database for a saved instance, or Nones for a new one.
+    """
+    if not instance._state.adding and instance.pk is not None:
+        values = type(instance)._default_manager.filter(pk=instance.pk).values_list(*fields).first()
+        if values is not None:
+            return values
+    return (None,) * len(fields)
+
+
+def sync_tippani_status(tippani_id):
+    """
+    Copy the latest Approval's status and holder onto its Tippani.
+
+    The Tippani row is locked first so concurrent approvals for the same
+    Tippani are applied one after the other.
+    """
+    if not Tippani.objects.select_for_update().filter(pk=tippani_id).exists():
+        return
+    latest = Approval.objects.filter(tippani_id=tippani_id).order_by('-id').first()
+    Tippani.objects.filter(pk=tippani_id).update(
+        current_status=latest.status if latest else None,
+        current_holder_id=(latest.approved_by_id or latest.submitted_by_id) if latest else None,
+        updated_at=timezone.now(),
+    )
+
+
+def release_file(storage, name):
+    """
+    Drop the reference a deleted or replaced upload held on its blob, once committed.
+    """
+    if name and isinstance(storage, ContentAddressedStorage):
+        transaction.on_commit(lambda: storage.delete(name))
+
+
+@receiver(pre_save, sender=LettersAndDocuments)
+@receiver(pre_save, sender=Approval)
+def remember_tippani(sender, instance, **kwargs):
+    # A row moved to another Tippani changes the old one's dossier too
+    instance._stored_tippani_id, = stored_values(instance, 'tippani_id')
+
+
+@receiver(pre_save, sender=File)
+def remember_file(sender, instance, **kwargs):
+    instance._stored_letter_document_id, instance._stored_file_name = stored_values(
+        instance, 'letter_document_id', 'file'
+    )
+    # An uncommitted upload is stored during save() and adds its own reference
+    instance._file_uploaded = not instance.file._committed
+
+
+@receiver(pre_save, sender=Tippani)
+def remember_present_file(sender, instance, **kwargs):
+    instance._stored_file_name, = stored_values(instance, 'present_file')
+    instance._file_uploaded = not instance.present_file._committed
+
+
+@receiver(post_save, sender=File)
+@receiver(post_save, sender=Tippani)
+def release_replaced_file(sender, instance, **kwargs):
+    field_file = instance.file if sender is File else instance.present_file
+    stored_name = getattr(instance, '_stored_file_name', None)
+    if stored_name and (stored_name != field_file.name or getattr(instance, '_file_uploaded', False)):
+        release_file(field_file.storage, stored_name)
+
+
+@receiver(post_delete, sender=File)
+@receiver(post_delete, sender=Tippani)
+def release_deleted_file(sender, instance, **kwargs):
+    field_file = instance.file if sender is File else instance.present_file
+    release_file(field_file.storage, field_file.name)
+
+
+@receiver([post_save, post_delete], sender=LettersAndDocuments)
+def touch_tippani_for_letter(sender, instance, **kwargs):
+    touch_tippani(pk__in={instance.tippani_id, getattr(instance, '_stored_tippani_id', None)} - {None})
+
+
+@receiver([post_save, post_delete], sender=Approval)
+def sync_tippani_for_approval(sender, instance, **kwargs):
+    sync_tippani_status(instance.tippani_id)
+    previous = getattr(instance, '_stored_tippani_id', None)
+    if previous is not None and previous != instance.tippani_id:
+        sync_tippani_status(previous)
+
+
+@receiver([post_save, post_delete], sender=File)
+def touch_tippani_for_file(sender, instance, **kwargs):
+    letter_document_ids = {instance.letter_document_id, getattr(instance, '_stored_letter_document_id', None)} - {None}
+    if letter_document_ids:
+        touch_tippani(letterandocuments__in=letter_document_ids)
+
+
+@receiver([post_save, post_delete], sender=Designation)
+@receiver([post_save, post_delete], sender=Office)
+@receiver([post_save, post_delete], sender=Loan)
+def invalidate_cached_responses(sender, **kwargs):
+    # After commit, so a response built from the old rows cannot be cached under the new version
+    transaction.on_commit(lambda: bump_model_version(sender))
@@ -0,0 +1,122 @@
+import hashlib
+import os
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores every upload once, under the SHA-256 of its content.
+
+    Blobs live at `cas/<aa>/<bb>/<digest><ext>` below MEDIA_ROOT. Saving
+    content that already exists only bumps the blob's reference count in
+    `MediaBlob`; `delete()` drops a reference and removes the blob with the last one.
+    """
+    blob_prefix = 'cas'
+
+    def blob_name(self, digest, extension=''):
+        return f"{self.blob_prefix}/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+    def is_blob_name(self, name):
+        return name.replace('\\', '/').startswith(f"{self.blob_prefix}/")
+
+    def get_available_name(self, name, max_length=None):
+        # Names are derived from the content in _save(), never from the upload
+        return name
+
+    def _save(self, name, content):
+        extension = os.path.splitext(name)[1].lower()[:16]
+        temp_name = f"{self.blob_prefix}/tmp/{uuid.uuid4().hex}"
+        temp_path = self.path(temp_name)
+        os.makedirs(os.path.dirname(temp_path), exist_ok=True)
+
+        # Hash while copying so the content is only read once
+        digest = hashlib.sha256()
+        size = 0
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        try:
+            with open(temp_path, 'wb') as temp_file:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    size += len(chunk)
+                    temp_file.write(chunk)
+
+            blob_name = self.blob_name(digest.hexdigest(), extension)
+            self.add_reference(blob_name, temp_path, digest.hexdigest(), size)
+        finally:
+            # Only left behind when the copy or the reference failed
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return blob_name
+
+    def add_reference(self, blob_name, source_path, digest, size):
+        """
+        Move `source_path` into place as `blob_name` unless it is already
+        stored, and count one more reference to it.
+
+        The existence check and the increment happen under the blob's
+        MediaBlob row lock, the one delete() takes, so a blob cannot be
+        removed in between.
+        """
+        from .models import MediaBlob
+
+        blob_path = self.path(blob_name)
+        with transaction.atomic():
+            blob = self._lock_blob(blob_name, digest, size)
+            if os.path.exists(blob_path):
+                os.remove(source_path)
+            else:
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                os.replace(source_path, blob_path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(blob_path, self.file_permissions_mode)
+            MediaBlob.objects.filter(pk=blob.pk).update(refcount=F('refcount') + 1)
+
+    def delete(self, name):
+        if not name or not self.is_blob_name(name):
+            return super().delete(name)
+        from .models import MediaBlob
+
+        with transaction.atomic():
+            blob = MediaBlob.objects.select_for_update().filter(name=name).first()
+            if blob is not None and blob.refcount > 1:
+                MediaBlob.objects.filter(pk=blob.pk).update(refcount=F('refcount') - 1)
+                return
+            if blob is not None:
+                blob.delete()
+            # Still under the lock, so add_reference() cannot see the file about to go
+            super().delete(name)
+
+    def _lock_blob(self, name, digest, size):
+        """
+        Return the locked MediaBlob row for `name`, created without references if missing.
+        """
+        from .models import MediaBlob
+
+        blob = MediaBlob.objects.select_for_update().filter(name=name).first()
+        if blob is not None:
+            return blob
+        try:
+            with transaction.atomic():
+                return MediaBlob.objects.create(name=name, digest=digest, size=size, refcount=0)
+        except IntegrityError:
+            return MediaBlob.objects.select_for_update().get(name=name)
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """
+    Return the SHA-256 hex digest and size of the file at `path`.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b''):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
@@ -0,0 +1,28 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def count_queries(func, *args, **kwargs):
+    """
+    Run `func` and return how many SQL queries it executed.
+    """
+    with CaptureQueriesContext(connection) as context:
+        func(*args, **kwargs)
+    return len(context.captured_queries)
+
+
+def assert_constant_queries(func, make_rows, sizes=(1, 5, 20)):
+    """
+    Assert that `func` runs the same number of queries whatever the row count.
+
+    `make_rows(n)` must bring the database to `n` rows before each run, e.g.
+    by creating the missing objects. Raises AssertionError listing the query
+    count per size when they differ, which usually points at an N+1 access.
+    """
+    counts = {}
+    for size in sizes:
+        make_rows(size)
+        counts[size] = count_queries(func)
+    if len(set(counts.values())) != 1:
+        raise AssertionError(f"Query count grows with the number of rows: {counts}")
+    return counts
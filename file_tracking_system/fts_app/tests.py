@@ -1,3 +1,1020 @@
-from django.test import TestCase
+import base64
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+import zipfile
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError, connections, transaction
+from django.db.utils import ConnectionHandler
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import include, path
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from . import instrumentation, metrics, urls as fts_urls
+from .authentication import RevocationSet, issue_tokens
+from .caching import response_cache
+from .geography import PROVINCE_DISTRICTS, get_geography_index
+from .media import MEDIA_URL_MAX_AGE
+from .middleware import (
+    CompressionMiddleware, InstrumentationMiddleware, MetricsMiddleware, ReplicaStickinessMiddleware, brotli,
+    choose_encoding,
+)
+from .imports import UserImporter
+from .models import Approval, CustomUser, Designation, File, LettersAndDocuments, MediaBlob, Office, Tippani
+from .numbering import FileNumberAllocator
+from .renderers import FastJSONRenderer
+from .seeding import SEED_PASSWORD, Seeder, reserve_pks
+from .storage import ContentAddressedStorage
+from .testing import assert_constant_queries
+from .views import TippaniViewSet
+
+
+def run_in_threads(target, count):
+    """
+    Run `target(index)` in `count` threads at once and re-raise the first failure.
+    """
+    barrier = threading.Barrier(count)
+    errors = []
+
+    def run(index):
+        try:
+            barrier.wait()
+            target(index)
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
+class FileNumberAllocationTests(TransactionTestCase):
+    threads = 8
+    per_thread = 25
+
+    def test_concurrent_allocate_many_is_unique_and_gapless(self):
+        # A small block forces many reservations while the threads compete
+        allocator = FileNumberAllocator(name='test_allocate_many', block_size=7)
+        sizes = (1, 3, 5, 1, 15)
+        numbers = [[] for _ in range(self.threads)]
+
+        def allocate(index):
+            for size in sizes:
+                numbers[index] += allocator.allocate_many(size)
+
+        run_in_threads(allocate, self.threads)
+        values = sorted(int(number[len(allocator.prefix):]) for batch in numbers for number in batch)
+        self.assertEqual(len(values), self.threads * sum(sizes))
+        self.assertEqual(values, list(range(values[0], values[0] + len(values))))
+
+    def test_concurrent_file_saves_get_unique_numbers(self):
+        connection = connections['default']
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest("SQLite's shared in-memory test database locks whole tables across connections")
+
+        def save_files(index):
+            for _ in range(self.per_thread):
+                File().save()
+
+        run_in_threads(save_files, self.threads)
+        File.objects.bulk_create([File() for _ in range(self.per_thread)])
+        file_numbers = list(File.objects.values_list('file_number', flat=True))
+        self.assertEqual(len(file_numbers), (self.threads + 1) * self.per_thread)
+        self.assertEqual(len(set(file_numbers)), len(file_numbers))
+        self.assertTrue(all(number.startswith('G.U.') for number in file_numbers))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix='fts-tests-'))
+class ListQueryCountTests(APITestCase):
+    """
+    List endpoints must not issue a query per row (or per nested row).
+    """
+
+    def setUp(self):
+        self.client.force_authenticate(CustomUser.objects.create(username='reader'))
+
+    def assert_list_constant_queries(self, url):
+        def make_rows(count):
+            Seeder(seed=1).seed(users=count, tippanis=count)
+
+        def fetch():
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+        assert_constant_queries(fetch, make_rows)
+
+    def test_user_list(self):
+        self.assert_list_constant_queries('/api/user/all/')
+
+    def test_tippani_list(self):
+        self.assert_list_constant_queries('/api/tippani/')
+
+    def test_approval_list(self):
+        self.assert_list_constant_queries('/api/approval/')
+
+    def test_letter_list(self):
+        self.assert_list_constant_queries('/api/letter-document/')
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix='fts-tests-'))
+class SparseFieldsetTests(APITestCase):
+
+    def setUp(self):
+        self.client.force_authenticate(CustomUser.objects.create(username='reader'))
+        Seeder(seed=3).seed(users=2, tippanis=3)
+
+    def test_fields_narrow_the_response(self):
+        response = self.client.get('/api/tippani/?fields=id,present_subject')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({tuple(row) for row in response.data['results']}, {('id', 'present_subject')})
+
+    def test_unknown_and_nested_fields_are_rejected(self):
+        for fields in ('id,nope', 'office.office_name'):
+            response = self.client.get(f'/api/tippani/?fields={fields}')
+            self.assertEqual(response.status_code, 400, fields)
+            self.assertIn('fields', response.data)
+
+    def test_expand_is_limited_to_expandable_fields(self):
+        response = self.client.get('/api/approval/?expand=office')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('expand', response.data)
+
+        response = self.client.get('/api/tippani/?fields=id,office,approvals&expand=office,approvals')
+        self.assertEqual(response.status_code, 200)
+        for row in response.data['results']:
+            self.assertEqual(set(row), {'id', 'office', 'approvals'})
+            self.assertIn('office_name', row['office'])
+            self.assertTrue(all('status' in approval for approval in row['approvals']))
+
+    def test_expand_keeps_queries_constant(self):
+        def make_rows(count):
+            Seeder(seed=3).seed(users=count, tippanis=count)
+
+        for url in ('/api/tippani/?expand=office,current_holder,letters,approvals',
+                    '/api/approval/?expand=tippani,submitted_by,approved_by',
+                    '/api/letter-document/?expand=tippani,files'):
+            def fetch():
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+            assert_constant_queries(fetch, make_rows, sizes=(3, 10, 20))
+
+
+class DossierTests(APITestCase):
+
+    def setUp(self):
+        Seeder(seed=2).seed(tippanis=2, letters=False)
+        self.first, self.second = Tippani.objects.order_by('id')
+
+    def updated_at(self, tippani):
+        return Tippani.objects.values_list('updated_at', flat=True).get(pk=tippani.pk)
+
+    def test_malformed_pk_is_not_found(self):
+        self.assertEqual(self.client.get('/api/tippani/abc/dossier/').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/tippani/{self.second.pk + 1}/dossier/').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/tippani/{self.first.pk}/dossier/').status_code, 200)
+
+    def test_malformed_bundle_pk_is_not_found(self):
+        self.assertEqual(self.client.get('/api/tippani/abc/bundle.zip/').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/tippani/{self.second.pk + 1}/bundle.zip/').status_code, 404)
+        response = self.client.get(f'/api/tippani/{self.first.pk}/bundle.zip/')
+        self.assertEqual(response.status_code, 200)
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as archive:
+            self.assertEqual(archive.namelist(), ['manifest.csv'])
+
+    @override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix='fts-tests-'))
+    def test_revalidation_after_the_media_links_expire_gets_fresh_links(self):
+        self.first.present_file.save('memo.txt', ContentFile(b'memo'))
+        url = f'/api/tippani/{self.first.pk}/dossier/'
+        response = self.client.get(url)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        with mock.patch('time.time', return_value=time.time() + MEDIA_URL_MAX_AGE + 1):
+            self.assertEqual(self.client.get(response.data['present_file']).status_code, 401)
+            revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(revalidated.status_code, 200)
+            media = self.client.get(revalidated.data['present_file'])
+            self.assertEqual(b''.join(media.streaming_content), b'memo')
+            media.close()
+
+    def test_moving_a_letter_touches_both_tippanis(self):
+        today = timezone.localdate()
+        letter = LettersAndDocuments.objects.create(
+            tippani=self.first, registration_no='1', invoice_no='1', date=today, subject='Letter', letter_date=today,
+            office='Office', page_no=1,
+        )
+        file = File.objects.create(letter_document=letter)
+        before = self.updated_at(self.first), self.updated_at(self.second)
+        letter.tippani = self.second
+        letter.save()
+        after = self.updated_at(self.first), self.updated_at(self.second)
+        self.assertGreater(after[0], before[0])
+        self.assertGreater(after[1], before[1])
+
+        other = LettersAndDocuments.objects.create(
+            tippani=self.first, registration_no='2', invoice_no='2', date=today, subject='Other', letter_date=today,
+            office='Office', page_no=1,
+        )
+        before = after
+        file.letter_document = other
+        file.save()
+        after = self.updated_at(self.first), self.updated_at(self.second)
+        self.assertGreater(after[0], before[0])
+        self.assertGreater(after[1], before[1])
+
+    def test_moving_an_approval_resyncs_both_tippanis(self):
+        approval = self.first.approvals.order_by('-id').first()
+        approval.tippani = self.second
+        approval.save()
+        for tippani in (self.first, self.second):
+            latest = tippani.approvals.order_by('-id').first()
+            tippani.refresh_from_db()
+            self.assertEqual(tippani.current_status, latest.status if latest else None)
+
+
+class KeysetPaginationTests(APITestCase):
+
+    def setUp(self):
+        Seeder(seed=3).seed(tippanis=7, letters=False)
+
+    def cursor(self, token):
+        return base64.urlsafe_b64encode(json.dumps(token).encode()).decode().rstrip('=')
+
+    def test_pages_cover_every_row_once(self):
+        ids = []
+        url = '/api/tippani/?page_size=3'
+        while url:
+            page = self.client.get(url).json()
+            ids += [row['id'] for row in page['results']]
+            url = page['next']
+        expected = list(Tippani.objects.order_by(*TippaniViewSet.ordering).values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_wrongly_typed_cursor_is_not_found(self):
+        for token in (
+            {'p': ['abc'], 'r': False},
+            {'p': [['x']], 'r': 0},
+            {'p': [None], 'r': 0},
+            {'p': [{'a': 1}], 'r': 0},
+        ):
+            response = self.client.get('/api/approval/', {'cursor': self.cursor(token)})
+            self.assertEqual(response.status_code, 404, token)
+        response = self.client.get('/api/tippani/', {'cursor': self.cursor({'p': ['not a date', 1], 'r': 0})})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.client.get('/api/tippani/', {'cursor': 'not base64!'}).status_code, 404)
+
+
+class InboxTests(APITestCase):
+
+    def setUp(self):
+        Seeder(seed=7).seed(tippanis=4, letters=False)
+        self.clerk = Designation.objects.create(name='Inbox Clerk')
+        self.officer = Designation.objects.create(name='Inbox Officer')
+        self.tippanis = list(Tippani.objects.order_by('id'))
+        for tippani in self.tippanis[:3]:
+            Approval.objects.create(tippani=tippani, submitted_by=self.clerk)
+        Approval.objects.create(tippani=self.tippanis[2], submitted_by=self.clerk, approved_by=self.officer,
+                                status='approved')
+
+    def inbox(self, designation, status=None):
+        params = {'designation': designation.pk}
+        if status is not None:
+            params['status'] = status
+        response = self.client.get('/api/approval/inbox/', params)
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.json()['results']]
+
+    def test_inbox_follows_the_latest_approval(self):
+        first, second, third, _ = self.tippanis
+        self.assertEqual(sorted(self.inbox(self.clerk)), [first.pk, second.pk])
+        self.assertEqual(self.inbox(self.officer, 'approved'), [third.pk])
+        self.assertEqual(self.inbox(self.officer), [])
+
+        Approval.objects.create(tippani=first, submitted_by=self.clerk, approved_by=self.officer,
+                                status='transferred')
+        self.assertEqual(self.inbox(self.clerk), [second.pk])
+        self.assertEqual(self.inbox(self.officer, 'transferred'), [first.pk])
+
+    def test_missing_designation_or_unknown_status_is_rejected(self):
+        for params in ({}, {'designation': 'abc'}, {'designation': self.clerk.pk, 'status': 'lost'}):
+            response = self.client.get('/api/approval/inbox/', params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn('error', response.json())
+
+
+class GeographyTests(APITestCase):
+
+    def test_districts_listed_twice_are_returned_once(self):
+        geography = get_geography_index()
+        for province, district in (('Bagmati', 'Bhaktapur'), ('Gandaki', 'Syangja'), ('Sudurpaschim', 'Dadeldhura')):
+            self.assertEqual(PROVINCE_DISTRICTS[province].count(district), 2)
+            districts = geography.districts(province)
+            self.assertEqual(districts.count(district), 1)
+            self.assertEqual(list(districts), list(dict.fromkeys(PROVINCE_DISTRICTS[province])))
+            self.assertEqual(geography.provinces_of_district(district), (province,))
+
+        response = self.client.get('/api/districts/Bagmati/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json().count('Bhaktapur'), 1)
+        self.assertEqual(self.client.get('/api/districts/Bagmati/', HTTP_IF_NONE_MATCH=response['ETag']).status_code,
+                         304)
+
+    def test_reverse_lookups_and_search(self):
+        geography = get_geography_index()
+        self.assertEqual(geography.provinces_of_district('Nawalparasi'), ('Bagmati', 'Gandaki', 'Lumbini'))
+        self.assertEqual(set(geography.locate('Madi Municipality')), {
+            ('Koshi', 'Sankhuwasabha'), ('Bagmati', 'Chitwan'),
+        })
+        self.assertEqual(geography.search('BHAKTA'), [
+            {'name': 'Bhaktapur', 'type': 'district'}, {'name': 'Bhaktapur Municipality', 'type': 'municipality'},
+        ])
+        self.assertEqual(self.client.get('/api/districts/Nowhere/').status_code, 400)
+
+
+class BrokenContent(ContentFile):
+    def chunks(self, chunk_size=None):
+        yield b'partial'
+        raise OSError('Connection reset')
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix='fts-tests-'))
+class ContentAddressedStorageTests(TestCase):
+
+    def setUp(self):
+        self.storage = ContentAddressedStorage()
+
+    def refcount(self, name):
+        return MediaBlob.objects.filter(name=name).values_list('refcount', flat=True).first()
+
+    def test_identical_content_is_stored_once(self):
+        first = self.storage.save('supporting_files/a.pdf', ContentFile(b'same'))
+        second = self.storage.save('supporting_files/b.pdf', ContentFile(b'same'))
+        self.assertEqual(first, second)
+        self.assertEqual(self.refcount(first), 2)
+        self.storage.delete(first)
+        self.assertEqual(self.refcount(first), 1)
+        self.assertTrue(self.storage.exists(first))
+        self.storage.delete(first)
+        self.assertIsNone(self.refcount(first))
+        self.assertFalse(self.storage.exists(first))
+
+    def test_failed_copy_leaves_no_temporary_file(self):
+        with self.assertRaises(OSError):
+            self.storage.save('supporting_files/broken.pdf', BrokenContent(b''))
+        temp_dir = self.storage.path(f'{self.storage.blob_prefix}/tmp')
+        self.assertEqual(os.listdir(temp_dir), [])
+
+    def test_deleted_and_replaced_files_release_their_blobs(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            file = File.objects.create(file=ContentFile(b'first', name='first.pdf'))
+            other = File.objects.create(file=ContentFile(b'first', name='copy.pdf'))
+        first = file.file.name
+        self.assertEqual(self.refcount(first), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            file.file = ContentFile(b'second', name='second.pdf')
+            file.save()
+        self.assertEqual(self.refcount(first), 1)
+        self.assertEqual(self.refcount(file.file.name), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.file = ContentFile(b'first', name='again.pdf')
+            other.save()
+        self.assertEqual(self.refcount(first), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            file.delete()
+            other.delete()
+        self.assertIsNone(self.refcount(first))
+        self.assertFalse(self.storage.exists(first))
+        self.assertEqual(MediaBlob.objects.count(), 0)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix='fts-tests-'))
+class UploadSessionTests(APITestCase):
+    content = b'resumable upload content'
+
+    def setUp(self):
+        Seeder(seed=4).seed(tippanis=1, letters=False)
+        self.user = CustomUser.objects.create(username='uploader', citizenship_id='u1', employee_id='u1')
+        self.client.force_authenticate(self.user)
+
+    def start(self):
+        response = self.client.post('/api/uploads/', {
+            'target': 'tippani', 'tippani': Tippani.objects.get().pk, 'filename': 'memo.pdf',
+            'size': len(self.content), 'checksum': hashlib.sha256(self.content).hexdigest(),
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return f"/api/uploads/{response.json()['id']}/"
+
+    def upload(self, url):
+        response = self.client.generic(
+            'PATCH', url, self.content, content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes 0-{len(self.content) - 1}/{len(self.content)}',
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_sessions_require_authentication_and_belong_to_their_user(self):
+        url = self.start()
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.force_authenticate(CustomUser.objects.create(username='other'))
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.post(f'{url}finalize/').status_code, 404)
+
+    def test_failed_finalize_can_be_retried(self):
+        url = self.start()
+        self.upload(url)
+        with mock.patch.object(Tippani, 'save', side_effect=DatabaseError('connection lost')):
+            with self.assertRaises(DatabaseError):
+                self.client.post(f'{url}finalize/')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'{url}finalize/')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(os.listdir(default_storage.path('uploads/partial')), [])
+        tippani = Tippani.objects.get()
+        with tippani.present_file.open('rb') as stored:
+            self.assertEqual(stored.read(), self.content)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix='fts-tests-'))
+class BulkUploadTests(APITestCase):
+
+    def setUp(self):
+        Seeder(seed=5).seed(tippanis=1, letters=False)
+        today = timezone.localdate()
+        self.letter = LettersAndDocuments.objects.create(
+            tippani=Tippani.objects.get(), registration_no='1', invoice_no='1', date=today, subject='Letter',
+            letter_date=today, office='Office', page_no=1,
+        )
+
+    def post(self, count, **extra):
+        files = [SimpleUploadedFile(f'{index}.txt', f'content {index}'.encode()) for index in range(count)]
+        return self.client.post('/api/file/bulk/', {'letter_document': self.letter.pk, 'files': files, **extra})
+
+    def assert_nothing_stored(self):
+        self.assertEqual(MediaBlob.objects.count(), 0)
+        self.assertEqual(os.listdir(default_storage.path(f'{default_storage.blob_prefix}/tmp')), [])
+
+    def test_files_are_attached(self):
+        response = self.post(3, other=SimpleUploadedFile('other.txt', b'not attached'))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()['created']), 3)
+        self.assertEqual(MediaBlob.objects.count(), 3)
+        self.assertFalse(MediaBlob.objects.filter(size=len(b'not attached')).exists())
+
+    def test_too_many_files_are_rejected_without_keeping_any(self):
+        add_reference = ContentAddressedStorage.add_reference
+        with mock.patch('fts_app.views.BULK_UPLOAD_MAX_FILES', 2), \
+                mock.patch.object(ContentAddressedStorage, 'add_reference', autospec=True,
+                                  side_effect=add_reference) as stored:
+            response = self.post(3)
+        self.assertEqual(response.status_code, 400)
+        # Parsing stopped at the third file, before storing it
+        self.assertEqual(stored.call_count, 2)
+        self.assertFalse(File.objects.exists())
+        self.assert_nothing_stored()
+
+    def test_failed_parse_releases_stored_files(self):
+        add_reference = ContentAddressedStorage.add_reference
+        calls = []
+
+        def fail_on_second_file(storage, *args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise OSError('No space left on device')
+            return add_reference(storage, *args)
+
+        with mock.patch.object(ContentAddressedStorage, 'add_reference', fail_on_second_file):
+            with self.assertRaises(OSError):
+                self.post(3)
+        self.assertFalse(File.objects.exists())
+        self.assertEqual(MediaBlob.objects.count(), 0)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix='fts-tests-'))
+class ProtectedMediaTests(APITestCase):
+
+    def setUp(self):
+        self.client.force_authenticate(CustomUser.objects.create(username='reader'))
+
+    def test_stored_files_are_served(self):
+        name = default_storage.save('supporting_files/memo.txt', ContentFile(b'memo'))
+        response = self.client.get(f'/api/media/{name}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'memo')
+        response.close()
+
+    def test_directories_and_work_areas_are_not_found(self):
+        name = default_storage.save('supporting_files/memo.txt', ContentFile(b'memo'))
+        os.makedirs(default_storage.path('uploads/partial'), exist_ok=True)
+        with open(default_storage.path('uploads/partial/session.part'), 'wb') as part_file:
+            part_file.write(b'partial')
+        with open(default_storage.path('cas/tmp/upload'), 'wb') as temp_file:
+            temp_file.write(b'partial')
+        for path in ('cas', 'cas/', os.path.dirname(name), 'uploads/partial/session.part', 'cas/tmp/upload',
+                     'cas/./tmp/upload', 'missing.txt'):
+            self.assertEqual(self.client.get(f'/api/media/{path}').status_code, 404, path)
+
+
+class TokenRefreshTests(APITestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create(username='clerk', position='Clerk')
+        self.refresh = str(issue_tokens(self.user)[0])
+
+    def post_refresh(self):
+        return self.client.post('/api/user/refresh/', {'refresh': self.refresh}, format='json')
+
+    def test_refresh_reissues_current_claims(self):
+        CustomUser.objects.filter(pk=self.user.pk).update(position='Officer')
+        response = self.post_refresh()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(AccessToken(response.json()['token'])['position'], 'Officer')
+
+    def test_refresh_rejects_inactive_and_deleted_users(self):
+        CustomUser.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.post_refresh().status_code, 401)
+        CustomUser.objects.filter(pk=self.user.pk).delete()
+        self.assertEqual(self.post_refresh().status_code, 401)
+
+    def test_logout_is_seen_by_other_workers(self):
+        access = issue_tokens(self.user)[1]
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        response = self.client.post('/api/user/logout/', {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, 200)
+        # A new RevocationSet stands in for another worker's
+        other_worker = RevocationSet(settings.JWT_REVOCATION_CACHE)
+        self.assertIn(access['jti'], other_worker)
+        self.assertIn(RefreshToken(self.refresh)['jti'], other_worker)
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'default'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'shared'},
+})
+class ResponseCacheTests(APITestCase):
+
+    def setUp(self):
+        caches['shared'].clear()
+        response_cache.clear()
+        Designation.objects.create(name='Section Officer')
+
+    def test_a_write_in_another_worker_invalidates_cached_responses(self):
+        self.assertEqual(self.client.get('/api/designation/')['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/api/designation/')['X-Cache'], 'HIT')
+        # Another worker's bump only reaches this one through the shared cache
+        caches['shared'].set(f'fts:cache:version:{Designation._meta.label_lower}', 1, timeout=None)
+        self.assertEqual(self.client.get('/api/designation/')['X-Cache'], 'MISS')
+
+    def test_nothing_is_cached_without_a_shared_cache(self):
+        with mock.patch('fts_app.caching.RESPONSE_CACHE_ALIAS', None):
+            response = self.client.get('/api/designation/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Cache', response)
+        self.assertEqual(len(response_cache), 0)
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Routing against a second SQLite database standing in for a replica.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        replica = {
+            **connections['default'].settings_dict, 'ENGINE': 'django.db.backends.sqlite3', 'OPTIONS': {}, 'HOST': '',
+            'PORT': '', 'USER': '', 'PASSWORD': '',
+            'NAME': os.path.join(tempfile.mkdtemp(prefix='fts-tests-'), 'replica.sqlite3'),
+        }
+        # Registered on the connection handler only, like a connection created at runtime
+        connections['replica'] = ConnectionHandler({'default': replica, 'replica': replica})['replica']
+        with connections['replica'].schema_editor() as editor:
+            editor.create_model(Designation)
+        # Writes always go to the primary, so this is the replica's only row
+        Designation.objects.using('replica').create(name='On the replica')
+        for module in ('db_routers', 'middleware'):
+            cls.enterClassContext(mock.patch(f'fts_app.{module}.replica_aliases', return_value=['replica']))
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections['replica']
+
+    def setUp(self):
+        caches[settings.REPLICA_STICKINESS_CACHE].clear()
+        self.middleware = ReplicaStickinessMiddleware(self.view)
+        self.factory = RequestFactory()
+
+    def view(self, request):
+        if request.method == 'POST':
+            Designation.objects.create(name='On the primary')
+        return HttpResponse(','.join(Designation.objects.order_by('id').values_list('name', flat=True)))
+
+    def request(self, method, token):
+        request = getattr(self.factory, method)('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return self.middleware(request).content.decode()
+
+    def test_reads_use_the_replica_and_writes_the_primary(self):
+        self.assertEqual(list(Designation.objects.values_list('name', flat=True)), ['On the replica'])
+        Designation.objects.create(name='On the primary')
+        self.assertEqual(list(Designation.objects.using('default').values_list('name', flat=True)),
+                         ['On the primary'])
+        self.assertEqual(Designation.objects.using('replica').count(), 1)
+        self.assertEqual(Designation.objects.db, 'replica')
+
+    def test_reads_inside_a_transaction_use_the_primary(self):
+        with transaction.atomic():
+            self.assertEqual(Designation.objects.db, 'default')
+
+    def test_a_client_reads_from_the_primary_after_writing(self):
+        self.assertEqual(self.request('get', 'writer'), 'On the replica')
+        self.assertEqual(self.request('post', 'writer'), 'On the primary')
+        self.assertEqual(self.request('get', 'writer'), 'On the primary')
+        self.assertEqual(self.request('get', 'reader'), 'On the replica')
+        caches[settings.REPLICA_STICKINESS_CACHE].clear()
+        self.assertEqual(self.request('get', 'writer'), 'On the replica')
+
+
+class SeedingTests(TestCase):
+    def test_inserts_skip_reserved_keys(self):
+        first = reserve_pks(Designation, 10)
+        self.assertGreaterEqual(Designation.objects.create(name='Section Officer').pk, first + 10)
+
+    def test_seeding_skips_keys_reserved_by_other_writers(self):
+        first = reserve_pks(Tippani, 5)
+        Seeder(seed=1).seed(tippanis=3, letters=False)
+        self.assertEqual(Tippani.objects.count(), 3)
+        self.assertTrue(all(pk >= first + 5 for pk in Tippani.objects.values_list('pk', flat=True)))
+
+
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        self.designations = [Designation.objects.create(name=f'Desk {index}') for index in range(8)]
+
+    def instrumented(self, view):
+        stats = instrumentation.RouteStats(directory=None)
+        with mock.patch('fts_app.middleware.INSTRUMENTATION_ENABLED', True), \
+                mock.patch.object(instrumentation, 'route_stats', stats), \
+                self.assertLogs('fts_app.requests', level='INFO') as logs:
+            response = InstrumentationMiddleware(view)(RequestFactory().get('/api/designation/'))
+        self.assertIn('db;dur=', response['Server-Timing'])
+        [record] = logs.records
+        return record, stats.snapshot()['GET unresolved']
+
+    def test_repeated_query_shapes_are_flagged(self):
+        def view(request):
+            for designation in self.designations:
+                Designation.objects.filter(pk=designation.pk).first()
+            return HttpResponse()
+
+        record, stats = self.instrumented(view)
+        self.assertEqual(record.levelname, 'WARNING')
+        entry = record.request_metrics
+        self.assertEqual(entry['sql_count'], len(self.designations))
+        [repeated] = entry['n_plus_one']
+        self.assertEqual(repeated['count'], len(self.designations))
+        self.assertEqual(stats['nplusone'], 1)
+
+    def test_distinct_queries_are_not_flagged(self):
+        def view(request):
+            list(Designation.objects.filter(pk__in=[designation.pk for designation in self.designations]))
+            return HttpResponse()
+
+        record, stats = self.instrumented(view)
+        self.assertEqual(record.levelname, 'INFO')
+        self.assertNotIn('n_plus_one', record.request_metrics)
+        self.assertEqual(stats['nplusone'], 0)
+
+
+class MetricsTests(TestCase):
+    def test_query_counters_without_instrumentation(self):
+        self.assertFalse(instrumentation.INSTRUMENTATION_ENABLED)
+        recorders = {
+            name: mock.Mock()
+            for name in ('IN_FLIGHT', 'REQUEST_LATENCY', 'REQUESTS', 'DB_QUERIES', 'DB_QUERY_SECONDS', 'UPLOAD_BYTES')
+        }
+
+        def view(request):
+            list(Designation.objects.all())
+            return HttpResponse()
+
+        with mock.patch.multiple(metrics, METRICS_ENABLED=True, create=True, **recorders):
+            MetricsMiddleware(view)(RequestFactory().get('/api/designation/'))
+        recorders['DB_QUERIES'].labels.return_value.inc.assert_called_once_with(1)
+        recorders['DB_QUERY_SECONDS'].labels.return_value.inc.assert_called_once()
+        self.assertIsNone(instrumentation.current_metrics())
+
+
+def employee_row(index, **columns):
+    """
+    One valid row of the employee import, with `columns` overridden.
+    """
+    return {
+        'username': f'employee{index}', 'password': 'import-pass-1', 'email': f'employee{index}@example.com',
+        'perm_state': 'Bagmati', 'perm_district': 'Kathmandu', 'perm_municipality': 'Kathmandu',
+        'perm_ward_no': '1', 'temp_state': 'Bagmati', 'temp_district': 'Kathmandu',
+        'temp_municipality': 'Kathmandu', 'temp_ward_no': '2', 'citizenship_id': f'C{index}',
+        'citizenship_district': 'Kathmandu', 'citizenship_date_of_issue': '2001-02-03', 'father_name': 'Father',
+        'mother_name': 'Mother', 'grand_father_name': 'Grandfather', 'home_number': '1', 'phone_number': '2',
+        'mobile_number': '3', 'position': 'Officer', 'position_category': 'Darbandi', 'employee_id': f'E{index}',
+        'employee_type': 'Permanent', 'na_la_kos_no': '1', 'accumulation_fund_no': '2', 'bank_account_no': '3',
+        'bank_name': 'Nabil Bank Ltd.', **columns,
+    }
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class UserImportTests(APITestCase):
+
+    def setUp(self):
+        self.admin = CustomUser.objects.create(username='admin', is_staff=True, citizenship_id='A', employee_id='A')
+        self.client.force_authenticate(self.admin)
+
+    def upload(self, rows, name='employees.csv'):
+        output = io.StringIO()
+        columns = list(dict.fromkeys(column for row in rows for column in row))
+        writer = csv.DictWriter(output, columns)
+        writer.writeheader()
+        writer.writerows(rows)
+        upload = SimpleUploadedFile(name, output.getvalue().encode(), content_type='text/csv')
+        return self.client.post('/api/user/import/', {'file': upload}, format='multipart')
+
+    def test_valid_rows_are_created(self):
+        office = {'office.office_name': 'District Office', 'office.duration': '365 00:00:00',
+                  'office.position': 'Officer', 'office.position_category': 'Kaaj'}
+        response = self.upload([employee_row(1, **office), employee_row(2)])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {'rows': 2, 'created': 2, 'failed': 0, 'errors': []})
+        first, second = CustomUser.objects.filter(username__startswith='employee').order_by('username')
+        self.assertTrue(first.check_password('import-pass-1'))
+        self.assertNotEqual(first.password, 'import-pass-1')
+        self.assertEqual(first.office.office_name, 'District Office')
+        self.assertIsNone(second.office)
+
+    def test_row_errors_are_reported_per_row(self):
+        CustomUser.objects.create(username='employee4', citizenship_id='X4', employee_id='X4')
+        response = self.upload([
+            employee_row(1),
+            employee_row(2, bank_name='No bank'),
+            employee_row(3, employee_id='E1'),
+            employee_row(4),
+        ])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['rows'], response.data['created'], response.data['failed']), (4, 1, 3))
+        self.assertEqual([(error['row'], list(error['errors'])) for error in response.data['errors']], [
+            (3, ['bank_name']), (4, ['employee_id']), (5, ['username']),
+        ])
+        self.assertTrue(CustomUser.objects.filter(username='employee1').exists())
+
+    def test_a_failed_insert_rolls_back_its_batch(self):
+        # A user created after the uniqueness check, as by a concurrent request
+        CustomUser.objects.create(username='employee2', citizenship_id='X2', employee_id='X2')
+        office = {'office.office_name': 'District Office', 'office.duration': '365 00:00:00',
+                  'office.position': 'Officer', 'office.position_category': 'Kaaj'}
+        with mock.patch.object(UserImporter, 'check_unique', lambda importer, valid: valid):
+            response = self.upload([employee_row(1, **office), employee_row(2)])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['failed'], 2)
+        self.assertTrue(all('non_field_errors' in error['errors'] for error in response.data['errors']))
+        self.assertFalse(CustomUser.objects.filter(username='employee1').exists())
+        self.assertFalse(Office.objects.filter(office_name='District Office').exists())
+
+    def test_unreadable_files_are_rejected(self):
+        empty = SimpleUploadedFile('employees.csv', b'', content_type='text/csv')
+        response = self.client.post('/api/user/import/', {'file': empty}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['detail'], "The file has no header row.")
+        self.assertEqual(self.upload([employee_row(1)], name='employees.pdf').status_code, 400)
+        self.assertFalse(CustomUser.objects.filter(username='employee1').exists())
+
+    def test_only_admins_can_import(self):
+        self.client.force_authenticate(CustomUser.objects.create(username='clerk'))
+        self.assertEqual(self.upload([employee_row(1)]).status_code, 403)
+        self.assertFalse(CustomUser.objects.filter(username='employee1').exists())
+
+
+class ExportTests(APITestCase):
+
+    def setUp(self):
+        Seeder(seed=4).seed(users=3, tippanis=4, letters=False)
+        self.client.force_authenticate(CustomUser.objects.order_by('id').first())
+
+    def export(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        return b''.join(response.streaming_content)
+
+    def test_user_export_leaves_out_passwords(self):
+        content = self.export('/api/user/export/').decode('utf-8-sig')
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertIn('username', rows[0])
+        self.assertIn('office.office_name', rows[0])
+        self.assertNotIn('password', rows[0])
+        self.assertEqual(len(rows) - 1, CustomUser.objects.count())
+        self.assertNotIn(CustomUser.objects.first().password, content)
+
+    def test_approval_export_is_filtered_and_quoted(self):
+        tippani = Tippani.objects.order_by('id').first()
+        approval = tippani.approvals.order_by('id').first()
+        Approval.objects.filter(pk=approval.pk).update(remarks='Seen, "urgent"\nreply soon')
+        content = self.export(f'/api/approval/export/?tippani_id={tippani.pk}').decode('utf-8-sig')
+        self.assertIn('"Seen, ""urgent""\nreply soon"', content)
+        header, *rows = csv.reader(io.StringIO(content))
+        self.assertEqual(header, [
+            'id', 'tippani', 'tippani.present_subject', 'submitted_by.name', 'approved_by.name', 'status', 'remarks',
+            'approved_date',
+        ])
+        self.assertEqual([int(row[0]) for row in rows], sorted(tippani.approvals.values_list('id', flat=True)))
+        self.assertEqual({row[1] for row in rows}, {str(tippani.pk)})
+        self.assertIn(['Seen, "urgent"\nreply soon'], [row[6:7] for row in rows])
+
+    def test_xlsx_export_and_unknown_formats(self):
+        content = self.export('/api/tippani/export/?file_format=xlsx')
+        with zipfile.ZipFile(io.BytesIO(content)) as workbook:
+            sheet = workbook.read('xl/worksheets/sheet1.xml').decode()
+        self.assertEqual(sheet.count('<row>'), Tippani.objects.count() + 1)
+        self.assertEqual(self.client.get('/api/tippani/export/?file_format=pdf').status_code, 400)
+
+
+class CompressionTests(APITestCase):
+
+    def compress(self, response, accept_encoding='gzip'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def json_response(self, size=4096, **headers):
+        return HttpResponse(b'[' + b'1,' * (size // 2) + b'1]', content_type='application/json', headers=headers)
+
+    def test_encoding_negotiation(self):
+        best = 'br' if brotli is not None else 'gzip'
+        self.assertEqual(choose_encoding('gzip, deflate, br'), best)
+        self.assertEqual(choose_encoding('*'), best)
+        self.assertEqual(choose_encoding('br;q=0, gzip;q=0.5'), 'gzip')
+        self.assertEqual(choose_encoding('gzip;q=0, identity'), None)
+        self.assertEqual(choose_encoding(''), None)
+
+    def test_gzip_weakens_the_etag(self):
+        original = self.json_response(ETag='"v1"')
+        content = original.content
+        response = self.compress(original)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), content)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertEqual(response['ETag'], 'W/"v1"')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    @skipUnless(brotli, "brotli is not installed")
+    def test_brotli(self):
+        original = self.json_response()
+        content = original.content
+        response = self.compress(original, 'gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), content)
+
+    def test_small_encoded_and_binary_responses_are_left_alone(self):
+        for response in (
+            self.json_response(size=100),
+            self.json_response(**{'Content-Encoding': 'br'}),
+            HttpResponse(b'%PDF' * 1024, content_type='application/pdf'),
+        ):
+            content = response.content
+            response = self.compress(response)
+            self.assertEqual(response.content, content)
+            self.assertNotEqual(response.get('Content-Encoding'), 'gzip')
+        self.assertIn('Accept-Encoding', self.compress(self.json_response(), 'identity')['Vary'])
+
+    def test_streaming_responses(self):
+        response = self.compress(StreamingHttpResponse(iter([b'a,b\n'] * 1000), content_type='text/csv'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b'a,b\n' * 1000)
+
+        async def chunks():
+            yield b'a,b\n'
+
+        response = self.compress(StreamingHttpResponse(chunks(), content_type='text/csv'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_weakened_etags_still_revalidate(self):
+        Seeder(seed=5).seed(tippanis=1, letters=False)
+        tippani = Tippani.objects.get()
+        today = timezone.localdate()
+        for number in range(10):
+            LettersAndDocuments.objects.create(
+                tippani=tippani, registration_no=str(number), invoice_no=str(number), date=today,
+                subject=f'Letter {number}', letter_date=today, office='Office', page_no=1,
+            )
+        for url in ('/api/geography/search/?q=ka', f'/api/tippani/{tippani.pk}/dossier/'):
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+            self.assertEqual(response['Content-Encoding'], 'gzip', url)
+            self.assertTrue(response['ETag'].startswith('W/'))
+            revalidated = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(revalidated.status_code, 304, url)
+
+
+class FastJSONRendererTests(TestCase):
+    def test_output_matches_drf(self):
+        data = {
+            'when': timezone.now(), 'amount': Decimal('12.50'), 'duration': timedelta(days=1, seconds=5),
+            'text': 'line\u2028separator', 'nested': [{'id': 1, 'name': 'नेपाल'}],
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+# What fts_app.urls serves with ASYNC_READ_VIEWS on, for AsyncViewParityTests
+urlpatterns = [path('api/', include(fts_urls.async_urlpatterns + fts_urls.urlpatterns))]
+
+
+class AsyncViewParityTests(TestCase):
+    """
+    The async read views must answer exactly like the sync views they stand in for.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        Seeder(seed=6).seed(users=3, tippanis=12, letters=False)
+
+    def fetch(self, method, url, **kwargs):
+        response = getattr(self.client, method)(url, **kwargs)
+        with override_settings(ASYNC_READ_VIEWS=True, ROOT_URLCONF=__name__):
+            async_response = async_to_sync(getattr(self.async_client, method))(url, **kwargs)
+            self.assertTrue(iscoroutinefunction(async_response.resolver_match.func), url)
+        self.assertEqual(async_response.status_code, response.status_code, url)
+        return json.loads(response.content or 'null'), json.loads(async_response.content or 'null'), async_response
+
+    def assert_same(self, url, **kwargs):
+        data, async_data, async_response = self.fetch('get', url, **kwargs)
+        self.assertEqual(async_data, data, url)
+        return data, async_response
+
+    def test_tippanis(self):
+        tippani = Tippani.objects.order_by('id').first()
+        data, _ = self.assert_same('/api/tippani/?page_size=5')
+        self.assert_same(data['next'])
+        self.assert_same('/api/tippani/?fields=id,present_subject,office&expand=office')
+        self.assert_same(f'/api/tippani/{tippani.pk}/')
+        self.assert_same(f'/api/tippani/{tippani.pk}/?fields=nope')
+        self.assert_same('/api/tippani/999999/')
+
+    def test_dossier(self):
+        tippani = Tippani.objects.order_by('id').first()
+        url = f'/api/tippani/{tippani.pk}/dossier/'
+        _, async_response = self.assert_same(url)
+        self.assertEqual(async_response['ETag'], self.client.get(url)['ETag'])
+        self.assert_same(url, headers={'If-None-Match': async_response['ETag']})
+        self.assert_same('/api/tippani/999999/dossier/')
+
+    def test_inbox(self):
+        holder, current_status = Tippani.objects.values_list('current_holder_id', 'current_status').first()
+        data, _ = self.assert_same(f'/api/approval/inbox/?designation={holder}&status={current_status}')
+        self.assertTrue(data['results'])
+        self.assert_same('/api/approval/inbox/')
+        self.assert_same(f'/api/approval/inbox/?designation={holder}&status=unknown')
+
+    def test_geography(self):
+        for url in ('/api/provinces/', '/api/districts/Bagmati/', '/api/districts/Nowhere/',
+                    '/api/municipalities/Bagmati/Kathmandu/', '/api/geography/search/?q=ka',
+                    '/api/geography/search/'):
+            _, async_response = self.assert_same(url)
+            if async_response.status_code == 200:
+                self.assert_same(url, headers={'If-None-Match': async_response['ETag']})
+
+    def test_login(self):
+        user = CustomUser.objects.order_by('id').first()
+        data, async_data, _ = self.fetch('post', '/api/user/login/', data={
+            'username': user.username, 'password': SEED_PASSWORD,
+        }, content_type='application/json')
+        self.assertEqual(async_data['user'], data['user'])
+        self.assertEqual(set(async_data), set(data))
+        for credentials in ({'username': user.username, 'password': 'wrong'}, {'username': 'nobody', 'password': 'x'}):
+            data, async_data, _ = self.fetch('post', '/api/user/login/', data=credentials,
+                                             content_type='application/json')
+            self.assertEqual(async_data, data)
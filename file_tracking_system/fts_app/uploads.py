@@ -0,0 +1,209 @@
+import hashlib
+import os
+import re
+import shutil
+import uuid
+
+from django.conf import settings
+from django.core.files import File as DjangoFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers, StopUpload
+from django.db import transaction
+
+from .storage import ContentAddressedStorage
+
+
+UPLOAD_SESSION_TTL = getattr(settings, 'UPLOAD_SESSION_TTL', 60 * 60 * 24)
+UPLOAD_SESSION_MAX_SIZE = getattr(settings, 'UPLOAD_SESSION_MAX_SIZE', 2 * 1024 ** 3)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+BULK_UPLOAD_MAX_FILES = getattr(settings, 'BULK_UPLOAD_MAX_FILES', 100)
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+def part_path(session):
+    return default_storage.path(f"uploads/partial/{session.pk}.part")
+
+
+def parse_content_range(header):
+    """
+    Parse `bytes <first>-<last>/<total>` into (start, end, total), end exclusive.
+    """
+    match = CONTENT_RANGE_RE.match((header or '').strip())
+    if not match:
+        return None
+    first, last, total = (int(value) for value in match.groups())
+    if last < first or last >= total:
+        return None
+    return first, last + 1, total
+
+
+def merge_ranges(ranges, start, end):
+    """
+    Add the half-open range [start, end) to a sorted list of disjoint ranges.
+    """
+    merged = []
+    for range_start, range_end in sorted(ranges + [[start, end]]):
+        if merged and range_start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], range_end)
+        else:
+            merged.append([range_start, range_end])
+    return merged
+
+
+def write_chunk(path, offset, stream, length):
+    """
+    Copy up to `length` bytes from `stream` into the part file at `offset`.
+
+    Returns the number of bytes written, which is short when the client
+    disconnects mid-chunk; those bytes are kept so the upload can resume.
+    """
+    written = 0
+    with open(path, 'r+b') as part_file:
+        part_file.seek(offset)
+        while written < length:
+            chunk = stream.read(min(UPLOAD_CHUNK_SIZE, length - written))
+            if not chunk:
+                break
+            part_file.write(chunk)
+            written += len(chunk)
+    return written
+
+
+def sha256_of(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as part_file:
+        for chunk in iter(lambda: part_file.read(UPLOAD_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_part(session, digest):
+    """
+    Copy a completed part file into media storage and return its stored name.
+
+    The part file is only removed once the surrounding transaction commits,
+    so a finalize that fails after this point can simply be retried.
+    """
+    path = part_path(session)
+    extension = os.path.splitext(session.filename)[1].lower()[:16]
+    if isinstance(default_storage, ContentAddressedStorage):
+        # A hard link puts the part into the blob tree without copying any bytes
+        name = default_storage.blob_name(digest, extension)
+        link_path = default_storage.path(f"{default_storage.blob_prefix}/tmp/{uuid.uuid4().hex}")
+        os.makedirs(os.path.dirname(link_path), exist_ok=True)
+        try:
+            try:
+                os.link(path, link_path)
+            except OSError:
+                shutil.copyfile(path, link_path)
+            default_storage.add_reference(name, link_path, digest, session.size)
+        finally:
+            if os.path.exists(link_path):
+                os.remove(link_path)
+    else:
+        with open(path, 'rb') as part_file:
+            name = default_storage.save(f"supporting_files/{session.filename}", DjangoFile(part_file))
+    transaction.on_commit(lambda: remove_file(path))
+    return name
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def discard_part(session):
+    remove_file(part_path(session))
+
+
+class StoredUpload(UploadedFile):
+    """
+    An uploaded file that has already been written to media storage.
+    """
+
+    def __init__(self, name, stored_name, size, content_type):
+        super().__init__(file=None, name=name, content_type=content_type, size=size)
+        self.stored_name = stored_name
+
+    def close(self):
+        # Nothing is held open; the parser closes uploads when parsing fails
+        pass
+
+
+class StorageUploadHandler(FileUploadHandler):
+    """
+    Streams each multipart file straight into content-addressed storage.
+
+    Bytes are hashed and written to the blob tree's temp area as they are
+    parsed, so nothing is buffered in memory and no second copy is made
+    once the file is complete. Parsing stops at the first file past
+    `max_files`, before any of its bytes are stored.
+    """
+    chunk_size = UPLOAD_CHUNK_SIZE
+
+    def __init__(self, request=None, max_files=None):
+        super().__init__(request)
+        self.max_files = max_files
+        self.file_count = 0
+        self.too_many_files = False
+        self.stored_names = []
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.active = False
+        self.file_count += 1
+        if self.max_files is not None and self.file_count > self.max_files:
+            self.too_many_files = True
+            # The rest of the body is read and thrown away so the response can still be sent
+            raise StopUpload(connection_reset=False)
+        # Without content addressing the next handlers buffer the file as usual
+        self.active = isinstance(default_storage, ContentAddressedStorage)
+        if not self.active:
+            return
+        self.temp_path = default_storage.path(f"{default_storage.blob_prefix}/tmp/{uuid.uuid4().hex}")
+        os.makedirs(os.path.dirname(self.temp_path), exist_ok=True)
+        self.temp_file = open(self.temp_path, 'wb')
+        self.digest = hashlib.sha256()
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.active:
+            return raw_data
+        self.temp_file.write(raw_data)
+        self.digest.update(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if not self.active:
+            return None
+        self.temp_file.close()
+        if not file_size:
+            os.remove(self.temp_path)
+            return StoredUpload(self.file_name, None, 0, self.content_type)
+        digest = self.digest.hexdigest()
+        extension = os.path.splitext(self.file_name)[1].lower()[:16]
+        stored_name = default_storage.blob_name(digest, extension)
+        default_storage.add_reference(stored_name, self.temp_path, digest, file_size)
+        self.stored_names.append(stored_name)
+        return StoredUpload(self.file_name, stored_name, file_size, self.content_type)
+
+    def upload_interrupted(self):
+        if getattr(self, 'active', False):
+            self.temp_file.close()
+            try:
+                os.remove(self.temp_path)
+            except FileNotFoundError:
+                pass
+
+    def discard_stored(self):
+        """
+        Drop the references taken on every file stored so far.
+        """
+        self.upload_interrupted()
+        while self.stored_names:
+            default_storage.delete(self.stored_names.pop())
+
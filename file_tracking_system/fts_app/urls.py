@@ -1,6 +1,8 @@
 
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from . import async_views
 from .views import (
     UserViewSet,
     TippaniViewSet, 
@@ -11,11 +13,15 @@ from .views import (
     get_provinces, 
     get_districts, 
     get_municipalities,
+    search_documents,
+    search_geography,
+    serve_protected_media,
     LoanViewSet,
     EducationViewSet,
     AwardsViewSet,
     PunishmentsViewSet,
-    OfficeViewSet
+    OfficeViewSet,
+    UploadSessionViewSet
 )
 
 
@@ -31,11 +37,35 @@ router.register(r'educations', EducationViewSet)
 router.register(r'awards', AwardsViewSet)
 router.register(r'punishments', PunishmentsViewSet)
 router.register(r'offices', OfficeViewSet)
+router.register(r'uploads', UploadSessionViewSet, basename='upload')
 
 
 urlpatterns = [
     path('', include(router.urls)),
+    # The router only serves the bundle with a trailing slash
+    path('tippani/<int:pk>/bundle.zip', TippaniViewSet.as_view({'get': 'bundle'}), name='tippani-bundle-zip'),
     path('provinces/', get_provinces, name='get-provinces'),
     path('districts/<str:province>/', get_districts, name='get-districts'),
     path('municipalities/<str:province>/<str:district>/', get_municipalities, name='get-municipalities'),
+    path('geography/search/', search_geography, name='search-geography'),
+    path('search/', search_documents, name='search-documents'),
+    path('media/<path:name>', serve_protected_media, name='protected-media'),
 ]
+
+# Async versions of the hot read endpoints, for deployments served through asgi.py.
+# Writes to the same URLs still reach the sync viewsets.
+async_urlpatterns = [
+    path('tippani/', async_views.tippani_list),
+    path('tippani/<int:pk>/', async_views.tippani_detail),
+    path('tippani/<int:pk>/dossier/', async_views.tippani_dossier),
+    path('approval/inbox/', async_views.approval_inbox),
+    path('user/login/', async_views.login),
+    path('provinces/', async_views.get_provinces),
+    path('districts/<str:province>/', async_views.get_districts),
+    path('municipalities/<str:province>/<str:district>/', async_views.get_municipalities),
+    path('geography/search/', async_views.search_geography),
+    path('media/<path:name>', async_views.serve_protected_media),
+]
+
+if settings.ASYNC_READ_VIEWS:
+    urlpatterns = async_urlpatterns + urlpatterns
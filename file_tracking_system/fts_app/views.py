@@ -1,16 +1,29 @@
-from rest_framework.decorators import api_view, action
+import os
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from django.utils.http import parse_etags
+from rest_framework.decorators import api_view, action, permission_classes
 from rest_framework.response import Response
 from rest_framework import status, viewsets
+from rest_framework.generics import get_object_or_404
 from rest_framework.authtoken.models import Token
 from rest_framework.authentication import TokenAuthentication
-from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.permissions import IsAuthenticated, AllowAny, BasePermission, IsAdminUser
+from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.utils.urls import replace_query_param
 from .serializers import (
     UserRegistrationSerializer, 
     UserLoginSerializer, 
     UserProfileSerializer,
     UserDetailSerializer,
     TippaniSerializer, 
+    TippaniDossierSerializer,
     LettersAndDocumentsSerializer, 
     FileSerializer, 
     DesignationSerializer, 
@@ -19,8 +32,21 @@ from .serializers import (
     EducationSerializer,
     OfficeSerializer,
     AwardsSerializer,
-    PunishmentsSerializer
+    PunishmentsSerializer,
+    UploadSessionSerializer
 )
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from .caching import CachedResponseMixin
+from .authentication import StatelessJWTAuthentication, issue_tokens, revoke_token, revoked_tokens
+from .exports import EXPORT_FORMATS, export_response, tippani_bundle_response
+from .geography import etag_for, get_geography_index
+from .imports import SpreadsheetError, UserImporter, import_format, read_rows
+from .media import MEDIA_URL_MAX_AGE, has_valid_signature, serve_media
+from .search import SEARCH_TARGETS, search
+from .pagination import KeysetPagination
+from .parsers import FastJSONParser
 from .models import (
     CustomUser,
     Approval, 
@@ -32,19 +58,89 @@ from .models import (
     Education, 
     Awards, 
     Punishments, 
-    Office
+    Office,
+    UploadSession
+)
+from .signals import touch_tippani
+from .uploads import (
+    BULK_UPLOAD_MAX_FILES,
+    UPLOAD_SESSION_TTL,
+    StorageUploadHandler,
+    discard_part,
+    merge_ranges,
+    parse_content_range,
+    part_path,
+    sha256_of,
+    store_part,
+    write_chunk
 )
 
+def export_format(request):
+    """
+    Return the requested ?file_format= for an export, or None when unsupported.
+    """
+    file_format = request.query_params.get('file_format', 'csv').lower()
+    return file_format if file_format in EXPORT_FORMATS else None
+
+
+def export_error():
+    return Response(
+        {"detail": f"file_format must be one of: {', '.join(EXPORT_FORMATS)}."}, status=status.HTTP_400_BAD_REQUEST
+    )
+
+
+class EagerLoadingViewSetMixin:
+    """
+    Applies the serializer's declared select/prefetch relations to the queryset,
+    narrowed to the request's `?fields=` and `?expand=`.
+    """
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        if hasattr(serializer_class, 'setup_eager_loading'):
+            fields, expand = serializer_class.sparse_fieldset(getattr(self, 'request', None))
+            # Columns the view itself reads stay loaded whatever fields were asked for
+            extra_columns = getattr(self, 'ordering', ()) + getattr(self, 'required_columns', ())
+            queryset = serializer_class.setup_eager_loading(queryset, fields, expand, extra_columns)
+        return queryset
+
+
+def login_user_data(user):
+    """
+    The user fields returned on login.
+    """
+    return {
+        "id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "employee_id": user.employee_id,
+        "position": user.position,
+        "province": user.perm_state,
+        "district": user.perm_district,
+        "municipality": user.perm_municipality
+    }
+
+
 class UserViewSet(viewsets.ViewSet):
-    authentication_classes = [TokenAuthentication]
-    parser_classes = [MultiPartParser, FormParser, JSONParser]
+    authentication_classes = [StatelessJWTAuthentication, TokenAuthentication]
+    parser_classes = [MultiPartParser, FormParser, FastJSONParser]
+    pagination_class = KeysetPagination
+    ordering = ('id',)
+    export_columns = tuple(
+        name for name in UserDetailSerializer.Meta.fields if name not in UserDetailSerializer.select_related_fields
+    ) + (
+        'education__education_level', 'education__institution', 'office__office_name', 'office__position',
+        'loan__name',
+    )
     
     def get_permissions(self):
         """
         Assign permissions based on the action.
         """
-        if self.action in ['register', 'login']:
+        if self.action in ['register', 'login', 'refresh']:
             return [AllowAny()]
+        if self.action == 'bulk_import':
+            return [IsAdminUser()]
         return [IsAuthenticated()]
 
     @action(detail=False, methods=['post'], url_path='register')
@@ -55,7 +151,7 @@ class UserViewSet(viewsets.ViewSet):
         serializer = UserRegistrationSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             user = serializer.save()
-            token, _ = Token.objects.get_or_create(user=user)
+            refresh, access = issue_tokens(user)
             return Response({
                 "user": {
                     "id": user.id,
@@ -64,42 +160,78 @@ class UserViewSet(viewsets.ViewSet):
                     "employee_id": user.employee_id,
                     "position": user.position
                 },
-                "token": token.key
+                "token": str(access),
+                "refresh": str(refresh)
             }, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def bulk_import(self, request):
+        """
+        Register every employee in an uploaded .csv or .xlsx file.
+
+        Columns are the registration fields, with nested ones prefixed by
+        their relation (e.g. "education.institution"). Valid rows are saved
+        even when others fail; the response lists each failed row's errors.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"detail": "Upload the spreadsheet as 'file'."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            file_format = import_format(upload.name, request.data.get('file_format'))
+            report = UserImporter().run(read_rows(upload, file_format))
+        except SpreadsheetError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_201_CREATED if report['created'] else status.HTTP_400_BAD_REQUEST)
+
     @action(detail=False, methods=['post'], url_path='login')
     def login(self, request):
         """
         Authenticate and log in a user.
         """
-        print(request.data)
         serializer = UserLoginSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.validated_data['user']
-            token, _ = Token.objects.get_or_create(user=user)
+            refresh, access = issue_tokens(user)
             return Response({
-                "user": {
-                    "id": user.id,
-                    "username": user.username,
-                    "email": user.email,
-                    "employee_id": user.employee_id,
-                    "position": user.position,
-                    "province": user.perm_state,
-                    "district": user.perm_district,
-                    "municipality": user.perm_municipality
-                },
-                "token": token.key
+                "user": login_user_data(user),
+                "token": str(access),
+                "refresh": str(refresh)
             }, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_401_UNAUTHORIZED)
 
+    @action(detail=False, methods=['post'], url_path='refresh')
+    def refresh(self, request):
+        """
+        Exchange a refresh token for a new access token.
+        """
+        try:
+            refresh = RefreshToken(request.data.get('refresh', ''))
+        except TokenError:
+            return Response({"detail": "Invalid or expired refresh token."}, status=status.HTTP_401_UNAUTHORIZED)
+        if refresh['jti'] in revoked_tokens:
+            return Response({"detail": "Refresh token has been revoked."}, status=status.HTTP_401_UNAUTHORIZED)
+        # The access token carries fresh claims for a user who can still log in
+        user = CustomUser.objects.filter(
+            **{jwt_settings.USER_ID_FIELD: refresh.get(jwt_settings.USER_ID_CLAIM)}, is_active=True
+        ).first()
+        if user is None:
+            return Response({"detail": "User not found or inactive."}, status=status.HTTP_401_UNAUTHORIZED)
+        access = issue_tokens(user)[1]
+        return Response({"token": str(access)}, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=['post'], url_path='logout')
     def logout(self, request):
         """
-        Log out the current user by deleting their token.
+        Log out the current user by revoking their tokens.
         """
         try:
-            request.user.auth_token.delete()
+            if isinstance(request.auth, Token):
+                request.auth.delete()
+            else:
+                revoke_token(request.auth)
+                if request.data.get('refresh'):
+                    revoke_token(RefreshToken(request.data['refresh']))
             return Response(
                 {"detail": "Successfully logged out"},
                 status=status.HTTP_200_OK
@@ -115,7 +247,8 @@ class UserViewSet(viewsets.ViewSet):
         """
         Update the profile of the current user.
         """
-        user = request.user
+        # JWT requests carry a TokenUser; saving needs the model instance
+        user = CustomUser.objects.get(pk=request.user.pk)
         serializer = UserProfileSerializer(
             user,
             data=request.data,
@@ -132,9 +265,22 @@ class UserViewSet(viewsets.ViewSet):
         """
         Get details of all users.
         """
-        users = CustomUser.objects.all()
-        serializer = UserDetailSerializer(users, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        fields, expand = UserDetailSerializer.sparse_fieldset(request)
+        users = UserDetailSerializer.setup_eager_loading(CustomUser.objects.all(), fields, expand, self.ordering)
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(users, request, view=self)
+        serializer = UserDetailSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        """
+        Download every user as CSV or XLSX (?file_format=csv|xlsx).
+        """
+        file_format = export_format(request)
+        if file_format is None:
+            return export_error()
+        return export_response(CustomUser.objects.order_by(*self.ordering), self.export_columns, file_format, 'users')
 
     @action(detail=True, methods=['get'], url_path='details')
     def get_user_details(self, request, pk=None):
@@ -142,8 +288,9 @@ class UserViewSet(viewsets.ViewSet):
         Get details of a specific user by ID.
         """
         try:
-            user = CustomUser.objects.get(pk=pk)
-            serializer = UserDetailSerializer(user)
+            fields, expand = UserDetailSerializer.sparse_fieldset(request)
+            user = UserDetailSerializer.setup_eager_loading(CustomUser.objects.all(), fields, expand).get(pk=pk)
+            serializer = UserDetailSerializer(user, context={'request': request})
             return Response(serializer.data, status=status.HTTP_200_OK)
         except CustomUser.DoesNotExist:
             return Response(
@@ -151,14 +298,90 @@ class UserViewSet(viewsets.ViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
+def _etag_matches(request, etag):
+    """
+    Check the request's If-None-Match header against an ETag.
+
+    The comparison is weak, as If-None-Match requires, so the W/ copies
+    CompressionMiddleware sends back still match.
+    """
+    if_none_match = [tag.removeprefix('W/') for tag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))]
+    return '*' in if_none_match or etag in if_none_match
+
+
+def _dossier_etag(pk, updated_at):
+    """
+    ETag for a Tippani dossier.
+
+    The dossier carries signed media URLs, so the tag also changes with every
+    window of half MEDIA_URL_MAX_AGE: a 304 only ever confirms a body whose
+    links stay valid for at least another half of their lifetime.
+    """
+    window = int(time.time() // max(MEDIA_URL_MAX_AGE // 2, 1))
+    return f'"tippani-{pk}-{updated_at.timestamp()}-{window}"'
+
+
 # Helper views for address data
+def _reference_headers(data):
+    """
+    Headers for static reference data: a strong ETag and a long-lived Cache-Control.
+    """
+    return {
+        'ETag': etag_for(data),
+        'Cache-Control': f'public, max-age={settings.GEOGRAPHY_CACHE_MAX_AGE}',
+    }
+
+
+def _reference_response(request, data):
+    """
+    Return static reference data, or a 304 when the client's copy is current.
+    """
+    headers = _reference_headers(data)
+    if _etag_matches(request, headers['ETag']):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(data, status=status.HTTP_200_OK, headers=headers)
+
+
+def geography_list(province=None, district=None):
+    """
+    Return (data, error) for the provinces, a province's districts or a district's municipalities.
+    """
+    geography = get_geography_index()
+    if province is None:
+        return list(geography.provinces), None
+    if not geography.is_province(province):
+        return None, "Invalid province"
+    if district is None:
+        return list(geography.districts(province)), None
+    if district not in geography.districts(province):
+        return None, "Invalid district"
+    return list(geography.municipalities(district)), None
+
+
+def geography_search(prefix):
+    """
+    Return the places starting with `prefix`, with where each district and municipality lies.
+    """
+    geography = get_geography_index()
+    results = geography.search(prefix)
+    for result in results:
+        if result['type'] == 'district':
+            result['provinces'] = list(geography.provinces_of_district(result['name']))
+        elif result['type'] == 'municipality':
+            result['locations'] = [
+                {'province': province, 'district': district}
+                for province, district in geography.locate(result['name'])
+            ]
+    return results
+
+
 @api_view(['GET'])
 def get_provinces(request):
     """
     Get a list of all provinces.
     """
-    provinces = [choice[0] for choice in CustomUser.Province.choices]
-    return Response(provinces, status=status.HTTP_200_OK)
+    provinces, _ = geography_list()
+    return _reference_response(request, provinces)
 
 
 @api_view(['GET'])
@@ -166,10 +389,10 @@ def get_districts(request, province):
     """
     Get a list of districts for a given province.
     """
-    if province not in [choice[0] for choice in CustomUser.Province.choices]:
-        return Response({"error": "Invalid province"}, status=status.HTTP_400_BAD_REQUEST)
-    districts = CustomUser.get_district_choices(province)
-    return Response(districts, status=status.HTTP_200_OK)
+    districts, error = geography_list(province)
+    if error:
+        return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+    return _reference_response(request, districts)
 
 
 @api_view(['GET'])
@@ -177,73 +400,409 @@ def get_municipalities(request, province, district):
     """
     Get a list of municipalities for a given district and province.
     """
-    if province not in [choice[0] for choice in CustomUser.Province.choices]:
-        return Response({"error": "Invalid province"}, status=status.HTTP_400_BAD_REQUEST)
-    districts = CustomUser.get_district_choices(province)
-    if district not in districts:
-        return Response({"error": "Invalid district"}, status=status.HTTP_400_BAD_REQUEST)
-    municipalities = CustomUser.get_municipality_choices(province, district)
-    return Response(municipalities, status=status.HTTP_200_OK)
+    municipalities, error = geography_list(province, district)
+    if error:
+        return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+    return _reference_response(request, municipalities)
+
+
+@api_view(['GET'])
+def search_geography(request):
+    """
+    Search provinces, districts and municipalities by name prefix.
+    """
+    prefix = request.query_params.get('q', '').strip()
+    if not prefix:
+        return Response({"error": "Query parameter 'q' is required"}, status=status.HTTP_400_BAD_REQUEST)
+    return _reference_response(request, geography_search(prefix))
+
+class HasSignedMediaURL(BasePermission):
+    """
+    Allows access to a media file through a valid, unexpired signed URL.
+    """
+    def has_permission(self, request, view):
+        return has_valid_signature(view.kwargs.get('name', ''), request.query_params.get('sig'))
+
+
+@api_view(['GET', 'HEAD'])
+@permission_classes([HasSignedMediaURL | IsAuthenticated])
+def serve_protected_media(request, name):
+    """
+    Serve an uploaded file to an authenticated user or a signed URL holder.
+    """
+    return serve_media(request, name)
+
+
+@api_view(['GET'])
+def search_documents(request):
+    """
+    Full-text search over Tippanis (type=tippani) or letters (type=letter).
+    """
+    query = request.query_params.get('q', '').strip()
+    target = request.query_params.get('type', 'tippani')
+    if not query:
+        return Response({"error": "Query parameter 'q' is required"}, status=status.HTTP_400_BAD_REQUEST)
+    if target not in SEARCH_TARGETS:
+        return Response({"error": "Type must be 'tippani' or 'letter'"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        page = max(int(request.query_params.get('page', 1)), 1)
+        page_size = min(max(int(request.query_params.get('page_size', 20)), 1), settings.KEYSET_MAX_PAGE_SIZE)
+    except ValueError:
+        return Response({"error": "Invalid page or page_size"}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Ranked offset pages: relevance order has no stable key to seek on
+    hits = search(target, query, limit=page_size + 1, offset=(page - 1) * page_size)
+    has_next = len(hits) > page_size
+    hits = hits[:page_size]
+    model = SEARCH_TARGETS[target][0]
+    serializer_class = TippaniSerializer if target == 'tippani' else LettersAndDocumentsSerializer
+    objects = model.objects.in_bulk([pk for pk, _ in hits])
+    results = []
+    for pk, rank in hits:
+        if pk in objects:
+            data = serializer_class(objects[pk], context={'request': request}).data
+            data['rank'] = rank
+            results.append(data)
+
+    url = request.build_absolute_uri()
+    return Response({
+        "next": replace_query_param(url, 'page', page + 1) if has_next else None,
+        "previous": replace_query_param(url, 'page', page - 1) if page > 1 else None,
+        "results": results
+    }, status=status.HTTP_200_OK)
 
-class TippaniViewSet(viewsets.ModelViewSet):
+
+class TippaniViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = Tippani.objects.all()
     serializer_class = TippaniSerializer
+    ordering = ('present_date', 'id')
+    required_columns = ('updated_at',)
+    export_columns = (
+        'id', 'office__office_name', 'present_subject', 'present_by', 'present_date', 'page_no', 'total_page',
+        'approved_by', 'approve_date', 'current_status', 'current_holder__name', 'updated_at',
+    )
+
+    def get_serializer_class(self):
+        if self.action == 'dossier':
+            return TippaniDossierSerializer
+        return super().get_serializer_class()
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        """
+        Download the Tippani list as CSV or XLSX (?file_format=csv|xlsx), with the list's filters applied.
+        """
+        file_format = export_format(request)
+        if file_format is None:
+            return export_error()
+        queryset = self.filter_queryset(self.get_queryset()).order_by(*self.ordering)
+        return export_response(queryset, self.export_columns, file_format, 'tippanis')
 
-class LettersAndDocumentsViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['get'], url_path='bundle.zip')
+    def bundle(self, request, pk=None):
+        """
+        Download the Tippani's present_file and every file under its letters as one ZIP with a manifest.
+        """
+        tippani = get_object_or_404(Tippani.objects.only('id', 'present_file', 'updated_at'), pk=pk)
+        files = File.objects.filter(letter_document__tippani=tippani).select_related('letter_document').only(
+            'id', 'file', 'file_number', 'letter_document__id', 'letter_document__registration_no',
+        ).order_by('letter_document_id', 'id')
+        return tippani_bundle_response(tippani, files)
+
+    @action(detail=True, methods=['get'], url_path='dossier')
+    def dossier(self, request, pk=None):
+        """
+        Get a Tippani with its letters, their files and its approvals.
+        """
+        # Revalidation only needs the version column; a malformed pk is a 404 like a missing one
+        updated_at = get_object_or_404(Tippani.objects.values_list('updated_at', flat=True), pk=pk)
+        headers = {
+            'ETag': _dossier_etag(pk, updated_at),
+            'Cache-Control': 'private, no-cache',
+        }
+        if _etag_matches(request, headers['ETag']):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        tippani = self.get_object()
+        headers['ETag'] = _dossier_etag(tippani.pk, tippani.updated_at)
+        serializer = self.get_serializer(tippani)
+        return Response(serializer.data, status=status.HTTP_200_OK, headers=headers)
+
+
+class LettersAndDocumentsViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = LettersAndDocuments.objects.all()
     serializer_class = LettersAndDocumentsSerializer
 
     def get_queryset(self):
-        queryset = LettersAndDocuments.objects.all()
+        queryset = super().get_queryset()
         tippani_id = self.request.query_params.get('tippani_id', None)
         if tippani_id is not None:
             queryset = queryset.filter(tippani_id=tippani_id)
         return queryset
 
 
-class FileViewSet(viewsets.ModelViewSet):
+class FileViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = File.objects.all()
     serializer_class = FileSerializer
 
     def get_queryset(self):
-        queryset = File.objects.all()
+        queryset = super().get_queryset()
         letter_document_id = self.request.query_params.get('letter_document_id', None)
         if letter_document_id is not None:
             queryset = queryset.filter(letter_document_id=letter_document_id)
         return queryset
+
+    @action(detail=False, methods=['post'], url_path='bulk', parser_classes=[MultiPartParser])
+    def bulk_upload(self, request):
+        """
+        Attach many files to one letter in a single multipart request.
+        """
+        # Must run before request.data is touched so files stream into storage
+        handler = StorageUploadHandler(request, max_files=BULK_UPLOAD_MAX_FILES)
+        request.upload_handlers.insert(0, handler)
+        try:
+            letter_document_id = request.data.get('letter_document')
+            uploads = request.FILES.getlist('files')
+        except Exception:
+            handler.discard_stored()
+            raise
+
+        error = None
+        if handler.too_many_files:
+            error = f"At most {BULK_UPLOAD_MAX_FILES} files can be uploaded at once."
+        elif not uploads:
+            error = "No files were submitted under 'files'."
+        elif not str(letter_document_id or '').isdigit() or \
+                not LettersAndDocuments.objects.filter(pk=letter_document_id).exists():
+            error = "A valid 'letter_document' is required."
+        if error:
+            handler.discard_stored()
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        files, errors = [], []
+        for index, upload in enumerate(uploads):
+            if not upload.size:
+                errors.append({"index": index, "filename": upload.name, "error": "The submitted file is empty."})
+                continue
+            name = getattr(upload, 'stored_name', None)
+            if name is None:
+                name = default_storage.save(f"supporting_files/{upload.name}", upload)
+                handler.stored_names.append(name)
+            files.append(File(letter_document_id=letter_document_id, file=name))
+
+        try:
+            with transaction.atomic():
+                # File numbers for the whole batch are reserved in one go
+                File.objects.bulk_create(files)
+                touch_tippani(letterandocuments=letter_document_id)
+        except Exception:
+            handler.discard_stored()
+            raise
+        # Files sent under any other field name are not kept
+        attached = Counter(file.file.name for file in files)
+        for name in handler.stored_names:
+            if attached[name]:
+                attached[name] -= 1
+            else:
+                default_storage.delete(name)
+
+        serializer = self.get_serializer(files, many=True)
+        return Response({
+            "letter_document": int(letter_document_id),
+            "created": serializer.data,
+            "errors": errors
+        }, status=status.HTTP_201_CREATED if files else status.HTTP_400_BAD_REQUEST)
     
-class DesignationViewSet(viewsets.ModelViewSet):
+class DesignationViewSet(CachedResponseMixin, EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = Designation.objects.all()
     serializer_class = DesignationSerializer
 
-class ApprovalViewSet(viewsets.ModelViewSet):
+
+def inbox_queryset(request):
+    """
+    Return (queryset, error) for the Tippanis a designation holds with a given status.
+    """
+    designation = request.query_params.get('designation', '')
+    current_status = request.query_params.get('status', 'pending')
+    if not designation.isdigit():
+        return None, "Query parameter 'designation' is required"
+    if current_status not in dict(Approval.STATUS_CHOICES):
+        return None, "Invalid status"
+    fields, expand = TippaniSerializer.sparse_fieldset(request)
+    tippanis = TippaniSerializer.setup_eager_loading(
+        Tippani.objects.filter(current_holder_id=designation, current_status=current_status),
+        fields, expand, TippaniViewSet.ordering,
+    )
+    return tippanis, None
+
+
+class ApprovalViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = Approval.objects.all()
     serializer_class = ApprovalSerializer
+    export_columns = (
+        'id', 'tippani', 'tippani__present_subject', 'submitted_by__name', 'approved_by__name', 'status', 'remarks',
+        'approved_date',
+    )
 
     def get_queryset(self):
-        queryset = Approval.objects.all()
+        queryset = super().get_queryset()
         tippani_id = self.request.query_params.get('tippani_id', None)
         if tippani_id is not None:
             queryset = queryset.filter(tippani_id=tippani_id)
         return queryset
+
+    @action(detail=False, methods=['get'], url_path='inbox')
+    def inbox(self, request):
+        """
+        List the Tippanis currently held by a designation with a given status.
+        """
+        tippanis, error = inbox_queryset(request)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        page = self.paginator.paginate_queryset(tippanis, request, view=self, ordering=TippaniViewSet.ordering)
+        serializer = TippaniSerializer(page, many=True, context=self.get_serializer_context())
+        return self.paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        """
+        Download the Approval list as CSV or XLSX (?file_format=csv|xlsx), with the list's filters applied.
+        """
+        file_format = export_format(request)
+        if file_format is None:
+            return export_error()
+        queryset = self.filter_queryset(self.get_queryset()).order_by('id')
+        return export_response(queryset, self.export_columns, file_format, 'approvals')
     
 # Example views for other models (optional)
-class LoanViewSet(viewsets.ModelViewSet):
+class LoanViewSet(CachedResponseMixin, EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = Loan.objects.all()
     serializer_class = LoanSerializer
 
-class EducationViewSet(viewsets.ModelViewSet):
+class EducationViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = Education.objects.all()
     serializer_class = EducationSerializer
 
-class AwardsViewSet(viewsets.ModelViewSet):
+class AwardsViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = Awards.objects.all()
     serializer_class = AwardsSerializer
 
-class PunishmentsViewSet(viewsets.ModelViewSet):
+class PunishmentsViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = Punishments.objects.all()
     serializer_class = PunishmentsSerializer
 
-class OfficeViewSet(viewsets.ModelViewSet):
-    queryset = Office.objects.all()                                                                                                              
+class OfficeViewSet(CachedResponseMixin, EagerLoadingViewSetMixin, viewsets.ModelViewSet):
+    queryset = Office.objects.all()
     serializer_class = OfficeSerializer
+
+
+class UploadSessionViewSet(viewsets.GenericViewSet):
+    """
+    Resumable uploads: create a session, PATCH byte ranges, then finalize.
+    """
+    queryset = UploadSession.objects.all()
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return super().get_queryset().filter(expires_at__gt=timezone.now(), user_id=self.request.user.pk)
+
+    def create(self, request):
+        """
+        Start an upload session and reserve space for the file on disk.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        session = serializer.save(
+            user_id=request.user.pk,
+            expires_at=timezone.now() + timedelta(seconds=UPLOAD_SESSION_TTL),
+        )
+        path = part_path(session)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as part_file:
+            part_file.truncate(session.size)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, pk=None):
+        """
+        Report which byte ranges have been received so far.
+        """
+        serializer = self.get_serializer(self.get_object())
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    def partial_update(self, request, pk=None):
+        """
+        Write the request body at the offset given by its Content-Range header.
+        """
+        session = self.get_object()
+        content_range = parse_content_range(request.META.get('HTTP_CONTENT_RANGE'))
+        if content_range is None or content_range[2] != session.size:
+            return Response(
+                {"detail": f"Content-Range must be 'bytes <first>-<last>/{session.size}'."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        start, end, _ = content_range
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = 0
+        if content_length != end - start:
+            return Response(
+                {"detail": "Content-Length does not match Content-Range."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        written = write_chunk(part_path(session), start, request.stream, end - start)
+        with transaction.atomic():
+            session = UploadSession.objects.select_for_update().get(pk=session.pk)
+            if written:
+                session.received_ranges = merge_ranges(session.received_ranges, start, start + written)
+            session.expires_at = timezone.now() + timedelta(seconds=UPLOAD_SESSION_TTL)
+            session.save(update_fields=['received_ranges', 'expires_at'])
+        serializer = self.get_serializer(session)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    def destroy(self, request, pk=None):
+        """
+        Abandon an upload and free its disk space.
+        """
+        session = self.get_object()
+        discard_part(session)
+        session.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=['post'], url_path='finalize')
+    def finalize(self, request, pk=None):
+        """
+        Verify the checksum and attach the upload to its File or Tippani.
+        """
+        session = self.get_object()
+        if not session.is_complete:
+            return Response(
+                {"detail": "Upload is incomplete.", "received_ranges": session.received_ranges},
+                status=status.HTTP_409_CONFLICT
+            )
+        digest = sha256_of(part_path(session))
+        if digest != session.checksum:
+            UploadSession.objects.filter(pk=session.pk).update(received_ranges=[])
+            return Response(
+                {"detail": "Checksum mismatch; upload the file again."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with transaction.atomic():
+            session = UploadSession.objects.select_for_update().filter(pk=session.pk).first()
+            if session is None:
+                return Response({"detail": "Upload already finalized."}, status=status.HTTP_409_CONFLICT)
+            name = store_part(session, digest)
+            if session.target == 'file':
+                instance = File.objects.create(letter_document_id=session.letter_document_id, file=name)
+                data = FileSerializer(instance, context=self.get_serializer_context()).data
+            else:
+                instance = session.tippani
+                instance.present_file = name
+                instance.save(update_fields=['present_file', 'updated_at'])
+                data = TippaniSerializer(instance, context=self.get_serializer_context()).data
+            session.delete()
+        return Response(data, status=status.HTTP_201_CREATED)
+